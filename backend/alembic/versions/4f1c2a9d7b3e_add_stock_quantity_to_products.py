@@ -0,0 +1,27 @@
+"""add stock quantity to products
+
+Revision ID: 4f1c2a9d7b3e
+Revises: b748717c5cbc
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c2a9d7b3e'
+down_revision: Union[str, None] = 'b748717c5cbc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NULL keeps existing products untracked until stock is entered
+    op.add_column('products', sa.Column('stock_quantity', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('products', 'stock_quantity')
@@ -0,0 +1,52 @@
+"""add order status history and status indexes
+
+Revision ID: 8b2e6d0c5a17
+Revises: 4f1c2a9d7b3e
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e6d0c5a17'
+down_revision: Union[str, None] = '4f1c2a9d7b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('order_status_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('from_status', sa.String(), nullable=True),
+        sa.Column('to_status', sa.String(), nullable=False),
+        sa.Column('changed_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+        sa.ForeignKeyConstraint(['changed_by_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_status_history_id'), 'order_status_history', ['id'], unique=False)
+    op.create_index(op.f('ix_order_status_history_order_id'), 'order_status_history', ['order_id'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+
+    # Seed the history with each existing order's current status
+    op.execute("""
+        INSERT INTO order_status_history (order_id, from_status, to_status, changed_by_id, created_at)
+        SELECT id, NULL, status, user_id, created_at
+        FROM orders
+        WHERE status IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index(op.f('ix_order_status_history_order_id'), table_name='order_status_history')
+    op.drop_index(op.f('ix_order_status_history_id'), table_name='order_status_history')
+    op.drop_table('order_status_history')
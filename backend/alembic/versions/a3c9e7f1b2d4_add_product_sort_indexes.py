@@ -0,0 +1,48 @@
+"""add product sort indexes
+
+Revision ID: a3c9e7f1b2d4
+Revises: f2b8d5c1a6e4
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e7f1b2d4'
+down_revision: Union[str, None] = 'f2b8d5c1a6e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (sort column, id) serves every sort order in both directions; the
+# category_id variants cover the storefront's category pages
+INDEXES = [
+    ('ix_products_price_id', 'products', ['price', 'id']),
+    ('ix_products_category_id_price_id', 'products', ['category_id', 'price', 'id']),
+    ('ix_products_average_rating_id', 'products', ['average_rating', 'id']),
+    ('ix_products_category_id_average_rating_id', 'products', ['category_id', 'average_rating', 'id']),
+    ('ix_products_created_at_id', 'products', ['created_at', 'id']),
+    ('ix_products_name_id', 'products', ['name', 'id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True, if_exists=True,
+            )
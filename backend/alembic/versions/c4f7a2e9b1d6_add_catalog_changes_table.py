@@ -0,0 +1,36 @@
+"""add catalog changes table
+
+Revision ID: c4f7a2e9b1d6
+Revises: b5e2c8f1d3a9
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7a2e9b1d6'
+down_revision: Union[str, None] = 'b5e2c8f1d3a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('catalog_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('product_ids', sa.JSON(), nullable=True),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_catalog_changes_created_at'), 'catalog_changes', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_catalog_changes_created_at'), table_name='catalog_changes')
+    op.drop_table('catalog_changes')
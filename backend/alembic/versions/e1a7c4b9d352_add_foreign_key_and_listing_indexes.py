@@ -0,0 +1,51 @@
+"""add foreign key and listing indexes
+
+Revision ID: e1a7c4b9d352
+Revises: d90f4b6e2a81
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c4b9d352'
+down_revision: Union[str, None] = 'd90f4b6e2a81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_reviews_product_id_rating', 'reviews', ['product_id', 'rating']),
+    ('ix_reviews_user_id', 'reviews', ['user_id']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_order_items_product_id', 'order_items', ['product_id']),
+    ('ix_order_comments_order_id', 'order_comments', ['order_id']),
+    ('ix_cart_items_user_id_product_id', 'cart_items', ['user_id', 'product_id']),
+    ('ix_products_category_id', 'products', ['category_id']),
+    ('ix_products_manufacturer_id', 'products', ['manufacturer_id']),
+    ('ix_user_addresses_user_id', 'user_addresses', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction. If a build
+    # fails it leaves an INVALID index behind; drop it and rerun.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True, if_exists=True,
+            )
@@ -0,0 +1,58 @@
+"""add promotions tables
+
+Revision ID: f2b8d5c1a6e4
+Revises: e1a7c4b9d352
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d5c1a6e4'
+down_revision: Union[str, None] = 'e1a7c4b9d352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('promotions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('discount_type', sa.String(), nullable=False),
+        sa.Column('discount_value', sa.Float(), nullable=False),
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('start_date', sa.DateTime(), nullable=True),
+        sa.Column('end_date', sa.DateTime(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_promotions_id'), 'promotions', ['id'], unique=False)
+    op.create_index(op.f('ix_promotions_end_date'), 'promotions', ['end_date'], unique=False)
+    op.create_table('promotion_targets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('promotion_id', sa.Integer(), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['promotion_id'], ['promotions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_promotion_targets_id'), 'promotion_targets', ['id'], unique=False)
+    op.create_index(
+        'ix_promotion_targets_promotion_id_target_id', 'promotion_targets',
+        ['promotion_id', 'target_id'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_promotion_targets_promotion_id_target_id', table_name='promotion_targets')
+    op.drop_index(op.f('ix_promotion_targets_id'), table_name='promotion_targets')
+    op.drop_table('promotion_targets')
+    op.drop_index(op.f('ix_promotions_end_date'), table_name='promotions')
+    op.drop_index(op.f('ix_promotions_id'), table_name='promotions')
+    op.drop_table('promotions')
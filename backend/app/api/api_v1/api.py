@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from app.api.api_v1.endpoints import (
     auth, users, products, categories, manufacturers,
-    cart, orders, order_comments, reviews
+    cart, orders, order_comments, reviews, reports, exports, ai_agent,
+    profiles, promotions
 )
 
 api_router = APIRouter()
@@ -9,8 +10,13 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(products.router, prefix="/products", tags=["products"])
 api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
+api_router.include_router(promotions.router, prefix="/promotions", tags=["promotions"])
 api_router.include_router(manufacturers.router, prefix="/manufacturers", tags=["manufacturers"])
 api_router.include_router(cart.router, prefix="/cart", tags=["cart"])
 api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
 api_router.include_router(order_comments.router, prefix="/order-comments", tags=["order-comments"])
-api_router.include_router(reviews.router, prefix="/reviews", tags=["reviews"]) 
\ No newline at end of file
+api_router.include_router(reviews.router, prefix="/reviews", tags=["reviews"]) 
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(ai_agent.router, prefix="/ai", tags=["ai"])
+api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
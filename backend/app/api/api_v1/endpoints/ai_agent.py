@@ -1,10 +1,12 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.config import settings
+from app.core.embeddings import EmbeddingModelUnavailable
 from app.models.product import Product
 from app.models.category import Category
 from app.models.manufacturer import Manufacturer
@@ -16,11 +18,34 @@ def ai_search_products(
     *,
     db: Session = Depends(deps.get_db),
     prompt: str,
+    mode: str = Query("keyword", regex="^(keyword|semantic|hybrid)$"),
+    limit: int = Query(20, ge=1, le=100),
 ) -> Any:
     """
     AI-powered product search based on natural language prompt.
     The agent will analyze the prompt and return relevant products.
+
+    ``keyword`` mode returns every product mentioning a word of the
+    prompt. ``semantic`` ranks products by embedding similarity to the
+    prompt and ``hybrid`` fuses that with keyword matches; both return
+    the ``limit`` best, best first.
     """
+    if mode != "keyword":
+        if not settings.SEMANTIC_SEARCH_ENABLED:
+            raise HTTPException(status_code=400, detail="Semantic search is disabled")
+        try:
+            ids = crud.product_semantic.search(db, text=prompt, limit=limit, mode=mode)
+        except EmbeddingModelUnavailable as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+        products = {product.id: product for product in db.query(Product).filter(Product.id.in_(ids))}
+        ranked = [products[id] for id in ids if id in products]
+        if not ranked:
+            raise HTTPException(
+                status_code=404,
+                detail="No products found matching your description"
+            )
+        return [schemas.Product.from_orm(product) for product in ranked]
+
     # Convert prompt to lowercase for case-insensitive search
     prompt = prompt.lower()
     
@@ -66,14 +91,15 @@ def ai_recommend_products(
     *,
     db: Session = Depends(deps.get_db),
     prompt: str,
-    limit: int = 5
+    limit: int = 5,
+    mode: str = Query("keyword", regex="^(keyword|semantic|hybrid)$"),
 ) -> Any:
     """
     AI-powered product recommendations based on natural language prompt.
     The agent will analyze the prompt and recommend relevant products.
     """
     # First, get products based on search
-    products = ai_search_products(db=db, prompt=prompt)
+    products = ai_search_products(db=db, prompt=prompt, mode=mode, limit=max(1, min(limit, 100)))
     
     # If we have fewer products than the limit, return all of them
     if len(products) <= limit:
@@ -0,0 +1,94 @@
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.api import deps
+from app.api.streaming import MEDIA_TYPES, export_response, stream_rows
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+
+router = APIRouter()
+
+ORDER_LINE_COLUMNS = (
+    "order_id", "created_at", "status", "user_id", "total_amount",
+    "item_id", "product_id", "product_name", "quantity", "price",
+)
+
+PRODUCT_COLUMNS = (
+    "id", "name", "description", "price", "image_url", "category_id",
+    "manufacturer_id", "average_rating", "in_stock", "stock_quantity",
+    "created_at", "updated_at",
+)
+
+def _check_format(format: str) -> None:
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+
+@router.get("/orders")
+def export_orders(
+    format: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[str] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Stream order lines as CSV or NDJSON (admin only).
+    """
+    _check_format(format)
+
+    def build(db: Session):
+        stmt = (
+            select(
+                Order.id, Order.created_at, Order.status, Order.user_id, Order.total_amount,
+                OrderItem.id, OrderItem.product_id, Product.name,
+                OrderItem.quantity, OrderItem.price,
+            )
+            .select_from(Order)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(Product, OrderItem.product_id == Product.id)
+            .order_by(Order.id, OrderItem.id)
+        )
+        if start:
+            stmt = stmt.where(Order.created_at >= start)
+        if end:
+            stmt = stmt.where(Order.created_at < end)
+        if status:
+            stmt = stmt.where(Order.status == status)
+        return stmt
+
+    return export_response(format, ORDER_LINE_COLUMNS, stream_rows(build), "orders")
+
+@router.get("/products")
+def export_products(
+    format: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    category_id: Optional[int] = None,
+    manufacturer_id: Optional[int] = None,
+    in_stock: Optional[bool] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Stream the catalog as CSV or NDJSON (admin only).
+    """
+    _check_format(format)
+
+    def build(db: Session):
+        stmt = select(*[getattr(Product, name) for name in PRODUCT_COLUMNS]).order_by(Product.id)
+        if start:
+            stmt = stmt.where(Product.created_at >= start)
+        if end:
+            stmt = stmt.where(Product.created_at < end)
+        if category_id is not None:
+            stmt = stmt.where(Product.category_id == category_id)
+        if manufacturer_id is not None:
+            stmt = stmt.where(Product.manufacturer_id == manufacturer_id)
+        if in_stock is not None:
+            stmt = stmt.where(Product.in_stock == in_stock)
+        return stmt
+
+    return export_response(format, PRODUCT_COLUMNS, stream_rows(build), "products")
@@ -25,8 +25,9 @@ def get_order_comments(
     
     comments = crud.order_comment.get_by_order(db=db, order_id=order_id)
     # Add user info to comments
+    users = crud.user.get_many(db, ids=[comment.user_id for comment in comments])
     for comment in comments:
-        user = crud.user.get(db=db, id=comment.user_id)
+        user = users.get(comment.user_id)
         if user:
             comment.user_email = user.email
             comment.user_full_name = user.full_name
@@ -1,22 +1,38 @@
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.streaming import json_list_response, stream_objects
+from app.crud.crud_inventory import InsufficientStock
+from app.crud.crud_order import InvalidStatusTransition, ProductNotForSale
+from app.models.order import OrderStatus
 
-router = APIRouter()
+router = APIRouter(route_class=deps.UnitOfWorkRoute)
 
 @router.get("/", response_model=List[schemas.Order])
 def read_orders(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    stream: bool = False,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve orders.
+    Retrieve orders. ``stream=true`` writes the JSON array while rows are
+    fetched, newest first, for exports with a large ``limit``.
     """
+    if stream:
+        owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+        return json_list_response(
+            stream_objects(
+                lambda session: crud.order.listing_query(
+                    session, owner_id=owner_id, skip=skip, limit=limit
+                )
+            ),
+            lambda order: schemas.Order.from_orm(order).json(),
+        )
     if crud.user.is_superuser(current_user):
         orders = crud.order.get_multi(db, skip=skip, limit=limit)
     else:
@@ -30,18 +46,68 @@ def read_admin_orders(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    status: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Retrieve all orders (admin only).
+    Retrieve all orders (admin only), optionally only those in one status.
     """
+    if status:
+        return crud.order.get_by_status(db, status=status, skip=skip, limit=limit)
     orders = crud.order.get_multi(db, skip=skip, limit=limit)
     return orders
 
+@router.get("/admin/status-counts", response_model=Dict[str, int])
+def read_admin_order_status_counts(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Number of orders in each status (admin only).
+    """
+    return crud.order.count_by_status(db)
+
+@router.put("/admin/{id}/status/", response_model=schemas.Order)
+def update_admin_order_status(
+    *,
+    db: Session = Depends(deps.get_uow_db),
+    id: int,
+    status_in: schemas.OrderStatusUpdate,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Change an order's status (admin only).
+    """
+    order = crud.order.get(db=db, id=id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    try:
+        order = crud.order.set_status(
+            db, db_obj=order, status=status_in.status, changed_by_id=current_user.id
+        )
+    except InvalidStatusTransition as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return order
+
+@router.get("/admin/{id}/history", response_model=List[schemas.OrderStatusHistory])
+def read_admin_order_history(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get an order's status history (admin only).
+    """
+    order = crud.order.get(db=db, id=id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order.status_history
+
 @router.put("/admin/{id}", response_model=schemas.Order)
 def update_admin_order(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     id: int,
     order_in: schemas.OrderUpdate,
     current_user: models.User = Depends(deps.get_current_active_superuser),
@@ -52,39 +118,77 @@ def update_admin_order(
     order = crud.order.get(db=db, id=id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    order = crud.order.update(db=db, db_obj=order, obj_in=order_in)
+    if order_in.status is not None:
+        try:
+            order = crud.order.set_status(
+                db, db_obj=order, status=order_in.status, changed_by_id=current_user.id
+            )
+        except InvalidStatusTransition as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if not superuser:
+        return order
+    order = crud.order.update(
+        db=db, db_obj=order, obj_in=order_in.dict(exclude_unset=True, exclude={"status"})
+    )
     return order
 
 @router.post("/", response_model=schemas.Order)
 def create_order(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     order_in: schemas.OrderCreate,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Create new order.
     """
-    order = crud.order.create_with_owner(db=db, obj_in=order_in, owner_id=current_user.id)
+    try:
+        order = crud.order.create_with_owner(db=db, obj_in=order_in, owner_id=current_user.id)
+    except InsufficientStock as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Not enough stock", "product_ids": e.product_ids},
+        )
+    except ProductNotForSale as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Not for sale", "product_ids": e.product_ids},
+        )
+    except InvalidStatusTransition as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return order
 
 @router.put("/{id}", response_model=schemas.Order)
 def update_order(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     id: int,
     order_in: schemas.OrderUpdate,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Update an order.
+    Update an order. Customers may only cancel their own orders.
     """
     order = crud.order.get(db=db, id=id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    if not crud.user.is_superuser(current_user) and (order.owner_id != current_user.id):
+    superuser = crud.user.is_superuser(current_user)
+    if not superuser and (
+        order.user_id != current_user.id or order_in.status != OrderStatus.CANCELLED.value
+    ):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    order = crud.order.update(db=db, db_obj=order, obj_in=order_in)
+    if order_in.status is not None:
+        try:
+            order = crud.order.set_status(
+                db, db_obj=order, status=order_in.status, changed_by_id=current_user.id
+            )
+        except InvalidStatusTransition as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if not superuser:
+        return order
+    order = crud.order.update(
+        db=db, db_obj=order, obj_in=order_in.dict(exclude_unset=True, exclude={"status"})
+    )
     return order
 
 @router.get("/{id}", response_model=schemas.Order)
@@ -100,7 +204,7 @@ def read_order(
     order = crud.order.get(db=db, id=id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    if not crud.user.is_superuser(current_user) and (order.owner_id != current_user.id):
+    if not crud.user.is_superuser(current_user) and (order.user_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
     return order
 
@@ -117,7 +221,7 @@ def delete_order(
     order = crud.order.get(db=db, id=id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    if not crud.user.is_superuser(current_user) and (order.owner_id != current_user.id):
+    if not crud.user.is_superuser(current_user) and (order.user_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
     order = crud.order.remove(db=db, id=id)
     return order 
\ No newline at end of file
@@ -1,23 +1,162 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.streaming import RecordsResponse, encode_record, json_list_response, stream_objects
+from app.core.autocomplete import MAX_SUGGESTIONS
+from app.core.facets import Filters
+from app.crud.crud_product import INCLUDES, LISTING_FIELDS, SORTS, ListingColumns
+from app.crud.crud_product_import import FORMATS, read_records
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Product])
+def _parse_list(value: Optional[str], allowed: List[str], param: str) -> List[str]:
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {param}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+    return names
+
+def encode_cursor(keyset: Tuple[Any, int]) -> str:
+    value, id = keyset
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, id], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """
+    The keyset of an encode_cursor cursor. Its value must have the type of
+    the sort column: it is compared with the column in SQL, where Postgres
+    rejects a mismatch and SQLite silently matches nothing.
+    """
+    try:
+        value, id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(id, bool) or not isinstance(id, int):
+            raise TypeError(id)
+        kind = SORTS[sort][0].type.python_type
+        if kind is datetime:
+            value = datetime.fromisoformat(value)
+        elif kind is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise TypeError(value)
+            value = float(value)
+        elif not isinstance(value, kind):
+            raise TypeError(value)
+        return value, id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def catalog_filters(
+    category_id: Optional[List[int]] = Query(None),
+    manufacturer_id: Optional[List[int]] = Query(None),
+    country: Optional[List[str]] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    in_stock: Optional[bool] = None,
+) -> Filters:
+    """Repeat a list parameter to select several values (they are ORed)"""
+    return Filters(
+        category_ids=category_id or (),
+        manufacturer_ids=manufacturer_id or (),
+        countries=country or (),
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        in_stock=in_stock,
+    )
+
+@router.get("/", response_model=List[schemas.ProductListItem], response_model_exclude_unset=True)
 def read_products(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    filters: Filters = Depends(catalog_filters),
+) -> Any:
+    """
+    Retrieve products. ``include=category,manufacturer`` embeds the related
+    objects and ``fields=name,price,image_url`` returns only those fields
+    (the id is always present). Unsorted filtered listings match through
+    the in-memory facet index, which also serves GET /products/facets and
+    can trail changes made by other processes by a few seconds; sorted
+    listings filter in SQL.
+
+    ``sort=price|-price|rating|-rating|newest|name`` pages with keyset
+    cursors: pass the X-Next-Cursor header of a full page as ``cursor``
+    to get the next one.
+
+    ``stream=true`` writes the JSON array while rows are fetched, for
+    clients asking for very large pages; no cursor header is sent.
+    """
+    includes = _parse_list(include, list(INCLUDES), "include")
+    selected = _parse_list(fields, LISTING_FIELDS, "fields") or None
+    if sort is not None and sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORTS)}")
+    if cursor is not None and sort is None:
+        raise HTTPException(status_code=400, detail="cursor requires sort")
+
+    columns = ListingColumns(selected, includes, sort)
+    listing: dict = dict(skip=skip, limit=limit, columns=columns)
+    if sort is not None:
+        after = decode_cursor(cursor, sort) if cursor is not None else None
+        listing.update(sort=sort, after=after, filters=filters)
+    elif filters.any():
+        _, ids = crud.product_facets.search(db, filters=filters, skip=skip, limit=limit)
+        if not ids:
+            return []
+        listing.update(ids=ids)
+
+    if stream:
+        return json_list_response(
+            stream_objects(lambda session: crud.product.listing_query(session, **listing)),
+            lambda row: encode_record(columns.record(row)),
+        )
+    rows = crud.product.get_listing(db, **listing)
+    headers = {}
+    if sort is not None and rows and len(rows) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(columns.cursor(rows[-1]))
+    return RecordsResponse([columns.record(row) for row in rows], headers=headers)
+
+@router.get("/facets", response_model=schemas.ProductFacets)
+def read_product_facets(
+    db: Session = Depends(deps.get_db),
+    filters: Filters = Depends(catalog_filters),
+) -> Any:
+    """
+    Number of products matching the filters, and per-dimension counts for
+    the filter sidebar. Each dimension ignores its own filter.
+    """
+    total, facets = crud.product_facets.counts(db, filters=filters)
+    return {"total": total, "facets": facets}
+
+@router.get("/autocomplete", response_model=List[schemas.ProductSuggestion])
+def autocomplete_products(
+    db: Session = Depends(deps.get_db),
+    q: str = "",
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
 ) -> Any:
     """
-    Retrieve products.
+    Product, category and manufacturer names completing ``q``, most popular
+    first. Small typos are tolerated and earlier words must match whole.
     """
-    products = crud.product.get_multi(db, skip=skip, limit=limit)
-    return [schemas.Product.from_orm(p) for p in products]
+    suggestions = crud.product_autocomplete.suggest(db, text=q, limit=limit)
+    return [{"kind": s.kind, "id": s.id, "name": s.name} for s in suggestions]
 
 @router.post("/", response_model=schemas.Product)
 def create_product(
@@ -32,6 +171,42 @@ def create_product(
     product = crud.product.create(db, obj_in=product_in)
     return schemas.Product.from_orm(product)
 
+@router.post("/import", response_model=schemas.ProductImportResult)
+def import_products(
+    *,
+    db: Session = Depends(deps.get_db),
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Bulk create or update products from a CSV, JSON or NDJSON feed keyed by SKU.
+    """
+    fmt = (format or (file.filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'csv', 'json' or 'ndjson'")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig")
+    try:
+        return crud.product_import.run(db, read_records(stream, fmt))
+    except (ValueError, TypeError, csv.Error) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Could not read feed: {e}")
+
+@router.patch("/bulk", response_model=schemas.ProductBulkUpdateResult)
+def bulk_update_products(
+    *,
+    db: Session = Depends(deps.get_db),
+    items_in: List[schemas.ProductBulkUpdateItem],
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Change price, stock and other fields of many products at once.
+    Only the fields present in each item are updated.
+    """
+    items = [item.dict(exclude_unset=True) for item in items_in]
+    missing = crud.product.bulk_update(db, items=items)
+    return {"updated": len({item["id"] for item in items}) - len(missing), "missing": missing}
+
 @router.put("/{id}", response_model=schemas.Product)
 def update_product(
     *,
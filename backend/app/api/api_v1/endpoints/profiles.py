@@ -0,0 +1,51 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app import models
+from app.api import deps
+from app.core.profiling import store, to_collapsed, to_speedscope
+
+router = APIRouter()
+
+@router.get("/")
+def read_profiles(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    List captured request profiles, newest first (admin only).
+    """
+    return [profile.summary() for profile in store.all()]
+
+@router.get("/export")
+def export_profiles(
+    format: str = "speedscope",
+    profile_id: Optional[List[int]] = Query(None),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Export profiles as a speedscope file or collapsed stacks (admin only).
+    """
+    if format not in ("speedscope", "collapsed"):
+        raise HTTPException(status_code=400, detail="format must be 'speedscope' or 'collapsed'")
+    profiles = store.all()
+    if profile_id:
+        profiles = [p for p in profiles if p.id in profile_id]
+    if not profiles:
+        raise HTTPException(status_code=404, detail="No profiles captured")
+    if format == "collapsed":
+        return PlainTextResponse(to_collapsed(profiles))
+    return JSONResponse(
+        to_speedscope(profiles),
+        headers={"Content-Disposition": 'attachment; filename="profiles.speedscope.json"'},
+    )
+
+@router.delete("/")
+def clear_profiles(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Drop all captured profiles (admin only).
+    """
+    store.clear()
+    return {"ok": True}
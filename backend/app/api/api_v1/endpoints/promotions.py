@@ -0,0 +1,89 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.crud.crud_promotion import InvalidPromotion
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.Promotion])
+def read_promotions(
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_only: bool = True,
+) -> Any:
+    """
+    Retrieve promotions, by default only the active ones that haven't ended.
+    """
+    promotions = crud.promotion.get_multi(db, skip=skip, limit=limit, current_only=current_only)
+    return [schemas.Promotion.from_orm(p) for p in promotions]
+
+@router.get("/{id}", response_model=schemas.Promotion)
+def read_promotion(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+) -> Any:
+    """
+    Get promotion by ID.
+    """
+    promotion = crud.promotion.get(db, id=id)
+    if not promotion:
+        raise HTTPException(status_code=404, detail="Promotion not found")
+    return schemas.Promotion.from_orm(promotion)
+
+@router.post("/", response_model=schemas.Promotion)
+def create_promotion(
+    *,
+    db: Session = Depends(deps.get_db),
+    promotion_in: schemas.PromotionCreate,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Create new promotion (admin only).
+    """
+    try:
+        promotion = crud.promotion.create(db, obj_in=promotion_in)
+    except InvalidPromotion as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schemas.Promotion.from_orm(promotion)
+
+@router.put("/{id}", response_model=schemas.Promotion)
+def update_promotion(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    promotion_in: schemas.PromotionUpdate,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Update a promotion (admin only).
+    """
+    promotion = crud.promotion.get(db, id=id)
+    if not promotion:
+        raise HTTPException(status_code=404, detail="Promotion not found")
+    try:
+        promotion = crud.promotion.update(db, db_obj=promotion, obj_in=promotion_in)
+    except InvalidPromotion as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schemas.Promotion.from_orm(promotion)
+
+@router.delete("/{id}", response_model=schemas.Promotion)
+def delete_promotion(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Delete a promotion (admin only).
+    """
+    promotion = crud.promotion.get(db, id=id)
+    if not promotion:
+        raise HTTPException(status_code=404, detail="Promotion not found")
+    result = schemas.Promotion.from_orm(promotion)
+    crud.promotion.remove(db, id=id)
+    return result
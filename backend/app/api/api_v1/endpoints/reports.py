@@ -0,0 +1,77 @@
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.crud.crud_report import DIMENSIONS
+
+router = APIRouter()
+
+def _date_range(start: Optional[date], end: Optional[date]):
+    # Orders are stamped in UTC
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return start, end
+
+@router.get("/sales/summary", response_model=schemas.SalesSummary)
+def read_sales_summary(
+    db: Session = Depends(deps.get_db),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Revenue, order count and orders by status for a date range (last 30 days by default).
+    """
+    start, end = _date_range(start, end)
+    return crud.report.summary(db, start=start, end=end)
+
+@router.get("/sales/daily", response_model=List[schemas.DailySales])
+def read_daily_sales(
+    db: Session = Depends(deps.get_db),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Revenue and order count per day.
+    """
+    start, end = _date_range(start, end)
+    return crud.report.daily(db, start=start, end=end)
+
+@router.get("/sales/top", response_model=List[schemas.TopSalesEntry])
+def read_top_sales(
+    db: Session = Depends(deps.get_db),
+    dimension: str = "product",
+    order_by: str = "revenue",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = 10,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Top products, categories or manufacturers by revenue or units sold.
+    """
+    if dimension not in DIMENSIONS or dimension == "total":
+        raise HTTPException(status_code=400, detail="Unknown report dimension")
+    if order_by not in ("revenue", "units"):
+        raise HTTPException(status_code=400, detail="order_by must be 'revenue' or 'units'")
+    start, end = _date_range(start, end)
+    return crud.report.top(
+        db, dimension=dimension, start=start, end=end, order_by=order_by, limit=limit
+    )
+
+@router.post("/sales/rebuild", response_model=schemas.RebuildResult)
+def rebuild_sales_rollups(
+    db: Session = Depends(deps.get_db),
+    start: Optional[date] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Recompute the rollups from the orders table, e.g. after manual data fixes.
+    """
+    return {"rows": crud.report.rebuild(db, start=start)}
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.api import deps
 
-router = APIRouter()
+router = APIRouter(route_class=deps.UnitOfWorkRoute)
 
 @router.get("/", response_model=List[schemas.Review])
 def read_reviews(
@@ -23,7 +23,7 @@ def read_reviews(
 @router.post("/", response_model=schemas.Review)
 def create_review(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     review_in: schemas.ReviewCreate,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -65,8 +65,9 @@ def read_product_reviews(
     )
     
     # Add user info to each review
+    users = crud.user.get_many(db, ids=[review.user_id for review in reviews])
     for review in reviews:
-        user = crud.user.get(db=db, id=review.user_id)
+        user = users.get(review.user_id)
         if user:
             review.user_name = user.full_name
             review.user_email = user.email
@@ -76,7 +77,7 @@ def read_product_reviews(
 @router.put("/{id}", response_model=schemas.Review)
 def update_review(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     id: int,
     review_in: schemas.ReviewUpdate,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -130,7 +131,7 @@ def read_review(
 @router.delete("/{id}", response_model=schemas.Review)
 def delete_review(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
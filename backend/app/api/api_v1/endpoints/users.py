@@ -5,8 +5,9 @@ from pydantic import BaseModel
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.streaming import json_list_response, stream_objects
 
-router = APIRouter()
+router = APIRouter(route_class=deps.UnitOfWorkRoute)
 
 class ThemeUpdate(BaseModel):
     theme: str
@@ -26,11 +27,18 @@ def read_users(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    stream: bool = False,
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Retrieve users.
+    Retrieve users. ``stream=true`` writes the JSON array while rows are
+    fetched, for exports with a large ``limit``.
     """
+    if stream:
+        return json_list_response(
+            stream_objects(lambda session: crud.user.listing_query(session, skip=skip, limit=limit)),
+            lambda user: schemas.User.from_orm(user).json(),
+        )
     users = crud.user.get_multi(db, skip=skip, limit=limit)
     return users
 
@@ -69,7 +77,7 @@ def update_user_me(
 @router.put("/profile", response_model=schemas.User)
 def update_user_profile(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     profile_in: ProfileUpdate,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -135,7 +143,7 @@ def update_user_profile(
         )
         db.add(new_address)
 
-    db.commit()
+    db.flush()
     db.refresh(user)
     
     return user.dict()
@@ -186,7 +194,8 @@ def update_user_theme(
     user = crud.user.update(
         db,
         db_obj=current_user,
-        obj_in={"theme": theme_in.theme}
+        obj_in={"theme": theme_in.theme},
+        returning=True
     )
     return user 
 
@@ -214,5 +223,7 @@ def block_user(
             detail="Cannot block superusers"
         )
     
-    user = crud.user.update(db, db_obj=user, obj_in={"is_active": block_data.is_active})
+    user = crud.user.update(
+        db, db_obj=user, obj_in={"is_active": block_data.is_active}, returning=True
+    )
     return user.dict() 
\ No newline at end of file
@@ -1,5 +1,7 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import Callable, Coroutine, Generator, Optional
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 import jwt
@@ -7,6 +9,7 @@ import jwt
 from app import crud, models, schemas
 from app.core.config import settings
 from app.db.session import SessionLocal
+from app.db.unit_of_work import UNIT_OF_WORK_KEY
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -19,6 +22,45 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+def get_uow_db(request: Request, db: Session = Depends(get_db)) -> Generator:
+    """
+    Request-scoped unit of work for multi-step write endpoints. CRUD calls
+    on this session only flush; UnitOfWorkRoute commits once the response
+    is rendered, and the request rolls back if the handler or the commit
+    raises. Shares the get_db session, so the current user dependency
+    takes part in the same transaction. Routers using it must be created
+    with ``APIRouter(route_class=deps.UnitOfWorkRoute)``.
+    """
+    db.info[UNIT_OF_WORK_KEY] = True
+    request.state.unit_of_work = db
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.info.pop(UNIT_OF_WORK_KEY, None)
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Commits the get_uow_db session after the handler's response is
+    rendered but before it is sent. FastAPI < 0.106 resumes yield
+    dependencies only after sending, too late for a failed commit to
+    become an error response or for the client to read its own write.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+
+        async def commit_before_sending(request: Request) -> Response:
+            response = await handler(request)
+            db = getattr(request.state, "unit_of_work", None)
+            if db is not None:
+                await run_in_threadpool(db.commit)
+            return response
+
+        return commit_before_sending
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
@@ -44,7 +86,9 @@ def get_current_user(
             user = crud.user.create(db, obj_in=user_in)
         elif email in settings.SUPERUSER_EMAILS and not user.is_superuser:
             # Update existing user to superuser if their email is in SUPERUSER_EMAILS
-            user = crud.user.update(db, db_obj=user, obj_in={"is_superuser": True})
+            user = crud.user.update(
+                db, db_obj=user, obj_in={"is_superuser": True}, returning=True
+            )
         return user
     except jwt.InvalidTokenError:
         raise HTTPException(
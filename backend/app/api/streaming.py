@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.instrumentation import skip_query_budget
+from app.db.session import SessionLocal
+
+CHUNK_ROWS = 500
+FETCH_ROWS = 1000
+
+JSON_MEDIA_TYPE = "application/json"
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+def encode_record(value: Any) -> str:
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    )
+
+class RecordsResponse(JSONResponse):
+    """
+    JSON response for handlers that build plain dict records themselves
+    instead of going through response_model validation
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encode_record(content).encode("utf-8")
+
+def stream_rows(build_statement: Callable[[Session], Any]) -> Iterator[Any]:
+    """
+    Run a statement on its own session with a server-side cursor and yield
+    rows as they are fetched. The session outlives the request dependency,
+    so it is opened and closed by the generator itself.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            build_statement(db).execution_options(stream_results=True)
+        ).yield_per(FETCH_ROWS)
+        for row in result:
+            yield row
+    finally:
+        db.close()
+
+def stream_objects(build_query: Callable[[Session], Any]) -> Iterator[Any]:
+    """
+    ORM counterpart of stream_rows: yield the entities of a Query in
+    batches of FETCH_ROWS, so only one batch is alive at a time.
+    Relationships have to use selectinload (one extra SELECT per batch);
+    joined eager loading of collections can't be combined with yield_per.
+    """
+    db = SessionLocal()
+    try:
+        for obj in build_query(db).yield_per(FETCH_ROWS):
+            yield obj
+    finally:
+        db.close()
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow(
+            [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+        )
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+def ndjson_chunks(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    lines: List[str] = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), default=_default, ensure_ascii=False))
+        if len(lines) >= CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def json_array_chunks(items: Iterable[str]) -> Iterator[str]:
+    """Already encoded JSON values as one array, CHUNK_ROWS values per chunk"""
+    yield "["
+    separator = ""
+    batch: List[str] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= CHUNK_ROWS:
+            yield separator + ",".join(batch)
+            separator = ","
+            batch = []
+    if batch:
+        yield separator + ",".join(batch)
+    yield "]"
+
+def json_list_response(objects: Iterable[Any], encode: Callable[[Any], str]) -> StreamingResponse:
+    """
+    A JSON array response written while ``objects`` are fetched, for list
+    endpoints called with large limits; peak memory is one fetch batch
+    rather than the whole list. Relationship loads repeat per batch, so
+    the route's statement budget doesn't apply.
+    """
+    skip_query_budget()
+    return StreamingResponse(
+        json_array_chunks(encode(obj) for obj in objects), media_type=JSON_MEDIA_TYPE
+    )
+
+def export_response(
+    fmt: str, columns: Sequence[str], rows: Iterable[Sequence[Any]], filename: str
+) -> StreamingResponse:
+    chunks = csv_chunks(columns, rows) if fmt == "csv" else ndjson_chunks(columns, rows)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,300 @@
+"""
+In-memory autocomplete over product, category and manufacturer names.
+Every normalized word of a name (see app.core.text_search.words) is a
+path in a character trie, and each trie node caches the best suggestions
+below it, so an exact prefix is answered by walking the prefix. When
+that finds too few names, typos are matched by a bounded Levenshtein walk
+of the trie: one edit for prefixes of three to five characters, two from
+six on, with the first character taken as typed.
+
+Suggestions are ranked by edit distance, then popularity: the log of the
+number of order lines plus a fifth of the average rating for products,
+the log of the order lines of all their products for categories and
+manufacturers. With several words all but the last must match whole
+words (corrected only when unknown), the last one as a prefix.
+
+The index is filled and kept current by app.crud.crud_product_autocomplete.
+"""
+import heapq
+import math
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.text_search import words
+
+PRODUCT = "product"
+CATEGORY = "category"
+MANUFACTURER = "manufacturer"
+
+# Suggestions cached per trie node; the most a query may ask for
+MAX_SUGGESTIONS = 20
+# Checking a candidate's words in Python costs about this many set
+# insertions of a subtree scan
+_CHECK_COST = 10
+
+class ProductStats(NamedTuple):
+    id: int
+    name: Optional[str]
+    category_id: Optional[int]
+    manufacturer_id: Optional[int]
+    rating: Optional[float]
+    orders: int
+
+class Suggestion(NamedTuple):
+    kind: str
+    id: int
+    name: str
+    popularity: float
+
+Key = Tuple[str, int]
+
+def max_edits(prefix: str) -> int:
+    if len(prefix) < 3:
+        return 0
+    return 1 if len(prefix) < 6 else 2
+
+def _popularity(orders: int, rating: Optional[float] = None) -> float:
+    return math.log1p(orders) + (rating or 0.0) / 5
+
+class _Node:
+    __slots__ = ("children", "keys", "size", "best")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        # Names with a word ending here
+        self.keys: Set[Key] = set()
+        # Words of names in the subtree
+        self.size = 0
+        # Top MAX_SUGGESTIONS keys of this subtree, None when stale
+        self.best: Optional[List[Key]] = None
+
+class AutocompleteIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._root = _Node()
+        self._entries: Dict[Key, Suggestion] = {}
+        self._words: Dict[Key, Tuple[str, ...]] = {}
+        self._products: Dict[int, ProductStats] = {}
+        # Order lines per category and manufacturer id
+        self._group_orders: Dict[Key, int] = defaultdict(int)
+
+    def load(
+        self,
+        products: Iterable[ProductStats],
+        categories: Iterable[Tuple[int, str]],
+        manufacturers: Iterable[Tuple[int, str]],
+    ) -> None:
+        with self._lock:
+            self._root = _Node()
+            self._entries = {}
+            self._words = {}
+            self._products = {}
+            self._group_orders = defaultdict(int)
+            for product in products:
+                self._add_product(product)
+            for kind, rows in ((CATEGORY, categories), (MANUFACTURER, manufacturers)):
+                for id, name in rows:
+                    self._insert(Suggestion(kind, id, name, _popularity(self._group_orders[(kind, id)])))
+            # Rank everything now rather than on the first keystroke
+            self._best(self._root)
+            self.loaded = True
+
+    def update(self, products: Iterable[ProductStats], removed: Iterable[int] = ()) -> None:
+        """Reindex ``products`` and drop the ``removed`` product ids"""
+        with self._lock:
+            groups: Set[Key] = set()
+            for product in products:
+                groups.update(self._remove_product(product.id))
+                groups.update(self._add_product(product))
+            for id in removed:
+                groups.update(self._remove_product(id))
+            for key in groups:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._remove(key)
+                    self._insert(entry._replace(popularity=_popularity(self._group_orders[key])))
+
+    @staticmethod
+    def _groups(product: ProductStats) -> List[Key]:
+        groups = []
+        if product.category_id is not None:
+            groups.append((CATEGORY, product.category_id))
+        if product.manufacturer_id is not None:
+            groups.append((MANUFACTURER, product.manufacturer_id))
+        return groups
+
+    def _add_product(self, product: ProductStats) -> List[Key]:
+        """Index ``product``; returns the groups whose popularity it changed"""
+        self._products[product.id] = product
+        if product.name:
+            self._insert(
+                Suggestion(PRODUCT, product.id, product.name, _popularity(product.orders, product.rating))
+            )
+        groups = self._groups(product)
+        for key in groups:
+            self._group_orders[key] += product.orders
+        return groups
+
+    def _remove_product(self, id: int) -> List[Key]:
+        product = self._products.pop(id, None)
+        if product is None:
+            return []
+        self._remove((PRODUCT, id))
+        groups = self._groups(product)
+        for key in groups:
+            self._group_orders[key] -= product.orders
+        return groups
+
+    def _insert(self, entry: Suggestion) -> None:
+        key = (entry.kind, entry.id)
+        self._entries[key] = entry
+        self._words[key] = tuple(set(words(entry.name)))
+        for word in self._words[key]:
+            node = self._root
+            node.best = None
+            for char in word:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                node = child
+                node.best = None
+                node.size += 1
+            node.keys.add(key)
+
+    def _remove(self, key: Key) -> None:
+        if self._entries.pop(key, None) is None:
+            return
+        for word in self._words.pop(key):
+            node = self._root
+            node.best = None
+            for char in word:
+                node = node.children[char]
+                node.best = None
+                node.size -= 1
+            node.keys.discard(key)
+
+    def _rank(self, key: Key) -> Tuple[float, str, str, int]:
+        entry = self._entries[key]
+        return -entry.popularity, entry.name, entry.kind, entry.id
+
+    def _best(self, node: _Node) -> List[Key]:
+        if node.best is None:
+            keys = set(node.keys)
+            for child in node.children.values():
+                keys.update(self._best(child))
+            node.best = heapq.nsmallest(MAX_SUGGESTIONS, keys, key=self._rank)
+        return node.best
+
+    def _matches(self, word: str, edits: int, prefix: bool) -> List[Tuple[_Node, str, int]]:
+        """
+        Nodes within ``edits`` edits of ``word``, with their path and distance; with
+        ``prefix`` a node stands for its whole subtree, otherwise only
+        for the words ending there. The first character has to match, which
+        keeps the walk to one branch of the trie.
+        """
+        node = self._root.children.get(word[0])
+        if node is None:
+            return []
+        if edits == 0:
+            for char in word[1:]:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            return [(node, word, 0)]
+
+        matches: List[Tuple[_Node, str, int]] = []
+
+        def walk(node: _Node, path: str, previous: List[int], best: int) -> None:
+            char = path[-1]
+            row = [previous[0] + 1]
+            for i, expected in enumerate(word, 1):
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (expected != char)))
+            distance = row[-1]
+            if distance < best and (node.keys or prefix):
+                matches.append((node, path, distance))
+                if prefix:
+                    # Deeper prefixes only matter if they come closer
+                    best = distance
+            if min(row) < best:
+                for next_char, child in node.children.items():
+                    walk(child, path + next_char, row, best)
+
+        walk(node, word[0], list(range(len(word) + 1)), edits + 1)
+        return matches
+
+    def _word_keys(self, word: str) -> Set[Key]:
+        """Names containing ``word``, or a word within a few edits of it"""
+        keys: Set[Key] = set()
+        for node, _, _ in self._matches(word, 0, prefix=False):
+            keys.update(node.keys)
+        if not keys and max_edits(word):
+            for node, _, _ in self._matches(word, max_edits(word), prefix=False):
+                keys.update(node.keys)
+        return keys
+
+    def _prefix_distances(
+        self, matches: List[Tuple[_Node, str, int]], allowed: Optional[Set[Key]], distances: Dict[Key, int]
+    ) -> None:
+        """Record in ``distances`` the candidates below the matched nodes"""
+        lengths = {len(path) for _, path, _ in matches}
+        if allowed is None:
+            found = [(key, distance) for node, _, distance in matches for key in self._best(node)]
+        elif len(allowed) * len(lengths) * _CHECK_COST >= sum(node.size for node, _, _ in matches):
+            found = [
+                (key, distance) for node, _, distance in matches
+                for key in self._subtree_keys(node) & allowed
+            ]
+        else:
+            # Few candidates, many words below the nodes: check the candidates
+            paths = {path: distance for _, path, distance in matches}
+            found = []
+            for key in allowed:
+                for word in self._words[key]:
+                    for length in lengths:
+                        distance = paths.get(word[:length])
+                        if distance is not None:
+                            found.append((key, distance))
+        for key, distance in found:
+            if distances.get(key, distance + 1) > distance:
+                distances[key] = distance
+
+    def _subtree_keys(self, node: _Node) -> Set[Key]:
+        keys = set(node.keys)
+        stack = list(node.children.values())
+        while stack:
+            child = stack.pop()
+            keys.update(child.keys)
+            stack.extend(child.children.values())
+        return keys
+
+    def suggest(self, text: str, limit: int = 10) -> List[Suggestion]:
+        """Up to ``limit`` names completing ``text``, best first"""
+        query = words(text)
+        if not query:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        *leading, last = query
+        with self._lock:
+            allowed: Optional[Set[Key]] = None
+            for word in leading:
+                keys = self._word_keys(word)
+                allowed = keys if allowed is None else allowed & keys
+                if not allowed:
+                    return []
+
+            distances: Dict[Key, int] = {}
+            self._prefix_distances(self._matches(last, 0, prefix=True), allowed, distances)
+            # Exact completions rank first, so typos only matter when they run short
+            if len(distances) < limit and max_edits(last):
+                self._prefix_distances(self._matches(last, max_edits(last), prefix=True), allowed, distances)
+            ranked = heapq.nsmallest(
+                limit, distances, key=lambda key: (distances[key], *self._rank(key))
+            )
+            return [self._entries[key] for key in ranked]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,290 @@
+"""
+Product change notifications for in-process catalog caches and indexes.
+ORM flushes of Product rows are picked up automatically and set-based
+statements call mark_products_changed; listeners run once after the
+transaction commits, so a bulk write triggers a single refresh and rolled
+back changes trigger none. Categories and manufacturers are shown with
+every product, so a change to one counts as a change to the whole catalog.
+
+Other processes (more server workers, scripts.import_products) learn
+about the change through a catalog_changes row written in the same
+transaction: catalog_sync reads new rows every few seconds and runs the
+same listeners, so caches trail changes made elsewhere by at most
+CATALOG_SYNC_SECONDS. Promotion changes are logged the same way for the
+price table (mark_promotions_changed, on_promotions_changed).
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, func, insert, or_
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.models.catalog_change import CatalogChange
+from app.models.category import Category
+from app.models.manufacturer import Manufacturer
+from app.models.product import Product
+
+ProductsChangedListener = Callable[[Optional[Set[int]]], None]
+
+logger = logging.getLogger(__name__)
+
+_listeners: List[ProductsChangedListener] = []
+_promotion_listeners: List[Callable[[], None]] = []
+
+_PENDING_KEY = "changed_product_ids"
+_PROMOTIONS_KEY = "promotions_changed"
+_ALL = "all"
+
+PRODUCTS = "products"
+PROMOTIONS = "promotions"
+# Changes to more products are logged as a change to the whole catalog
+LOGGED_IDS_LIMIT = 5000
+# How long an id skipped by the log is waited for: ids are taken before
+# commit, so a slower transaction can commit a lower one later
+_GAP_SECONDS = 30.0
+# Logged changes older than this are deleted
+_RETENTION = timedelta(days=1)
+_PRUNE_SECONDS = 600.0
+
+_source = (0, "")
+
+def _process_source() -> str:
+    """Tag of this process's catalog_changes rows; forked workers get their own"""
+    global _source
+    pid = os.getpid()
+    if _source[0] != pid:
+        _source = (pid, f"{pid}-{uuid.uuid4().hex[:12]}")
+    return _source[1]
+
+def on_products_changed(listener: ProductsChangedListener) -> ProductsChangedListener:
+    """
+    Register a listener. It receives the changed product ids, or None when
+    the whole catalog should be treated as changed.
+    """
+    _listeners.append(listener)
+    return listener
+
+def on_promotions_changed(listener: Callable[[], None]) -> Callable[[], None]:
+    """
+    Register a listener for promotions changed by other processes; this
+    process's own changes are applied by app.crud.crud_promotion as they
+    commit.
+    """
+    _promotion_listeners.append(listener)
+    return listener
+
+def mark_promotions_changed(db: Session) -> None:
+    db.info[_PROMOTIONS_KEY] = True
+
+def mark_products_changed(db: Session, product_ids: Optional[Iterable[int]] = None) -> None:
+    pending = db.info.get(_PENDING_KEY)
+    if pending == _ALL:
+        return
+    if product_ids is None:
+        db.info[_PENDING_KEY] = _ALL
+        return
+    if pending is None:
+        pending = db.info[_PENDING_KEY] = set()
+    pending.update(product_ids)
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, flush_context) -> None:
+    product_ids = []
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Product):
+            product_ids.append(obj.id)
+        elif isinstance(obj, (Category, Manufacturer)):
+            mark_products_changed(session)
+            return
+    if product_ids:
+        mark_products_changed(session, product_ids)
+
+@event.listens_for(Session, "before_commit")
+def _log_changes(session: Session) -> None:
+    # Collect what is still unflushed, then log it with the transaction
+    session.flush()
+    pending = session.info.get(_PENDING_KEY)
+    rows = []
+    if pending is not None:
+        logged = None if pending == _ALL or len(pending) > LOGGED_IDS_LIMIT else sorted(pending)
+        rows.append({"kind": PRODUCTS, "product_ids": logged})
+    if session.info.get(_PROMOTIONS_KEY):
+        rows.append({"kind": PROMOTIONS, "product_ids": None})
+    if rows:
+        source, now = _process_source(), datetime.utcnow()
+        session.execute(
+            insert(CatalogChange), [dict(row, source=source, created_at=now) for row in rows]
+        )
+
+def _notify(product_ids: Optional[Set[int]]) -> None:
+    for listener in _listeners:
+        try:
+            listener(product_ids)
+        except Exception:
+            # A stale cache must never fail a write that already committed
+            logger.exception("Products changed listener %r failed", listener)
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session: Session) -> None:
+    session.info.pop(_PROMOTIONS_KEY, None)
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+    _notify(None if pending == _ALL else set(pending))
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PROMOTIONS_KEY, None)
+
+class LoadTracker:
+    """
+    Changes that commit while an index is being loaded. The load's SELECTs
+    may have run before such a change, so instead of the listener dropping
+    it (or applying it to the index about to be replaced) the load applies
+    it once the new index is in place. Listeners start with
+    ``if tracker.record(product_ids) or not index.loaded: return``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loads = 0
+        # Changes since the oldest running load began; None entries mean the whole catalog
+        self._changes: List[Optional[Set[int]]] = []
+        # Position of _changes[0] among all changes recorded
+        self._offset = 0
+
+    def record(self, product_ids: Optional[Set[int]]) -> bool:
+        """Keep a change for the running loads; False when nothing is loading"""
+        with self._lock:
+            if not self._loads:
+                return False
+            self._changes.append(None if product_ids is None else set(product_ids))
+            return True
+
+    def run(self, load: Callable[[], None], refresh: Callable[[Set[int]], None]) -> None:
+        """
+        Call ``load``, then apply what changed meanwhile: ``refresh`` for
+        product ids, another load when the whole catalog changed.
+        """
+        while True:
+            with self._lock:
+                self._loads += 1
+                start = self._offset + len(self._changes)
+            try:
+                load()
+            finally:
+                with self._lock:
+                    missed = self._changes[start - self._offset:]
+                    self._loads -= 1
+                    if not self._loads:
+                        self._offset += len(self._changes)
+                        self._changes = []
+            if any(ids is None for ids in missed):
+                continue
+            changed = set().union(*missed)
+            if changed:
+                refresh(changed)
+            return
+
+class CatalogSync:
+    """
+    Runs the listeners for changes other processes logged to
+    catalog_changes. start() remembers where the log ends, so it must run
+    before any cache loads; afterwards a background thread calls
+    catch_up() every few seconds, and callers that can't serve stale data
+    (checkout) call it themselves.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Highest id applied, None until started
+        self._position: Optional[int] = None
+        # Skipped ids below _position -> time.monotonic() to give up at
+        self._gaps: Dict[int, float] = {}
+        self._pruned = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, interval_seconds: float) -> None:
+        if self._thread is not None:
+            return
+        self.catch_up()
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.catch_up()
+                except Exception:
+                    logger.exception("Catalog sync failed")
+
+        self._thread = threading.Thread(target=run, name="catalog-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def catch_up(self) -> None:
+        """Run the listeners for changes logged by other processes since the last call"""
+        with self._lock:
+            with SessionLocal() as db:
+                if self._position is None:
+                    self._position = db.query(func.max(CatalogChange.id)).scalar() or 0
+                    return
+                rows = (
+                    db.query(CatalogChange.id, CatalogChange.kind, CatalogChange.product_ids, CatalogChange.source)
+                    .filter(or_(CatalogChange.id > self._position, CatalogChange.id.in_(self._gaps)))
+                    .order_by(CatalogChange.id)
+                    .all()
+                )
+                self._advance({row.id for row in rows})
+                if time.monotonic() - self._pruned >= _PRUNE_SECONDS:
+                    self._prune(db)
+            self._apply(rows)
+
+    def _advance(self, seen: Set[int]) -> None:
+        now = time.monotonic()
+        top = max(seen, default=self._position)
+        for id in range(self._position + 1, top):
+            if id not in seen:
+                self._gaps[id] = now + _GAP_SECONDS
+        self._position = max(self._position, top)
+        self._gaps = {id: until for id, until in self._gaps.items() if id not in seen and until > now}
+
+    def _prune(self, db: Session) -> None:
+        self._pruned = time.monotonic()
+        db.query(CatalogChange).filter(
+            CatalogChange.created_at < datetime.utcnow() - _RETENTION
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    def _apply(self, rows) -> None:
+        source = _process_source()
+        product_ids: Optional[Set[int]] = set()
+        promotions = False
+        for row in rows:
+            if row.source == source:
+                continue
+            if row.kind == PROMOTIONS:
+                promotions = True
+            elif product_ids is not None:
+                product_ids = None if row.product_ids is None else product_ids | set(row.product_ids)
+        if promotions:
+            for listener in _promotion_listeners:
+                try:
+                    listener()
+                except Exception:
+                    logger.exception("Promotions changed listener %r failed", listener)
+        if product_ids is None or product_ids:
+            _notify(product_ids)
+
+catalog_sync = CatalogSync()
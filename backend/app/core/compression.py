@@ -0,0 +1,158 @@
+"""
+Response compression. Brotli is preferred when the client accepts it and
+the brotli package is installed, gzip otherwise. Bodies under the minimum
+size and responses that already carry a Content-Encoding (such as
+precompressed cache hits, see app.core.response_cache) are sent as they
+are; streamed responses are compressed chunk by chunk.
+"""
+import gzip
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+ENCODINGS = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+# Levels for compressing per response; cached bodies are compressed once
+# and can afford the slower, smaller settings
+FAST_LEVELS = {GZIP: 6, BROTLI: 4}
+BEST_LEVELS = {GZIP: 9, BROTLI: 9}
+
+_COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The best supported encoding of an Accept-Encoding header, if any"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        accepted[name.strip()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str, levels: Dict[str, int] = FAST_LEVELS) -> bytes:
+    if encoding == BROTLI:
+        return brotli.compress(body, quality=levels[BROTLI])
+    return gzip.compress(body, compresslevel=levels[GZIP], mtime=0)
+
+def _stream_compressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """(compress a chunk and flush it, finish the stream)"""
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=FAST_LEVELS[BROTLI])
+        return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+    compressor = zlib.compressobj(FAST_LEVELS[GZIP], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+def request_header(scope, name: bytes) -> str:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+def compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = ""
+    for key, value in headers:
+        key = key.lower()
+        if key == b"content-encoding":
+            return False
+        if key == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return content_type.startswith(_COMPRESSIBLE_TYPES)
+
+def add_vary(headers: List[Tuple[bytes, bytes]]) -> None:
+    for index, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (key, value + b", Accept-Encoding")
+            return
+    headers.append((b"vary", b"Accept-Encoding"))
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies of at least
+    ``minimum_size`` bytes for clients that accept it.
+    """
+
+    def __init__(self, app, minimum_size: int = 1000) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(request_header(scope, b"accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        # Set once the first body message shows whether the body is streamed
+        stream: Optional[Tuple[Callable[[bytes], bytes], Callable[[], bytes]]] = None
+        passthrough = False
+
+        async def send_wrapper(message) -> None:
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                passthrough = not compressible(message.get("headers", []))
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None and start is not None:
+                headers = [
+                    (key, value) for key, value in start.get("headers", [])
+                    if key.lower() != b"content-length"
+                ]
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start)
+                        await send(message)
+                        return
+                    body = compress(body, encoding)
+                    headers.append((b"content-length", str(len(body)).encode()))
+                headers.append((b"content-encoding", encoding.encode()))
+                add_vary(headers)
+                await send({**start, "headers": headers})
+                start = None
+                if not more_body:
+                    await send({**message, "body": body})
+                    return
+                stream = _stream_compressor(encoding)
+
+            process, finish = stream
+            body = process(body) if body else b""
+            if not more_body:
+                body += finish()
+            await send({**message, "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,10 +1,55 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseSettings, AnyHttpUrl, validator
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "SeedStore API"
     API_V1_STR: str = "/api/v1"
-    
+    # Adds per-request SQL statement counts and timings as response headers
+    DEBUG: bool = False
+    LOG_LEVEL: str = "INFO"
+
+    # Statements at or above SLOW_QUERY_MS are logged and aggregated by
+    # fingerprint; the top SLOW_QUERY_TOP_N are reported every
+    # SLOW_QUERY_REPORT_SECONDS
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_TOP_N: int = 10
+    SLOW_QUERY_REPORT_SECONDS: float = 300.0
+
+    # Request profiling (app.core.profiling); the middleware is only
+    # installed when enabled
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_LATENCY_MS: Optional[float] = None
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_BUFFER_SIZE: int = 50
+
+    # Responses of at least COMPRESSION_MINIMUM_SIZE bytes are gzip or
+    # Brotli compressed for clients that accept it
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    # Public catalog GET responses are cached with their compressed
+    # encodings (app.core.response_cache)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_SIZE: int = 256
+    RESPONSE_CACHE_SECONDS: float = 60.0
+
+    # How often each process applies catalog and promotion changes other
+    # processes committed (app.core.catalog_events.catalog_sync)
+    CATALOG_SYNC_SECONDS: float = 2.0
+
+    # Semantic product search (app.crud.crud_product_semantic), off by
+    # default. Needs requirements-semantic.txt and the product_embeddings
+    # migration. Products are embedded in the background with
+    # EMBEDDING_MODEL, a fastembed model read from EMBEDDING_CACHE_DIR
+    # without network access; download it there once with
+    # python -m scripts.download_embedding_model. EMBEDDING_MODEL=hashing
+    # uses feature hashing instead (spelling and stems, not meaning), for
+    # development without a model.
+    SEMANTIC_SEARCH_ENABLED: bool = False
+    EMBEDDING_MODEL: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    EMBEDDING_CACHE_DIR: str = "models"
+    EMBEDDING_BATCH_SIZE: int = 256
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -0,0 +1,91 @@
+"""
+Text embeddings computed locally on the CPU, for semantic product search.
+
+Texts go through the EMBEDDING_MODEL sentence embedding model via
+fastembed (ONNX Runtime). The model is only ever read from
+EMBEDDING_CACHE_DIR, where scripts.download_embedding_model puts it, so
+nothing is downloaded at run time.
+
+EMBEDDING_MODEL=hashing embeds by feature hashing instead: the Snowball
+stems and character trigrams of the words are hashed into a fixed number
+of signed dimensions. Hashed vectors capture shared stems and spelling,
+not meaning, but need no model at all.
+
+Vectors are float32 and L2-normalized, so the dot product is the cosine.
+"""
+import zlib
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.core.text_search import stem, words
+
+try:
+    from fastembed import TextEmbedding
+except ImportError:  # feature hashing only
+    TextEmbedding = None
+
+# EMBEDDING_MODEL value selecting HashingEmbedder
+HASHING = "hashing"
+HASHING_DIMENSIONS = 256
+
+class EmbeddingModelUnavailable(RuntimeError):
+    pass
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class HashingEmbedder:
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS) -> None:
+        self.dimensions = dimensions
+        # Stored vectors are only reused by an embedder of the same name
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in words(text):
+            features.append("w:" + stem(word))
+            padded = f" {word} "
+            features.extend("t:" + padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 rather than hash(), which differs between processes
+                digest = zlib.crc32(feature.encode())
+                sign = 1.0 if digest & 1 else -1.0
+                # Whole words weigh as much as their trigrams together
+                weight = 2.0 if feature.startswith("w:") else 1.0
+                vectors[row, (digest >> 1) % self.dimensions] += sign * weight
+        return normalize(vectors)
+
+class ModelEmbedder:
+    def __init__(self, model: str, cache_dir: Optional[str] = None, batch_size: int = 64) -> None:
+        self.name = model
+        self.batch_size = batch_size
+        self._model = TextEmbedding(model_name=model, cache_dir=cache_dir, local_files_only=True)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.array(list(self._model.embed(list(texts), batch_size=self.batch_size)), dtype=np.float32)
+        return normalize(vectors)
+
+def create_embedder(model: str, cache_dir: Optional[str] = None):
+    """
+    The embedder for ``model``. Raises EmbeddingModelUnavailable when
+    fastembed isn't installed or the model isn't in ``cache_dir``.
+    """
+    if model == HASHING:
+        return HashingEmbedder()
+    if TextEmbedding is None:
+        raise EmbeddingModelUnavailable(
+            f"fastembed is not installed (requirements-semantic.txt), needed for {model}"
+        )
+    try:
+        return ModelEmbedder(model, cache_dir)
+    except ValueError as exc:
+        raise EmbeddingModelUnavailable(
+            f"{model} is not in {cache_dir}, run python -m scripts.download_embedding_model"
+        ) from exc
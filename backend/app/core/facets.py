@@ -0,0 +1,422 @@
+"""
+In-memory bitmap index over the catalog for filtered listings and facet
+counts. Every facet value maps to a Python int used as a bitset with bit
+``product id`` set for the matching products, so applying filters is a
+handful of ANDs and ORs and a count is ``int.bit_count()``; nothing is
+grouped in SQL per request. Price and rating are bucketed, and the values
+inside each bucket are kept sorted so arbitrary ranges stay exact.
+
+The index is filled and kept current by app.crud.crud_product_facets.
+"""
+import threading
+import time
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+PRICE_EDGES = (0, 20, 50, 100, 200, 500, 1000)
+RATING_THRESHOLDS = (1, 2, 3, 4)
+_RATING_EDGES = (0, *RATING_THRESHOLDS)
+_PRICE_GRID = (*range(0, 200, 2), *range(200, 1000, 10), *range(1000, 5000, 100))
+_RATING_GRID = tuple(i / 10 for i in range(50))
+# Facet results kept per index version for repeated sidebar requests
+_CACHE_SIZE = 256
+
+class ProductFacts(NamedTuple):
+    id: int
+    category_id: Optional[int]
+    manufacturer_id: Optional[int]
+    price: Optional[float]
+    rating: Optional[float]
+    in_stock: Optional[bool]
+
+class Filters(NamedTuple):
+    category_ids: Sequence[int] = ()
+    manufacturer_ids: Sequence[int] = ()
+    countries: Sequence[str] = ()
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_rating: Optional[float] = None
+    in_stock: Optional[bool] = None
+
+    def normalized(self) -> "Filters":
+        """Hashable, order-independent form usable as a cache key"""
+        return self._replace(
+            category_ids=tuple(sorted(set(self.category_ids))),
+            manufacturer_ids=tuple(sorted(set(self.manufacturer_ids))),
+            countries=tuple(sorted(set(self.countries))),
+        )
+
+    def any(self) -> bool:
+        return bool(self.category_ids or self.manufacturer_ids or self.countries) or any(
+            value is not None for value in (self.min_price, self.max_price, self.min_rating, self.in_stock)
+        )
+
+def bitmap(ids: Iterable[int]) -> int:
+    """Bitset with the given bit positions set"""
+    buffer = bytearray()
+    for i in ids:
+        byte = i >> 3
+        if byte >= len(buffer):
+            buffer.extend(bytes(byte - len(buffer) + 1))
+        buffer[byte] |= 1 << (i & 7)
+    return int.from_bytes(buffer, "little")
+
+def positions(bits: int, skip: int = 0, limit: Optional[int] = None) -> List[int]:
+    """Set bit positions in ascending order, paged like OFFSET/LIMIT"""
+    digits = bin(bits)[:1:-1]  # least significant bit first
+    result: List[int] = []
+    position = digits.find("1")
+    while position != -1 and (limit is None or len(result) < limit):
+        if skip:
+            skip -= 1
+        else:
+            result.append(position)
+        position = digits.find("1", position + 1)
+    return result
+
+class ValueFacet:
+    def __init__(self) -> None:
+        self.bitmaps: Dict[Any, int] = {}
+
+    def fill(self, members: Dict[Any, List[int]]) -> None:
+        self.bitmaps = {value: bitmap(ids) for value, ids in members.items()}
+
+    def add(self, value: Any, product_id: int) -> None:
+        if value is not None:
+            self.bitmaps[value] = self.bitmaps.get(value, 0) | (1 << product_id)
+
+    def remove(self, value: Any, product_id: int) -> None:
+        if value in self.bitmaps:
+            self.bitmaps[value] &= ~(1 << product_id)
+
+    def select(self, values: Iterable[Any]) -> int:
+        result = 0
+        for value in values:
+            result |= self.bitmaps.get(value, 0)
+        return result
+
+    def counts(self, base: int) -> Dict[Any, int]:
+        counts = {value: (bits & base).bit_count() for value, bits in self.bitmaps.items()}
+        return {value: count for value, count in counts.items() if count}
+
+class RangeFacet:
+    """
+    Bucketed numeric facet. Counts are reported per ``edges`` bucket
+    (edges[i] <= value < edges[i + 1]); selections also use the finer
+    ``grid`` buckets, so only the few values in the grid buckets a range
+    boundary cuts through are checked one by one.
+    """
+
+    def __init__(self, edges: Sequence[float], grid: Sequence[float]) -> None:
+        self.edges = tuple(edges)
+        self.grid = tuple(sorted({*edges, *grid}))
+        # Grid buckets belonging to each edges bucket
+        self._spans = [
+            range(bisect_left(self.grid, start), bisect_left(self.grid, end) if end is not None else len(self.grid))
+            for start, end in zip(self.edges, (*self.edges[1:], None))
+        ]
+        self.bitmaps = [0] * len(self.edges)
+        self.fine = [0] * len(self.grid)
+        # (value, product id) per grid bucket, sorted
+        self.entries: List[List[Tuple[float, int]]] = [[] for _ in self.grid]
+
+    def _bucket(self, value: float) -> Tuple[int, int]:
+        return (
+            max(bisect_right(self.edges, value) - 1, 0),
+            max(bisect_right(self.grid, value) - 1, 0),
+        )
+
+    def fill(self, values: Iterable[Tuple[float, int]]) -> None:
+        entries: List[List[Tuple[float, int]]] = [[] for _ in self.grid]
+        for value, product_id in values:
+            entries[self._bucket(value)[1]].append((value, product_id))
+        for bucket in entries:
+            bucket.sort()
+        self.entries = entries
+        self.fine = [bitmap(product_id for _, product_id in bucket) for bucket in entries]
+        self.bitmaps = []
+        for span in self._spans:
+            bits = 0
+            for i in span:
+                bits |= self.fine[i]
+            self.bitmaps.append(bits)
+
+    def add(self, value: Optional[float], product_id: int) -> None:
+        if value is not None:
+            coarse, fine = self._bucket(value)
+            insort(self.entries[fine], (value, product_id))
+            self.fine[fine] |= 1 << product_id
+            self.bitmaps[coarse] |= 1 << product_id
+
+    def remove(self, value: Optional[float], product_id: int) -> None:
+        if value is not None:
+            coarse, fine = self._bucket(value)
+            entries = self.entries[fine]
+            at = bisect_left(entries, (value, product_id))
+            if at < len(entries) and entries[at] == (value, product_id):
+                del entries[at]
+            self.fine[fine] &= ~(1 << product_id)
+            self.bitmaps[coarse] &= ~(1 << product_id)
+
+    @staticmethod
+    def _covers(low: Optional[float], high: Optional[float], start: float, end: Optional[float]) -> Optional[bool]:
+        """True if [start, end) is inside [low, high], False if disjoint, None if cut"""
+        if (high is not None and start > high) or (low is not None and end is not None and end <= low):
+            return False
+        if (low is None or low <= start) and (high is None or (end is not None and end <= high)):
+            return True
+        return None
+
+    def select(self, low: Optional[float], high: Optional[float]) -> int:
+        """Products with low <= value <= high; either bound may be open"""
+        result = 0
+        for i, start in enumerate(self.edges):
+            end = self.edges[i + 1] if i + 1 < len(self.edges) else None
+            covered = self._covers(low, high, start, end)
+            if covered is not None:
+                if covered:
+                    result |= self.bitmaps[i]
+                continue
+            for j in self._spans[i]:
+                fine_end = self.grid[j + 1] if j + 1 < len(self.grid) else None
+                covered = self._covers(low, high, self.grid[j], fine_end)
+                if covered:
+                    result |= self.fine[j]
+                elif covered is None:
+                    entries = self.entries[j]
+                    first = 0 if low is None else bisect_left(entries, (low, -1))
+                    last = len(entries) if high is None else bisect_right(entries, (high, float("inf")))
+                    result |= bitmap(product_id for _, product_id in entries[first:last])
+        return result
+
+    def counts(self, base: int) -> List[int]:
+        return [(bits & base).bit_count() for bits in self.bitmaps]
+
+class _State:
+    def __init__(self) -> None:
+        self.all = 0
+        self.rows: Dict[int, ProductFacts] = {}
+        self.category = ValueFacet()
+        self.manufacturer = ValueFacet()
+        self.in_stock = ValueFacet()
+        self.price = RangeFacet(PRICE_EDGES, _PRICE_GRID)
+        self.rating = RangeFacet(_RATING_EDGES, _RATING_GRID)
+        # Bumped by every in-place update; cached facets are only kept when unchanged
+        self.version = 0
+        self.cache: "OrderedDict[Filters, Tuple[int, Dict[str, List[dict]]]]" = OrderedDict()
+        self.category_names: Dict[int, str] = {}
+        # manufacturer id -> (name, country)
+        self.manufacturers: Dict[int, Tuple[str, Optional[str]]] = {}
+        self.loaded_at = time.monotonic()
+
+class FacetIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: Optional[_State] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not None
+
+    def age(self) -> float:
+        """Seconds since the index was last built; infinite until loaded"""
+        state = self._state
+        return float("inf") if state is None else time.monotonic() - state.loaded_at
+
+    def load(
+        self,
+        rows: Iterable[ProductFacts],
+        category_names: Dict[int, str],
+        manufacturers: Dict[int, Tuple[str, Optional[str]]],
+    ) -> None:
+        """Build a fresh index and swap it in"""
+        state = _State()
+        state.rows = {row.id: row for row in rows}
+        categories: Dict[Any, List[int]] = {}
+        makers: Dict[Any, List[int]] = {}
+        stock: Dict[Any, List[int]] = {}
+        for row in state.rows.values():
+            if row.category_id is not None:
+                categories.setdefault(row.category_id, []).append(row.id)
+            if row.manufacturer_id is not None:
+                makers.setdefault(row.manufacturer_id, []).append(row.id)
+            stock.setdefault(bool(row.in_stock), []).append(row.id)
+        state.all = bitmap(state.rows)
+        state.category.fill(categories)
+        state.manufacturer.fill(makers)
+        state.in_stock.fill(stock)
+        state.price.fill((row.price, row.id) for row in state.rows.values() if row.price is not None)
+        state.rating.fill((row.rating, row.id) for row in state.rows.values() if row.rating is not None)
+        state.category_names = dict(category_names)
+        state.manufacturers = dict(manufacturers)
+        with self._lock:
+            self._state = state
+
+    def missing_labels(self, rows: Iterable[ProductFacts]) -> bool:
+        """Whether ``rows`` reference categories or manufacturers without a name yet"""
+        state = self._state
+        if state is None:
+            return False
+        return any(
+            (row.category_id is not None and row.category_id not in state.category_names)
+            or (row.manufacturer_id is not None and row.manufacturer_id not in state.manufacturers)
+            for row in rows
+        )
+
+    def update(
+        self,
+        rows: Iterable[ProductFacts],
+        removed: Iterable[int] = (),
+        category_names: Optional[Dict[int, str]] = None,
+        manufacturers: Optional[Dict[int, Tuple[str, Optional[str]]]] = None,
+    ) -> None:
+        """Re-index changed products in place; a no-op until loaded"""
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            state.version += 1
+            state.cache.clear()
+            if category_names is not None:
+                state.category_names = dict(category_names)
+            if manufacturers is not None:
+                state.manufacturers = dict(manufacturers)
+            for product_id in removed:
+                self._remove(state, product_id)
+            for row in rows:
+                self._remove(state, row.id)
+                state.rows[row.id] = row
+                state.all |= 1 << row.id
+                state.category.add(row.category_id, row.id)
+                state.manufacturer.add(row.manufacturer_id, row.id)
+                state.in_stock.add(bool(row.in_stock), row.id)
+                state.price.add(row.price, row.id)
+                state.rating.add(row.rating, row.id)
+
+    @staticmethod
+    def _remove(state: _State, product_id: int) -> None:
+        row = state.rows.pop(product_id, None)
+        if row is None:
+            return
+        state.all &= ~(1 << product_id)
+        state.category.remove(row.category_id, product_id)
+        state.manufacturer.remove(row.manufacturer_id, product_id)
+        state.in_stock.remove(bool(row.in_stock), product_id)
+        state.price.remove(row.price, product_id)
+        state.rating.remove(row.rating, product_id)
+
+    def _selections(self, state: _State, filters: Filters) -> Dict[str, int]:
+        """Bitmap of each filtered dimension on its own"""
+        selections = {}
+        if filters.category_ids:
+            selections["category"] = state.category.select(filters.category_ids)
+        if filters.manufacturer_ids:
+            selections["manufacturer"] = state.manufacturer.select(filters.manufacturer_ids)
+        if filters.countries:
+            wanted = set(filters.countries)
+            selections["country"] = state.manufacturer.select(
+                id for id, (_, country) in state.manufacturers.items() if country in wanted
+            )
+        if filters.min_price is not None or filters.max_price is not None:
+            selections["price"] = state.price.select(filters.min_price, filters.max_price)
+        if filters.min_rating is not None:
+            selections["rating"] = state.rating.select(filters.min_rating, None)
+        if filters.in_stock is not None:
+            selections["in_stock"] = state.in_stock.select([filters.in_stock])
+        return selections
+
+    @staticmethod
+    def _base(state: _State, selections: Dict[str, int], without: Optional[str] = None) -> int:
+        bits = state.all
+        for name, selected in selections.items():
+            if name != without:
+                bits &= selected
+        return bits
+
+    def search(self, filters: Filters, skip: int = 0, limit: int = 100) -> Tuple[int, List[int]]:
+        """Total number of matches and a page of their ids, ascending"""
+        state = self._state
+        if state is None:
+            raise RuntimeError("Facet index is not loaded")
+        matches = self._base(state, self._selections(state, filters))
+        return matches.bit_count(), positions(matches, skip, limit)
+
+    def facets(self, filters: Filters) -> Tuple[int, Dict[str, List[dict]]]:
+        """
+        Total matches and per-dimension counts. Each dimension is counted
+        with every filter applied except its own, so the other values of
+        a dimension show how many products selecting them would add.
+        """
+        state = self._state
+        if state is None:
+            raise RuntimeError("Facet index is not loaded")
+        key = filters.normalized()
+        cached = state.cache.get(key)
+        if cached is not None:
+            return cached
+        version = state.version
+        result = self._facets(state, key)
+        with self._lock:
+            if self._state is state and state.version == version:
+                state.cache[key] = result
+                while len(state.cache) > _CACHE_SIZE:
+                    state.cache.popitem(last=False)
+        return result
+
+    def _facets(self, state: _State, filters: Filters) -> Tuple[int, Dict[str, List[dict]]]:
+        selections = self._selections(state, filters)
+        total = self._base(state, selections).bit_count()
+
+        categories = state.category.counts(self._base(state, selections, "category"))
+        maker_base = self._base(state, selections, "manufacturer")
+        makers = state.manufacturer.counts(maker_base)
+        country_base = self._base(state, selections, "country")
+        by_country: Dict[str, int] = {}
+        country_makers = makers if country_base == maker_base else state.manufacturer.counts(country_base)
+        for id, count in country_makers.items():
+            country = state.manufacturers.get(id, (None, None))[1]
+            if country:
+                by_country[country] = by_country.get(country, 0) + count
+
+        prices = state.price.counts(self._base(state, selections, "price"))
+        ratings = state.rating.counts(self._base(state, selections, "rating"))
+        stock = state.in_stock.counts(self._base(state, selections, "in_stock"))
+
+        edges = state.price.edges
+        facets = {
+            "category": [
+                {"value": id, "label": state.category_names.get(id), "count": count}
+                for id, count in sorted(categories.items(), key=lambda item: -item[1])
+            ],
+            "manufacturer": [
+                {"value": id, "label": state.manufacturers.get(id, (None, None))[0], "count": count}
+                for id, count in sorted(makers.items(), key=lambda item: -item[1])
+            ],
+            "country": [
+                {"value": country, "label": country, "count": count}
+                for country, count in sorted(by_country.items(), key=lambda item: -item[1])
+            ],
+            "price": [
+                {
+                    "value": f"{start}-{end}" if end is not None else f"{start}-",
+                    "min": start,
+                    "max": end,
+                    "count": count,
+                }
+                for start, end, count in zip(edges, (*edges[1:], None), prices)
+                if count
+            ],
+            # Cumulative: "4 and up" includes everything rated 4 or more
+            "rating": [
+                {"value": threshold, "label": f"{threshold}+", "min": threshold, "count": sum(ratings[i + 1:])}
+                for i, threshold in enumerate(RATING_THRESHOLDS)
+            ],
+            "in_stock": [
+                {"value": value, "count": count}
+                for value, count in sorted(stock.items(), key=lambda item: not item[0])
+            ],
+        }
+        return total, facets
+
+facet_index = FacetIndex()
@@ -0,0 +1,218 @@
+"""
+Per-request SQL statement counts and latency. Engine events attribute every
+statement to the request being served; the middleware adds the totals as
+response headers in debug mode and always feeds the Prometheus-style
+metrics served at /metrics.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.query_log import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+# Statement budgets for endpoints with a known shape, keyed by
+# "METHOD route template". Exceeding one logs a warning and counts in
+# http_request_query_budget_exceeded_total; scripts/check_query_budgets.py
+# fails when a request goes over.
+QUERY_BUDGETS: Dict[str, int] = {
+    "GET /api/v1/products/": 3,  # one SELECT, ?include= objects are joined
+    "GET /api/v1/products/facets": 3,  # loads the facet index once, then none
+    "GET /api/v1/products/autocomplete": 3,  # loaded at startup, then none
+    "GET /api/v1/products/{id}": 2,
+    "GET /api/v1/reviews/product/{product_id}": 2,
+    "GET /api/v1/categories/": 1,
+    "GET /api/v1/manufacturers/": 1,
+    "GET /api/v1/cart/": 3,
+    "GET /api/v1/orders/": 3,
+    "GET /api/v1/order-comments/order/{order_id}": 4,
+}
+DEFAULT_QUERY_BUDGET = 25
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class QueryStats:
+    __slots__ = ("statements", "sql_seconds", "budgeted")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.budgeted = True
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+# Counters that see every statement regardless of context (count_queries)
+_collectors: List[QueryStats] = []
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    _record(conn, statement)
+
+@event.listens_for(Engine, "handle_error")
+def _stop_timer_on_error(exception_context) -> None:
+    if exception_context.connection is not None:
+        _record(exception_context.connection, exception_context.statement)
+
+def _record(conn, statement: Optional[str]) -> None:
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if statement:
+        slow_query_log.observe(statement, elapsed)
+    stats = _request_stats.get()
+    for target in (stats, *_collectors):
+        if target is not None:
+            target.statements += 1
+            target.sql_seconds += elapsed
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Count every statement executed on any engine inside the block"""
+    stats = QueryStats()
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = "block") -> Iterator[QueryStats]:
+    """
+    Fail with AssertionError when the block issues more than ``limit``
+    statements. Works across threads, so it can wrap TestClient calls.
+    """
+    with count_queries() as stats:
+        yield stats
+    assert stats.statements <= limit, (
+        f"{label} issued {stats.statements} SQL statements, budget is {limit}"
+    )
+
+def skip_query_budget() -> None:
+    """
+    Exempt the current request from its route's budget; for streamed
+    responses, whose statement count grows with the number of rows.
+    """
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.budgeted = False
+
+def query_budget(method: str, route: str) -> int:
+    return QUERY_BUDGETS.get(f"{method} {route}", DEFAULT_QUERY_BUDGET)
+
+class Metrics:
+    """Request counters and histograms in the Prometheus text format"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # (method, route, status) -> [requests, seconds, statements, sql seconds, over budget]
+        self._totals: Dict[Tuple[str, str, str], List[float]] = {}
+        self._buckets: Dict[Tuple[str, str], List[int]] = {}
+
+    def observe(
+        self, method: str, route: str, status: int, seconds: float,
+        stats: QueryStats, over_budget: bool
+    ) -> None:
+        with self._lock:
+            totals = self._totals.setdefault((method, route, str(status)), [0, 0.0, 0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += stats.statements
+            totals[3] += stats.sql_seconds
+            totals[4] += over_budget
+            buckets = self._buckets.setdefault((method, route), [0] * len(LATENCY_BUCKETS))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            totals = dict(self._totals)
+            buckets = {key: list(counts) for key, counts in self._buckets.items()}
+        lines = []
+        counters = [
+            ("http_requests_total", "counter", "Requests served", 0),
+            ("http_request_db_statements_total", "counter", "SQL statements issued by requests", 2),
+            ("http_request_db_seconds_total", "counter", "Time spent executing SQL", 3),
+            ("http_request_query_budget_exceeded_total", "counter", "Requests over their statement budget", 4),
+        ]
+        for name, kind, help_text, index in counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for (method, route, status), values in sorted(totals.items()):
+                labels = f'method="{method}",route="{route}",status="{status}"'
+                lines.append(f"{name}{{{labels}}} {values[index]}")
+
+        name = "http_request_duration_seconds"
+        lines += [f"# HELP {name} Request latency", f"# TYPE {name} histogram"]
+        for (method, route), counts in sorted(buckets.items()):
+            labels = f'method="{method}",route="{route}"'
+            matching = [v for (m, r, _), v in totals.items() if (m, r) == (method, route)]
+            for bound, count in zip(LATENCY_BUCKETS, counts):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {sum(v[0] for v in matching)}')
+            lines.append(f"{name}_sum{{{labels}}} {sum(v[1] for v in matching)}")
+            lines.append(f"{name}_count{{{labels}}} {sum(v[0] for v in matching)}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware measuring each HTTP request. Streaming responses are
+    measured until the last body chunk is sent.
+    """
+
+    def __init__(self, app, debug: bool = False) -> None:
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-queries", str(stats.statements).encode()),
+                        (b"x-db-time-ms", f"{stats.sql_seconds * 1000:.2f}".encode()),
+                        (b"x-response-time-ms", f"{elapsed_ms:.2f}".encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            self._observe(scope, status, time.perf_counter() - started, stats)
+
+    def _observe(self, scope, status: int, seconds: float, stats: QueryStats) -> None:
+        route = scope.get("route")
+        # Unmatched paths share one label so scanners can't blow up cardinality
+        template = getattr(route, "path", None) or "unmatched"
+        method = scope["method"]
+        budget = query_budget(method, template)
+        over_budget = stats.budgeted and stats.statements > budget
+        if over_budget:
+            logger.warning(
+                "%s %s issued %d SQL statements (budget %d)",
+                method, template, stats.statements, budget,
+            )
+        metrics.observe(method, template, status, seconds, stats, over_budget)
@@ -0,0 +1,206 @@
+"""
+Precomputed effective prices. The table maps the ids of products that
+currently have a running promotion to their discounted price; every other
+product sells at its list price, so a lookup is a single dict access and
+no promotion rules are evaluated while serving reads.
+
+Rules are loaded by app.crud.crud_promotion, which also keeps the table
+current as promotions and products change, here and (through
+app.core.catalog_events) in other processes. Promotion windows opening or
+closing make the whole table stale; the first lookup after the next
+boundary rebuilds it through the registered loader. Nothing is trusted
+for longer than _MAX_AGE_SECONDS in case a change notification was lost.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PERCENTAGE = "percentage"
+FIXED = "fixed"
+SCOPES = ("product", "category", "manufacturer")
+
+# Seconds to wait before retrying a failed rebuild
+_RETRY_SECONDS = 30.0
+# Seconds after which loaded prices are rebuilt even without a boundary
+_MAX_AGE_SECONDS = 600.0
+
+class Rule(NamedTuple):
+    promotion_id: int
+    discount_type: str
+    value: float
+    starts_at: Optional[datetime]
+    ends_at: Optional[datetime]
+
+    def running(self, at: datetime) -> bool:
+        return (self.starts_at is None or self.starts_at <= at) and (self.ends_at is None or at < self.ends_at)
+
+class PricedProduct(NamedTuple):
+    id: int
+    price: float
+    category_id: Optional[int]
+    manufacturer_id: Optional[int]
+
+def discounted(price: float, discount_type: str, value: float) -> float:
+    if discount_type == PERCENTAGE:
+        price = price * (100 - value) / 100
+    else:
+        price = price - value
+    return round(max(price, 0.0), 2)
+
+class PriceTable:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._prices: Dict[int, float] = {}
+        # (scope, target id) -> rules, including ones that start later
+        self._rules: Dict[Tuple[str, int], List[Rule]] = {}
+        # time.time() after which the prices are stale; 0 until first loaded
+        self._expires = 0.0
+        self._loader: Optional[Callable[[], None]] = None
+        # Bumped whenever any price may have changed
+        self._version = 0
+        # Held while reload_in_background() rebuilds the table
+        self._background = threading.Lock()
+
+    def set_loader(self, loader: Callable[[], None]) -> None:
+        """``loader`` rebuilds the table, normally by calling load()"""
+        self._loader = loader
+
+    def price(self, product_id: int, list_price: Optional[float]) -> Optional[float]:
+        """Effective price of a product listed at ``list_price``"""
+        if time.time() >= self._expires:
+            self._reload()
+        return self._prices.get(product_id, list_price)
+
+    def current_version(self) -> int:
+        """Version of the prices, rebuilding them first when a window opened or closed"""
+        if time.time() >= self._expires:
+            self._reload()
+        return self._version
+
+    def loaded_version(self) -> Optional[int]:
+        """
+        Version of the prices without rebuilding them, or None while they
+        are stale. For callers that mustn't query the database, such as
+        ASGI middleware running on the event loop.
+        """
+        if time.time() >= self._expires:
+            return None
+        return self._version
+
+    def reload_in_background(self) -> None:
+        """Rebuild stale prices on a worker thread, unless one already is"""
+        if not self._background.acquire(blocking=False):
+            return
+
+        def run() -> None:
+            try:
+                self._reload()
+            finally:
+                self._background.release()
+
+        threading.Thread(target=run, name="price-table-reload", daemon=True).start()
+
+    def _reload(self) -> None:
+        with self._lock:
+            if time.time() < self._expires or self._loader is None:
+                return
+            try:
+                self._loader()
+            except Exception:
+                logger.exception("Rebuilding the price table failed")
+                self._expires = time.time() + _RETRY_SECONDS
+
+    def targets(self) -> Dict[str, Set[int]]:
+        """Target ids per scope that have at least one rule"""
+        result: Dict[str, Set[int]] = {scope: set() for scope in SCOPES}
+        for scope, target_id in self._rules:
+            result[scope].add(target_id)
+        return result
+
+    def load(
+        self,
+        rules: Iterable[Tuple[str, int, Rule]],
+        products: Iterable[PricedProduct],
+        at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Replace the rules and all prices. ``products`` must cover every
+        product the rules target.
+        """
+        at = at or datetime.utcnow()
+        index: Dict[Tuple[str, int], List[Rule]] = {}
+        for scope, target_id, rule in rules:
+            index.setdefault((scope, target_id), []).append(rule)
+        with self._lock:
+            self._rules = index
+            prices = {}
+            for product in products:
+                price = self._best(product, at)
+                if price is not None:
+                    prices[product.id] = price
+            self._prices = prices
+            self._expires = self._next_boundary(at)
+            self._version += 1
+
+    def set_rules(self, rules: Iterable[Tuple[str, int, Rule]]) -> None:
+        """Replace the rules without touching prices; follow with update()"""
+        index: Dict[Tuple[str, int], List[Rule]] = {}
+        for scope, target_id, rule in rules:
+            index.setdefault((scope, target_id), []).append(rule)
+        with self._lock:
+            self._rules = index
+            self._expires = min(self._expires, self._next_boundary(datetime.utcnow()))
+            self._version += 1
+
+    def update(self, products: Iterable[PricedProduct], removed: Iterable[int] = ()) -> None:
+        """Recompute the prices of ``products`` and drop ``removed`` ids"""
+        at = datetime.utcnow()
+        with self._lock:
+            for product in products:
+                price = self._best(product, at)
+                if price is None:
+                    self._prices.pop(product.id, None)
+                else:
+                    self._prices[product.id] = price
+            for product_id in removed:
+                self._prices.pop(product_id, None)
+            self._version += 1
+
+    def _best(self, product: PricedProduct, at: datetime) -> Optional[float]:
+        """Lowest promoted price; promotions don't stack"""
+        if product.price is None:
+            return None
+        best = None
+        for key in (
+            ("product", product.id),
+            ("category", product.category_id),
+            ("manufacturer", product.manufacturer_id),
+        ):
+            for rule in self._rules.get(key, ()):
+                if rule.running(at):
+                    price = discounted(product.price, rule.discount_type, rule.value)
+                    if best is None or price < best:
+                        best = price
+        return best
+
+    def _next_boundary(self, at: datetime) -> float:
+        expires = time.time() + _MAX_AGE_SECONDS
+        boundaries = [
+            moment
+            for rules in self._rules.values()
+            for rule in rules
+            for moment in (rule.starts_at, rule.ends_at)
+            if moment is not None and moment > at
+        ]
+        if not boundaries:
+            return expires
+        return min(expires, time.time() + (min(boundaries) - at).total_seconds())
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+price_table = PriceTable()
@@ -0,0 +1,331 @@
+"""
+Opt-in sampling profiler for individual requests. A background thread
+snapshots the stacks of the threads working on profiled requests every few
+milliseconds; finished profiles are kept in a bounded ring buffer and can
+be exported as speedscope JSON or collapsed stacks (flamegraph.pl,
+speedscope and most flame graph viewers read both).
+
+Work is attributed to a request explicitly: the event loop thread counts
+while the request's task is the one running, and worker threads (sync
+endpoints and dependencies) count while they run a call the request
+handed to anyio.to_thread.run_sync, which registers the thread for the
+duration of the call.
+"""
+import asyncio
+import functools
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import anyio.to_thread
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+_ids = itertools.count(1)
+# Trim file names to the part after these roots
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_PATH_ROOTS = sorted({_BACKEND_ROOT, *(p for p in sys.path if p)}, key=len, reverse=True)
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, trigger: str, interval: float) -> None:
+        self.id = next(_ids)
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.interval = interval
+        self.started_at = datetime.utcnow()
+        self.duration_ms = 0.0
+        self.status: Optional[int] = None
+        self.samples: Counter = Counter()
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[int] = None
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": sum(self.samples.values()),
+        }
+
+def _short_path(filename: str) -> str:
+    for root in _PATH_ROOTS:
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+def _stack(frame) -> List[Frame]:
+    """Frames of a thread from the outermost call to the innermost"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+class Sampler:
+    """Single background thread sampling while any profile is active"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._active: Dict[int, RequestProfile] = {}
+        # Worker thread ident -> (profile, frames above the call it runs)
+        self._workers: Dict[int, Tuple[RequestProfile, int]] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.interval = 0.005
+
+    def start(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+    def enter_worker(self, profile: RequestProfile, depth: int) -> Optional[Tuple[RequestProfile, int]]:
+        """Charge the calling thread to ``profile``; returns what it was charged to"""
+        ident = threading.get_ident()
+        with self._lock:
+            previous = self._workers.get(ident)
+            self._workers[ident] = (profile, depth)
+        return previous
+
+    def exit_worker(self, previous: Optional[Tuple[RequestProfile, int]]) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            if previous is None:
+                self._workers.pop(ident, None)
+            else:
+                self._workers[ident] = previous
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                workers = dict(self._workers)
+                if not active:
+                    self._wake.clear()
+            if not active:
+                self._wake.wait()
+                continue
+            self._sample(active, workers, own)
+            time.sleep(self.interval)
+
+    def _sample(
+        self, active: List[RequestProfile], workers: Dict[int, Tuple[RequestProfile, int]], own: int
+    ) -> None:
+        running_tasks = {}
+        for profile in active:
+            if profile.loop is not None and profile.loop not in running_tasks:
+                running_tasks[profile.loop] = asyncio.current_task(profile.loop)
+        by_task = {id(p.task): p for p in active if p.task is not None}
+        active_ids = {p.id for p in active}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            profile, skip = workers.get(thread_id, (None, 0))
+            if profile is None:
+                # The event loop thread: charge the task currently running
+                for task in running_tasks.values():
+                    candidate = by_task.get(id(task)) if task is not None else None
+                    if candidate is not None and candidate.loop_thread == thread_id:
+                        profile, skip = candidate, 0
+                        break
+            if profile is not None and profile.id in active_ids:
+                profile.samples[tuple(_stack(frame)[skip:])] += 1
+
+sampler = Sampler()
+
+def _charged_to(profile: RequestProfile, func: Callable) -> Callable:
+    """``func`` registering the worker thread running it with ``profile``"""
+
+    @functools.wraps(func)
+    def call(*args):
+        # Samples start below this frame, at ``func``
+        depth, frame = 0, sys._getframe()
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        previous = sampler.enter_worker(profile, depth)
+        try:
+            return func(*args)
+        finally:
+            sampler.exit_worker(previous)
+
+    return call
+
+_run_sync = anyio.to_thread.run_sync
+
+async def _run_sync_profiled(func, *args, **kwargs):
+    profile = _current_profile.get()
+    if profile is not None:
+        func = _charged_to(profile, func)
+    return await _run_sync(func, *args, **kwargs)
+
+def track_worker_threads() -> None:
+    """
+    Route calls into AnyIO's thread pool through _charged_to. Starlette's
+    run_in_threadpool and FastAPI's dependency solver both look up
+    anyio.to_thread.run_sync when they call it, so this covers sync
+    endpoints, dependencies and their teardown.
+    """
+    anyio.to_thread.run_sync = _run_sync_profiled
+
+class ProfileStore:
+    """Ring buffer with the most recent finished profiles"""
+
+    def __init__(self, size: int = 50) -> None:
+        self._lock = threading.Lock()
+        self._profiles: Deque[RequestProfile] = deque(maxlen=size)
+
+    def resize(self, size: int) -> None:
+        with self._lock:
+            self._profiles = deque(self._profiles, maxlen=size)
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def all(self) -> List[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        return next((p for p in self.all() if p.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+store = ProfileStore()
+
+def to_collapsed(profiles: List[RequestProfile]) -> str:
+    """One "outer;inner;leaf count" line per distinct stack"""
+    lines = []
+    for profile in profiles:
+        root = f"{profile.method} {profile.path}"
+        for stack, count in profile.samples.most_common():
+            names = [root] + [f"{name} ({path}:{line})" for name, path, line in stack]
+            lines.append(f"{';'.join(n.replace(';', ':') for n in names)} {count}")
+    return "\n".join(lines) + "\n"
+
+def to_speedscope(profiles: List[RequestProfile]) -> dict:
+    frames: List[dict] = []
+    index: Dict[Frame, int] = {}
+
+    def frame_index(frame: Frame) -> int:
+        if frame not in index:
+            index[frame] = len(frames)
+            name, path, line = frame
+            frames.append({"name": name, "file": path, "line": line})
+        return index[frame]
+
+    exported = []
+    for profile in profiles:
+        samples, weights = [], []
+        for stack, count in profile.samples.items():
+            samples.append([frame_index(frame) for frame in stack])
+            weights.append(count * profile.interval * 1000)
+        exported.append({
+            "type": "sampled",
+            "name": f"#{profile.id} {profile.method} {profile.path} ({profile.duration_ms:.1f} ms)",
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        })
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "seedstore-profiler",
+        "name": "SeedStore request profiles",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": exported,
+    }
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when it carries ``header``, is picked by
+    ``sample_rate``, or, with ``latency_ms`` set, when it turns out to be at
+    least that slow (every request is sampled then and fast ones are
+    dropped). Only added to the app when profiling is enabled, so it costs
+    nothing otherwise.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = 0.0,
+        latency_ms: Optional[float] = None,
+        header: str = "x-profile",
+        interval_ms: float = 5.0,
+        buffer_size: int = 50,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.latency_ms = latency_ms
+        self.header = header.lower().encode()
+        self.interval = interval_ms / 1000
+        sampler.interval = self.interval
+        store.resize(buffer_size)
+        track_worker_threads()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if any(name == self.header for name, _ in scope.get("headers", [])):
+            trigger = "header"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = "sampled"
+        elif self.latency_ms is not None:
+            trigger = "latency"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], trigger, self.interval)
+        profile.loop = asyncio.get_running_loop()
+        profile.task = asyncio.current_task()
+        profile.loop_thread = threading.get_ident()
+        token = _current_profile.set(profile)
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop(profile)
+            _current_profile.reset(token)
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            profile.task = None
+            if trigger != "latency" or profile.duration_ms >= self.latency_ms:
+                store.add(profile)
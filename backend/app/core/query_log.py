@@ -0,0 +1,104 @@
+"""
+Slow SQL statement log. Statements slower than a threshold are logged
+individually and aggregated by fingerprint (the statement with literals and
+parameter markers replaced by ``?``); a background thread periodically logs
+the top fingerprints by total time and starts a new window.
+"""
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("app.sql.slow")
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),                      # string literals
+    (re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?"), "?"),   # bound parameters
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.I), "?"),  # numbers
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),        # IN lists of any length
+    (re.compile(r"(?:\(\?\)\s*,\s*)+\(\?\)"), "(?)"),          # multi-row VALUES
+    (re.compile(r"\s+"), " "),
+]
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Normalize ``statement`` so that executions differing only in values match"""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 200.0, top_n: int = 10) -> None:
+        self.threshold_ms = threshold_ms
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        # fingerprint -> [count, total ms, max ms]
+        self._stats: Dict[str, List[float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def observe(self, statement: str, seconds: float) -> None:
+        duration_ms = seconds * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        key = fingerprint(statement)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += duration_ms
+            stats[2] = max(stats[2], duration_ms)
+        logger.warning(
+            "slow query %.1f ms: %s", duration_ms, key,
+            extra={"data": {"duration_ms": round(duration_ms, 2), "fingerprint": key}},
+        )
+
+    def top(self) -> List[dict]:
+        with self._lock:
+            items = list(self._stats.items())
+        items.sort(key=lambda item: item[1][1], reverse=True)
+        return [
+            {
+                "fingerprint": key,
+                "count": int(count),
+                "total_ms": round(total, 2),
+                "mean_ms": round(total / count, 2),
+                "max_ms": round(peak, 2),
+            }
+            for key, (count, total, peak) in items[: self.top_n]
+        ]
+
+    def flush(self) -> None:
+        """Log the current top-N report and start a new window"""
+        report = self.top()
+        with self._lock:
+            self._stats = {}
+        if report:
+            logger.warning(
+                "slow query report: %d fingerprints, worst %.1f ms total",
+                len(report), report[0]["total_ms"], extra={"data": {"top": report}},
+            )
+
+    def start(self, interval_seconds: float) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval_seconds):
+                self.flush()
+
+        self._thread = threading.Thread(target=run, name="slow-query-report", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+slow_query_log = SlowQueryLog()
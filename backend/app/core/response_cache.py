@@ -0,0 +1,178 @@
+"""
+In-process cache of public catalog GET responses. An entry keeps the
+response body together with its gzip and Brotli encodings, each
+compressed once (at the slower, smaller levels) the first time a client
+asks for it, so repeated requests are neither rendered nor compressed
+again. Cached encodings are sent with Content-Encoding set, which the
+compression middleware passes through untouched.
+
+Entries are dropped when products, categories or manufacturers change
+(app.core.catalog_events), when effective prices change (the price
+table's version) and after a time to live. Only complete 200 responses
+are cached; streamed ones pass through.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from app.core.catalog_events import on_products_changed
+from app.core.compression import BEST_LEVELS, add_vary, compress, negotiate, request_header
+from app.core.pricing import price_table
+
+IDENTITY = "identity"
+
+class CachedResponse:
+    __slots__ = ("headers", "bodies", "route", "price_version", "expires")
+
+    def __init__(
+        self, headers: List[Tuple[bytes, bytes]], body: bytes, route, price_version: int, expires: float
+    ) -> None:
+        self.headers = headers
+        self.bodies: Dict[str, bytes] = {IDENTITY: body}
+        self.route = route
+        self.price_version = price_version
+        self.expires = expires
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # Bumped by clear(), so responses rendered before a catalog change
+        # aren't stored after it
+        self.generation = 0
+
+    def get(self, key: str, price_version: Optional[int]) -> Optional[CachedResponse]:
+        """The entry for ``key`` if it was rendered at ``price_version``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.time() or price_version is None or entry.price_version != price_version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedResponse, generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+response_cache = ResponseCache()
+
+@on_products_changed
+def _clear_catalog_responses(product_ids) -> None:
+    response_cache.clear()
+
+class ResponseCacheMiddleware:
+    """
+    Serves GET requests whose path matches one of ``paths`` from
+    response_cache. Bodies larger than ``max_body_size`` aren't kept;
+    compressed variants are only made for bodies of at least
+    ``minimum_size`` bytes, like the compression middleware does.
+    """
+
+    def __init__(
+        self,
+        app,
+        paths: Sequence[str],
+        minimum_size: int = 1000,
+        max_body_size: int = 1024 * 1024,
+    ) -> None:
+        self.app = app
+        self.paths: List[Pattern[str]] = [re.compile(path) for path in paths]
+        self.minimum_size = minimum_size
+        self.max_body_size = max_body_size
+
+    def _key(self, scope) -> Optional[str]:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        if not any(path.fullmatch(scope["path"]) for path in self.paths):
+            return None
+        return scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+
+    async def __call__(self, scope, receive, send) -> None:
+        key = self._key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        # Stale prices are rebuilt on a worker thread rather than here on
+        # the event loop; until then nothing is served or stored. Read
+        # before rendering so a concurrent change can only make the new
+        # entry look stale, never fresh.
+        price_version = price_table.loaded_version()
+        if price_version is None:
+            price_table.reload_in_background()
+        entry = response_cache.get(key, price_version)
+        if entry is not None:
+            await self._send(scope, send, entry)
+            return
+
+        generation = response_cache.generation
+        start_headers = None
+        chunks: Optional[List[bytes]] = []
+
+        async def send_wrapper(message) -> None:
+            nonlocal start_headers, chunks
+            if message["type"] == "http.response.start":
+                # A copy: middleware further out adds its headers to the
+                # message after it has passed through here
+                start_headers = list(message.get("headers", []))
+                if message["status"] != 200:
+                    chunks = None
+            elif message["type"] == "http.response.body" and chunks is not None:
+                if message.get("more_body", False):
+                    chunks = None
+                else:
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        if start_headers is None or chunks is None or price_version is None:
+            return
+        body = b"".join(chunks)
+        if len(body) > self.max_body_size:
+            return
+        headers = [
+            (name, value) for name, value in start_headers
+            if name.lower() not in (b"content-length", b"content-encoding")
+        ]
+        expires = time.time() + response_cache.ttl_seconds
+        response_cache.put(
+            key, CachedResponse(headers, body, scope.get("route"), price_version, expires), generation
+        )
+
+    async def _send(self, scope, send, entry: CachedResponse) -> None:
+        # Lets the instrumentation label a hit with the route that rendered it
+        scope["route"] = entry.route
+        body = entry.bodies[IDENTITY]
+        headers = list(entry.headers)
+        if len(body) >= self.minimum_size:
+            encoding = negotiate(request_header(scope, b"accept-encoding"))
+            if encoding is not None:
+                encoded = entry.bodies.get(encoding)
+                if encoded is None:
+                    encoded = entry.bodies[encoding] = compress(body, encoding, BEST_LEVELS)
+                body = encoded
+                headers.append((b"content-encoding", encoding.encode()))
+            add_vary(headers)
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"x-cache", b"hit"))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
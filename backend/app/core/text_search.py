@@ -0,0 +1,283 @@
+"""
+In-memory inverted index over the catalog text for chat search. Product
+names, descriptions, category and manufacturer names and manufacturer
+countries are split into words, normalized (lower case, ё as е) and
+reduced to their stems with the Snowball Russian stemmer; every stem maps
+to the set of ids of the products containing it. A query stem matches the
+indexed stems it is a prefix of, so "томат" finds "томаты" and "агро"
+finds "Агрофирма", and a query is a few set unions and intersections
+instead of substring tests on every product.
+
+The index is filled and kept current by app.crud.crud_product_search.
+"""
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+FIELDS = ("name", "description", "category", "manufacturer", "country")
+
+class CatalogEntry(NamedTuple):
+    """A product with the names it is matched by, read as one flat row"""
+    id: int
+    name: Optional[str]
+    description: Optional[str]
+    price: Optional[float]
+    image_url: Optional[str]
+    category_name: Optional[str]
+    manufacturer_name: Optional[str]
+    manufacturer_country: Optional[str]
+    has_category: bool
+    has_manufacturer: bool
+
+class Clause(NamedTuple):
+    """
+    ``text`` must occur in one of ``fields``. With ``lenient`` products
+    that have no value for the first field pass as well, the way the chat
+    filters ignore, say, the country of a product without a manufacturer.
+    """
+    fields: Tuple[str, ...]
+    text: str
+    lenient: bool = False
+
+_WORD = re.compile(r"[0-9a-zа-яё]+")
+_VOWEL = re.compile(r"[аеиоуыэюя]")
+_REGION = re.compile(r"[аеиоуыэюя][^аеиоуыэюя]")
+
+# Snowball Russian endings; group 1 endings must follow а or я, which stays
+_PERFECTIVE_GERUND = re.compile(r"((?<=[ая])(вшись|вши|в)|(ившись|ывшись|ивши|ывши|ив|ыв))$")
+_REFLEXIVE = re.compile(r"(ся|сь)$")
+_ADJECTIVE = re.compile(
+    r"(ими|ыми|его|ого|ему|ому|ее|ие|ые|ое|ей|ий|ый|ой|ем|им|ым|ом|их|ых|ую|юю|ая|яя|ою|ею)$"
+)
+_PARTICIPLE = re.compile(r"((?<=[ая])(ем|нн|вш|ющ|щ)|(ивш|ывш|ующ))$")
+_VERB = re.compile(
+    r"((?<=[ая])(ете|йте|ешь|нно|ла|на|ли|ем|ло|но|ет|ют|ны|ть|й|л|н)"
+    r"|(ейте|уйте|ила|ыла|ена|ите|или|ыли|ило|ыло|ено|ует|уют|ены|ить|ыть|ишь"
+    r"|ей|уй|ил|ыл|им|ым|ен|ят|ит|ыт|ую|ю))$"
+)
+_NOUN = re.compile(
+    r"(иями|ями|ами|ией|иям|ием|иях|ев|ов|ие|ье|еи|ии|ей|ой|ий|ям|ем|ам|ом|ах|ях|ию|ью|ия|ья"
+    r"|а|е|и|й|о|у|ы|ь|ю|я)$"
+)
+_DERIVATIONAL = re.compile(r"(ость|ост)$")
+_SUPERLATIVE = re.compile(r"(ейше|ейш)$")
+
+def _remove(pattern: "re.Pattern[str]", text: str) -> Tuple[str, bool]:
+    match = pattern.search(text)
+    if match is None:
+        return text, False
+    return text[:match.start()], True
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Snowball Russian stem of a lower-case word"""
+    vowel = _VOWEL.search(word)
+    if vowel is None:
+        return word
+    prefix, rv = word[:vowel.end()], word[vowel.end():]
+
+    rv, found = _remove(_PERFECTIVE_GERUND, rv)
+    if not found:
+        rv, _ = _remove(_REFLEXIVE, rv)
+        rv, found = _remove(_ADJECTIVE, rv)
+        if found:
+            rv, _ = _remove(_PARTICIPLE, rv)
+        else:
+            rv, found = _remove(_VERB, rv)
+            if not found:
+                rv, _ = _remove(_NOUN, rv)
+    if rv.endswith("и"):
+        rv = rv[:-1]
+
+    # Derivational endings only count inside R2
+    r1 = _REGION.search(word)
+    r2 = _REGION.search(word, r1.end()) if r1 else None
+    derivational = _DERIVATIONAL.search(rv)
+    if derivational and r2 and len(prefix) + derivational.start() >= r2.end():
+        rv = rv[:derivational.start()]
+
+    rv, superlative = _remove(_SUPERLATIVE, rv)
+    if rv.endswith("нн"):
+        rv = rv[:-1]
+    elif not superlative and rv.endswith("ь"):
+        rv = rv[:-1]
+    return prefix + rv
+
+def words(text: Optional[str]) -> List[str]:
+    """Normalized words of ``text``: lower case, ё as е"""
+    if not text:
+        return []
+    return _WORD.findall(text.lower().replace("ё", "е"))
+
+def terms(text: Optional[str]) -> List[str]:
+    """Stems of the words of ``text``"""
+    return [stem(word) for word in words(text)]
+
+def _field_values(entry: CatalogEntry) -> Dict[str, Optional[str]]:
+    return {
+        "name": entry.name,
+        "description": entry.description,
+        "category": entry.category_name,
+        "manufacturer": entry.manufacturer_name,
+        "country": entry.manufacturer_country,
+    }
+
+def _missing_fields(entry: CatalogEntry) -> List[str]:
+    """Fields lenient clauses let through for this product"""
+    missing = []
+    if not entry.name:
+        missing.append("name")
+    if not entry.has_category:
+        missing.append("category")
+    if not entry.has_manufacturer:
+        missing.extend(("manufacturer", "country"))
+    return missing
+
+class TextIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._entries: Dict[int, CatalogEntry] = {}
+        # field -> stem -> product ids
+        self._postings: Dict[str, Dict[str, Set[int]]] = {field: {} for field in FIELDS}
+        # field -> ids without a value there
+        self._missing: Dict[str, Set[int]] = {field: set() for field in FIELDS}
+        # Sorted stems per field for prefix lookups, and (price, id) pairs
+        # for price ranges; rebuilt on the first query after a change
+        self._vocabulary: Dict[str, List[str]] = {}
+        self._by_price: Optional[List[Tuple[float, int]]] = None
+
+    def load(self, entries: Iterable[CatalogEntry]) -> None:
+        with self._lock:
+            self._entries = {}
+            self._postings = {field: {} for field in FIELDS}
+            self._missing = {field: set() for field in FIELDS}
+            for entry in entries:
+                self._add(entry)
+            self._vocabulary = {}
+            self._by_price = None
+            self.loaded = True
+
+    def update(self, entries: Iterable[CatalogEntry], removed: Iterable[int] = ()) -> None:
+        """Reindex ``entries`` and drop the ``removed`` product ids"""
+        with self._lock:
+            for entry in entries:
+                self._discard(entry.id)
+                self._add(entry)
+            for product_id in removed:
+                self._discard(product_id)
+            self._vocabulary = {}
+            self._by_price = None
+
+    def _add(self, entry: CatalogEntry) -> None:
+        self._entries[entry.id] = entry
+        for field, value in _field_values(entry).items():
+            postings = self._postings[field]
+            for term in terms(value):
+                postings.setdefault(term, set()).add(entry.id)
+        for field in _missing_fields(entry):
+            self._missing[field].add(entry.id)
+
+    def _discard(self, product_id: int) -> None:
+        entry = self._entries.pop(product_id, None)
+        if entry is None:
+            return
+        for field, value in _field_values(entry).items():
+            postings = self._postings[field]
+            for term in set(terms(value)):
+                ids = postings.get(term)
+                if ids is not None:
+                    ids.discard(product_id)
+                    if not ids:
+                        del postings[term]
+        for missing in self._missing.values():
+            missing.discard(product_id)
+
+    def _prefixed(self, field: str, prefix: str) -> Set[int]:
+        """Ids of products with a stem starting with ``prefix`` in ``field``"""
+        vocabulary = self._vocabulary.get(field)
+        if vocabulary is None:
+            vocabulary = self._vocabulary[field] = sorted(self._postings[field])
+        postings = self._postings[field]
+        start = bisect_left(vocabulary, prefix)
+        end = bisect_left(vocabulary, prefix + "\uffff", start)
+        if end - start == 1:
+            return postings[vocabulary[start]]
+        ids: Set[int] = set()
+        for term in vocabulary[start:end]:
+            ids |= postings[term]
+        return ids
+
+    def _clause_ids(self, clause: Clause) -> Set[int]:
+        matched: Optional[Set[int]] = None
+        for term in terms(clause.text):
+            ids: Set[int] = set()
+            for field in clause.fields:
+                ids |= self._prefixed(field, term)
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                break
+        matched = matched or set()
+        if clause.lenient:
+            matched |= self._missing[clause.fields[0]]
+        return matched
+
+    def _price_range(self, min_price: Optional[float], max_price: Optional[float]) -> Set[int]:
+        if self._by_price is None:
+            self._by_price = sorted(
+                (entry.price, entry.id) for entry in self._entries.values() if entry.price is not None
+            )
+        start = 0 if min_price is None else bisect_left(self._by_price, (min_price, -1))
+        end = (
+            len(self._by_price) if max_price is None
+            else bisect_right(self._by_price, (max_price, float("inf")))
+        )
+        return {product_id for _, product_id in self._by_price[start:end]}
+
+    def search(
+        self,
+        clauses: Sequence[Clause] = (),
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[CatalogEntry]:
+        """Products matching every clause and the price range, by id"""
+        with self._lock:
+            candidates: Optional[Set[int]] = None
+            # Most selective first, so later intersections stay small
+            for ids in sorted((self._clause_ids(clause) for clause in clauses), key=len):
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            if min_price is None and max_price is None:
+                ids = self._entries.keys() if candidates is None else candidates
+            elif candidates is None:
+                ids = self._price_range(min_price, max_price)
+            else:
+                ids = {
+                    i for i in candidates
+                    if self._entries[i].price is not None
+                    and (min_price is None or self._entries[i].price >= min_price)
+                    and (max_price is None or self._entries[i].price <= max_price)
+                }
+            return [self._entries[i] for i in sorted(ids)]
+
+    def term_counts(self, text: str, min_length: int = 3) -> Dict[int, int]:
+        """
+        Products matching any term of ``text`` in any field, with the number
+        of terms they match. Terms shorter than ``min_length``, mostly
+        prepositions, are left out.
+        """
+        with self._lock:
+            counts: Dict[int, int] = Counter()
+            for term in set(terms(text)):
+                if len(term) >= min_length:
+                    counts.update(self._clause_ids(Clause(FIELDS, term)))
+            return counts
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+text_index = TextIndex()
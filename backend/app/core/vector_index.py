@@ -0,0 +1,145 @@
+"""
+In-memory index of product embedding vectors for semantic search. The
+vectors live in one float32 matrix, one row per product, and nearest
+neighbours come from an HNSW graph when hnswlib is installed; without it,
+or for small catalogs, every row is scored with a single matrix-vector
+product, which is exact and still quick at catalog sizes.
+
+Vectors are normalized (app.core.embeddings), so scores are cosines.
+The index is filled and kept current by app.crud.crud_product_semantic.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # exact search only
+    hnswlib = None
+
+# Below this many vectors an exact scan beats walking the graph
+EXACT_SEARCH_LIMIT = 20_000
+
+class VectorIndex:
+    def __init__(self, ef_construction: int = 200, m: int = 16, ef_search: int = 128) -> None:
+        self._lock = threading.RLock()
+        self.ef_construction = ef_construction
+        self.m = m
+        self.ef_search = ef_search
+        # Name of the embedder that produced the vectors
+        self.model: Optional[str] = None
+        self.loaded = False
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        # Row -> product id, -1 for free rows
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._graph = None
+        # Labels marked deleted in the graph; they keep their slot there
+        self._deleted: Set[int] = set()
+
+    def reset(self, model: str, dimensions: int, capacity: int = 1024) -> None:
+        with self._lock:
+            self.model = model
+            self._vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+            self._ids = np.full(capacity, -1, dtype=np.int64)
+            self._rows = {}
+            self._free = list(range(capacity - 1, -1, -1))
+            self._graph = None
+            self._deleted = set()
+            if hnswlib is not None:
+                self._graph = hnswlib.Index(space="ip", dim=dimensions)
+                self._graph.init_index(max_elements=capacity, ef_construction=self.ef_construction, M=self.m)
+                self._graph.set_ef(self.ef_search)
+            self.loaded = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.model = None
+            self.loaded = False
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._rows = {}
+            self._free = []
+            self._graph = None
+            self._deleted = set()
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._ids)
+        if needed <= len(self._free):
+            return
+        new_capacity = max(capacity * 2, capacity + needed)
+        self._vectors = np.vstack(
+            [self._vectors, np.zeros((new_capacity - capacity, self._vectors.shape[1]), dtype=np.float32)]
+        )
+        self._ids = np.concatenate([self._ids, np.full(new_capacity - capacity, -1, dtype=np.int64)])
+        self._free.extend(range(new_capacity - 1, capacity - 1, -1))
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Insert or replace the vectors of ``ids``"""
+        if not len(ids):
+            return
+        with self._lock:
+            self._grow(sum(1 for id in ids if id not in self._rows))
+            for id, vector in zip(ids, vectors):
+                row = self._rows.get(id)
+                if row is None:
+                    row = self._rows[id] = self._free.pop()
+                    self._ids[row] = id
+                self._vectors[row] = vector
+            if self._graph is not None:
+                labels = np.asarray(ids, dtype=np.int64)
+                added = self._graph.get_current_count() + len(labels)
+                if added > self._graph.get_max_elements():
+                    self._graph.resize_index(max(added, self._graph.get_max_elements() * 2))
+                for id in self._deleted.intersection(ids):
+                    self._graph.unmark_deleted(id)
+                    self._deleted.discard(id)
+                self._graph.add_items(vectors, labels)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            for id in ids:
+                row = self._rows.pop(id, None)
+                if row is None:
+                    continue
+                self._ids[row] = -1
+                self._free.append(row)
+                if self._graph is not None:
+                    self._graph.mark_deleted(id)
+                    self._deleted.add(id)
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """The ``k`` nearest products with their cosine, best first"""
+        with self._lock:
+            k = min(k, len(self._rows))
+            if k <= 0:
+                return []
+            if self._graph is not None and len(self._rows) > EXACT_SEARCH_LIMIT:
+                self._graph.set_ef(max(self.ef_search, k))
+                labels, distances = self._graph.knn_query(vector, k=k)
+                # Inner product space: distance is 1 - cosine
+                return [(int(id), 1.0 - float(d)) for id, d in zip(labels[0], distances[0])]
+            scores = self._vectors @ vector
+            scores[self._ids < 0] = -np.inf
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[row]), float(scores[row])) for row in top]
+
+    def scores(self, ids: Iterable[int], vector: np.ndarray) -> Dict[int, float]:
+        """Cosine of each indexed product in ``ids``"""
+        with self._lock:
+            pairs = [(id, self._rows[id]) for id in ids if id in self._rows]
+            if not pairs:
+                return {}
+            values = self._vectors[[row for _, row in pairs]] @ vector
+            return {id: float(value) for (id, _), value in zip(pairs, values)}
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+product_vectors = VectorIndex()
@@ -4,4 +4,12 @@ from app.crud.crud_category import category
 from app.crud.crud_review import review
 from app.crud.crud_order import order
 from app.crud.crud_cart import cart
-from app.crud.crud_order_comment import order_comment 
\ No newline at end of file
+from app.crud.crud_order_comment import order_comment 
+from app.crud.crud_inventory import inventory
+from app.crud.crud_report import report
+from app.crud.crud_product_import import product_import
+from app.crud.crud_promotion import promotion
+from app.crud.crud_product_facets import product_facets
+from app.crud.crud_product_search import product_search
+from app.crud.crud_product_autocomplete import product_autocomplete
+from app.crud.crud_product_semantic import product_semantic
@@ -1,18 +1,123 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import column, event, inspect, select, update, values
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from app.db.unit_of_work import commit
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+def values_table(db: Session, name: str, columns: List[Any], rows: List[tuple]):
+    """
+    Build an inline ``(VALUES ...) AS name (cols)`` relation that set-based
+    statements can join against. SQLite has no column aliases for VALUES,
+    so there the ``columnN`` names it assigns are relabelled by a subquery.
+    A ``UNION ALL`` of selects would be capped at 500 rows, and a ``WITH``
+    prefix hides the rowcount of UPDATE statements from the sqlite3 driver.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return values(*[column(c.name, c.type) for c in columns], name=name).data(rows)
+    table = values(*[column(f"column{i}", c.type) for i, c in enumerate(columns, 1)]).data(rows)
+    return select(*[table.c[f"column{i}"].label(c.name) for i, c in enumerate(columns, 1)]).subquery(name)
+
+class LookupStats:
+    """Hit/miss counters for primary key lookups through CRUDBase"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits: int = 0, misses: int = 0) -> None:
+        self.hits += hits
+        self.misses += misses
+
+    def dict(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+# Process-wide totals; per-session counts are in session_lookup_stats(db)
+lookup_stats = LookupStats()
+
+_MEMO_KEY = "crud_memo"
+_STATS_KEY = "crud_lookup_stats"
+
+def _memo(db: Session) -> Dict[Any, Any]:
+    # Strong references for the session's lifetime (one request with
+    # deps.get_db); the identity map alone only holds weak references.
+    return db.info.setdefault(_MEMO_KEY, {})
+
+def session_lookup_stats(db: Session) -> LookupStats:
+    stats = db.info.get(_STATS_KEY)
+    if stats is None:
+        stats = db.info[_STATS_KEY] = LookupStats()
+    return stats
+
+def _record(db: Session, hits: int = 0, misses: int = 0) -> None:
+    lookup_stats.record(hits, misses)
+    session_lookup_stats(db).record(hits, misses)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_memo(session: Session) -> None:
+    # Rolled back inserts are expunged; don't hand them out again
+    session.info.pop(_MEMO_KEY, None)
+
+def supports_update_returning(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" or getattr(dialect, "update_returning", False)
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         self.model = model
+        self._columns: Optional[List[Tuple[Any, str]]] = None
+
+    @property
+    def column_attrs(self) -> List[Tuple[Any, str]]:
+        """(table column, attribute key) pairs, resolved once per model"""
+        if self._columns is None:
+            mapper = inspect(self.model)
+            self._columns = [(prop.columns[0], prop.key) for prop in mapper.column_attrs]
+        return self._columns
+
+    def _cached(self, db: Session, id: Any) -> Optional[ModelType]:
+        obj = _memo(db).get((self.model, id))
+        if obj is None:
+            obj = db.identity_map.get(identity_key(self.model, id))
+        return obj
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        """
+        Primary key lookup that is free for rows already loaded in this
+        session: the request memo and identity map are checked before SQL.
+        """
+        obj = self._cached(db, id)
+        if obj is not None:
+            _record(db, hits=1)
+            return obj
+        _record(db, misses=1)
+        obj = db.get(self.model, id)
+        if obj is not None:
+            _memo(db)[(self.model, id)] = obj
+        return obj
+
+    def get_many(self, db: Session, ids: Iterable[Any]) -> Dict[Any, ModelType]:
+        """Load several rows by primary key with at most one IN query"""
+        found: Dict[Any, ModelType] = {}
+        missing = []
+        for id in set(ids):
+            obj = self._cached(db, id)
+            if obj is not None:
+                found[id] = obj
+            else:
+                missing.append(id)
+        _record(db, hits=len(found), misses=len(missing))
+        if missing:
+            memo = _memo(db)
+            for obj in db.query(self.model).filter(self.model.id.in_(missing)):
+                found[obj.id] = memo[(self.model, obj.id)] = obj
+        return found
 
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
@@ -23,7 +128,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
+        commit(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -32,23 +137,50 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: Session,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        returning: bool = False
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        """
+        Apply the changed column values of ``obj_in`` to ``db_obj``. With
+        ``returning=True`` (and a dialect that supports it) the row is
+        written with ``UPDATE ... RETURNING`` and the returned values are
+        put back on the object, so no reload is needed after the commit.
+        That path is a Core statement and skips ORM flush events.
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        changes = {
+            key: update_data[key]
+            for _, key in self.column_attrs
+            if key in update_data and getattr(db_obj, key) != update_data[key]
+        }
+
+        if returning and changes and supports_update_returning(db):
+            mapper = inspect(self.model)
+            identity = mapper.primary_key_from_instance(db_obj)
+            stmt = update(self.model.__table__).values(
+                {mapper.get_property(key).columns[0].name: value for key, value in changes.items()}
+            )
+            for pk_column, pk_value in zip(mapper.primary_key, identity):
+                stmt = stmt.where(pk_column == pk_value)
+            row = db.execute(stmt.returning(*[col for col, _ in self.column_attrs])).one()
+            commit(db)
+            for (_, key), value in zip(self.column_attrs, row):
+                set_committed_value(db_obj, key, value)
+            return db_obj
+
+        for key, value in changes.items():
+            setattr(db_obj, key, value)
         db.add(db_obj)
-        db.commit()
+        commit(db)
         db.refresh(db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
+        obj = self.get(db, id)
+        _memo(db).pop((self.model, id), None)
         db.delete(obj)
-        db.commit()
+        commit(db)
         return obj 
\ No newline at end of file
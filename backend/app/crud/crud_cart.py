@@ -1,10 +1,17 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app import models, schemas
+from app.core.pricing import price_table
+from app.db.unit_of_work import commit
 
 class CRUDCart:
     def get_cart_items(self, db: Session, user_id: int) -> List[models.CartItem]:
-        return db.query(models.CartItem).filter(models.CartItem.user_id == user_id).all()
+        return (
+            db.query(models.CartItem)
+            .options(joinedload(models.CartItem.product))
+            .filter(models.CartItem.user_id == user_id)
+            .all()
+        )
 
     def get_cart_item(self, db: Session, cart_item_id: int, user_id: int) -> Optional[models.CartItem]:
         return db.query(models.CartItem).filter(
@@ -22,7 +29,7 @@ class CRUDCart:
         if existing_item:
             # Update quantity if item exists
             existing_item.quantity += cart_item.quantity
-            db.commit()
+            commit(db)
             db.refresh(existing_item)
             return existing_item
 
@@ -33,7 +40,7 @@ class CRUDCart:
             quantity=cart_item.quantity
         )
         db.add(db_cart_item)
-        db.commit()
+        commit(db)
         db.refresh(db_cart_item)
         return db_cart_item
 
@@ -51,7 +58,7 @@ class CRUDCart:
         if cart_item.quantity is not None:
             db_cart_item.quantity = cart_item.quantity
 
-        db.commit()
+        commit(db)
         db.refresh(db_cart_item)
         return db_cart_item
 
@@ -61,20 +68,24 @@ class CRUDCart:
             return False
 
         db.delete(db_cart_item)
-        db.commit()
+        commit(db)
         return True
 
     def clear_cart(self, db: Session, user_id: int) -> bool:
         db.query(models.CartItem).filter(models.CartItem.user_id == user_id).delete()
-        db.commit()
+        commit(db)
         return True
 
     def get_cart_total(self, db: Session, user_id: int) -> float:
-        cart_items = self.get_cart_items(db, user_id)
-        total = 0.0
-        for item in cart_items:
-            if item.product:
-                total += item.product.price * item.quantity
-        return total
+        rows = (
+            db.query(models.Product.id, models.Product.price, models.CartItem.quantity)
+            .join(models.CartItem.product)
+            .filter(models.CartItem.user_id == user_id)
+        )
+        total = sum(
+            (price_table.price(product_id, price) or 0.0) * quantity
+            for product_id, price, quantity in rows
+        )
+        return round(total, 2)
 
 cart = CRUDCart() 
\ No newline at end of file
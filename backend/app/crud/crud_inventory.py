@@ -0,0 +1,116 @@
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import Integer, and_, case, column, or_, update
+from sqlalchemy.orm import Session
+from app.core.catalog_events import mark_products_changed
+from app.crud.base import values_table
+from app.models.order import Order
+from app.models.product import Product
+
+class InsufficientStock(Exception):
+    def __init__(self, product_ids: List[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Insufficient stock for products: {product_ids}")
+
+class CRUDInventory:
+    """
+    Stock reservations. Every basket is applied with one conditional
+    UPDATE joined against the basket lines, so concurrent checkouts only
+    contend on the product rows themselves and never oversell.
+    """
+
+    def _aggregate(self, lines: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+        quantities: Dict[int, int] = {}
+        for product_id, quantity in lines:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        return quantities
+
+    def _lines(self, db: Session, quantities: Dict[int, int]):
+        return values_table(
+            db,
+            "lines",
+            [column("product_id", Integer), column("quantity", Integer)],
+            list(quantities.items()),
+        )
+
+    def reserve(self, db: Session, *, lines: Iterable[Tuple[int, int]]) -> None:
+        """
+        Decrement stock for (product_id, quantity) lines in one statement.
+        Products without a tracked quantity only need to be in stock. On
+        failure the whole transaction is rolled back and InsufficientStock
+        lists the products that could not be covered.
+        """
+        quantities = self._aggregate(lines)
+        if not quantities:
+            return
+        lines_table = self._lines(db, quantities)
+        remaining = Product.stock_quantity - lines_table.c.quantity
+        stmt = (
+            update(Product)
+            .where(Product.id == lines_table.c.product_id)
+            .where(
+                or_(
+                    and_(Product.stock_quantity.is_(None), Product.in_stock.is_(True)),
+                    Product.stock_quantity >= lines_table.c.quantity,
+                )
+            )
+            .values(
+                stock_quantity=remaining,
+                in_stock=case(
+                    (Product.stock_quantity.is_(None), Product.in_stock),
+                    else_=remaining > 0,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = db.execute(stmt)
+        if result.rowcount != len(quantities):
+            db.rollback()
+            raise InsufficientStock(self._short_products(db, quantities))
+        mark_products_changed(db, quantities)
+
+    def release(self, db: Session, *, order: Order) -> None:
+        """Return the stock held by an order's items"""
+        quantities = self._aggregate(
+            (item.product_id, item.quantity)
+            for item in order.order_items
+            if item.product_id is not None
+        )
+        if not quantities:
+            return
+        lines_table = self._lines(db, quantities)
+        restored = Product.stock_quantity + lines_table.c.quantity
+        stmt = (
+            update(Product)
+            .where(Product.id == lines_table.c.product_id)
+            .values(
+                stock_quantity=restored,
+                in_stock=case(
+                    (Product.stock_quantity.is_(None), Product.in_stock),
+                    else_=restored > 0,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(stmt)
+        mark_products_changed(db, quantities)
+
+    def _short_products(self, db: Session, quantities: Dict[int, int]) -> List[int]:
+        rows = (
+            db.query(Product.id, Product.stock_quantity, Product.in_stock)
+            .filter(Product.id.in_(list(quantities)))
+            .all()
+        )
+        found = {row.id: row for row in rows}
+        short = []
+        for product_id, quantity in quantities.items():
+            row = found.get(product_id)
+            if row is None:
+                short.append(product_id)
+            elif row.stock_quantity is None:
+                if not row.in_stock:
+                    short.append(product_id)
+            elif row.stock_quantity < quantity:
+                short.append(product_id)
+        return short
+
+inventory = CRUDInventory()
@@ -1,8 +1,28 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from app.crud.base import CRUDBase
-from app.models.order import Order, OrderItem
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+from app.core.catalog_events import catalog_sync
+from app.core.pricing import price_table
+from app.crud.base import CRUDBase, _memo
+from app.crud.crud_inventory import inventory
+from app.crud.crud_report import report
+from app.models.product import Product
+from app.models.order import (
+    Order, OrderItem, OrderStatus, OrderStatusHistory, ORDER_STATUS_TRANSITIONS
+)
 from app.schemas.order import OrderCreate, OrderUpdate, Order as OrderSchema
+from app.db.unit_of_work import commit
+
+class InvalidStatusTransition(Exception):
+    def __init__(self, from_status: Optional[str], to_status: str):
+        self.from_status = from_status
+        self.to_status = to_status
+        super().__init__(f"Cannot change order status from {from_status} to {to_status}")
+
+class ProductNotForSale(Exception):
+    def __init__(self, product_ids: List[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Products without a price: {product_ids}")
 
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
     def get_multi(
@@ -28,6 +48,7 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         orders = (
             db.query(self.model)
             .filter(Order.user_id == owner_id)
+            .order_by(Order.created_at.desc())
             .options(joinedload(Order.order_items).joinedload(OrderItem.product))
             .offset(skip)
             .limit(limit)
@@ -40,12 +61,31 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
                     item.product_id = item.product.id
         return orders
 
+    def listing_query(
+        self, db: Session, *, owner_id: Optional[int] = None, skip: int = 0, limit: int = 100
+    ) -> Query:
+        """
+        Newest first, all orders or those of ``owner_id``. Items are
+        selectin-loaded, with their products joined, so the query can be
+        read with yield_per.
+        """
+        query = db.query(self.model)
+        if owner_id is not None:
+            query = query.filter(Order.user_id == owner_id)
+        return (
+            query.order_by(Order.created_at.desc(), Order.id.desc())
+            .options(selectinload(Order.order_items).joinedload(OrderItem.product))
+            .offset(skip)
+            .limit(limit)
+        )
+
     def get_by_user(
         self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
     ) -> List[Order]:
         orders = (
             db.query(self.model)
             .filter(Order.user_id == user_id)
+            .order_by(Order.created_at.desc())
             .options(joinedload(Order.order_items).joinedload(OrderItem.product))
             .offset(skip)
             .limit(limit)
@@ -64,6 +104,7 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         orders = (
             db.query(self.model)
             .filter(Order.status == status)
+            .order_by(Order.created_at.desc())
             .options(joinedload(Order.order_items).joinedload(OrderItem.product))
             .offset(skip)
             .limit(limit)
@@ -79,15 +120,40 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
     def create_with_owner(
         self, db: Session, *, obj_in: OrderCreate, owner_id: int
     ) -> OrderSchema:
+        if obj_in.status not in OrderStatus._value2member_map_:
+            raise InvalidStatusTransition(None, obj_in.status)
+
+        # Charge the current effective prices, not what the client sent;
+        # first apply price changes other processes committed
+        catalog_sync.catch_up()
+        list_prices = dict(
+            db.query(Product.id, Product.price)
+            .filter(Product.id.in_({item.product_id for item in obj_in.items}))
+        )
+        items = [
+            item.copy(update={"price": price_table.price(item.product_id, list_prices[item.product_id])})
+            if item.product_id in list_prices else item
+            for item in obj_in.items
+        ]
+        unpriced = sorted({item.product_id for item in items if item.price is None})
+        if unpriced:
+            raise ProductNotForSale(unpriced)
+
         # Create the order
         order_data = obj_in.dict(exclude={'items'})
         order_data['user_id'] = owner_id
+        order_data['total_amount'] = round(sum(item.price * item.quantity for item in items), 2)
         db_order = Order(**order_data)
         db.add(db_order)
         db.flush()  # Flush to get the order ID
+        db.add(OrderStatusHistory(
+            order_id=db_order.id,
+            to_status=db_order.status,
+            changed_by_id=owner_id
+        ))
 
         # Create order items
-        for item in obj_in.items:
+        for item in items:
             db_item = OrderItem(
                 order_id=db_order.id,
                 product_id=item.product_id,
@@ -96,7 +162,12 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
             )
             db.add(db_item)
 
-        db.commit()
+        # Reserve stock for the whole basket; rolls back the order on failure
+        inventory.reserve(
+            db, lines=[(item.product_id, item.quantity) for item in items]
+        )
+        report.record_order_created(db, order=db_order, items=items)
+        commit(db)
         
         # Reload the order with its items
         db_order = (
@@ -115,4 +186,52 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         # Convert to Pydantic model
         return OrderSchema.from_orm(db_order)
 
+    def set_status(
+        self, db: Session, *, db_obj: Order, status: str, changed_by_id: Optional[int] = None
+    ) -> Order:
+        """
+        Move an order through the status state machine, appending to its
+        history. Cancelling releases the stock reserved at checkout.
+        """
+        if status == db_obj.status:
+            return db_obj
+        try:
+            current = OrderStatus(db_obj.status)
+            target = OrderStatus(status)
+        except ValueError:
+            raise InvalidStatusTransition(db_obj.status, status)
+        if target not in ORDER_STATUS_TRANSITIONS[current]:
+            raise InvalidStatusTransition(db_obj.status, status)
+
+        if target == OrderStatus.CANCELLED:
+            inventory.release(db, order=db_obj)
+        report.record_status_change(
+            db, order=db_obj, from_status=current.value, to_status=target.value
+        )
+        db.add(OrderStatusHistory(
+            order_id=db_obj.id,
+            from_status=current.value,
+            to_status=target.value,
+            changed_by_id=changed_by_id
+        ))
+        db_obj.status = target.value
+        commit(db)
+        db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Order:
+        obj = self.get(db, id)
+        report.record_order_removed(db, order=obj)
+        _memo(db).pop((self.model, id), None)
+        db.delete(obj)
+        commit(db)
+        return obj
+
+    def count_by_status(self, db: Session) -> Dict[str, int]:
+        counts = {status.value: 0 for status in OrderStatus}
+        rows = db.query(Order.status, func.count()).group_by(Order.status).all()
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
 order = CRUDOrder(Order) 
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
 from app.models.order_comment import OrderComment
 from app.schemas.order_comment import OrderCommentCreate, OrderCommentUpdate
+from app.db.unit_of_work import commit
 
 class CRUDOrderComment(CRUDBase[OrderComment, OrderCommentCreate, OrderCommentUpdate]):
     def get_by_order(
@@ -25,7 +26,7 @@ class CRUDOrderComment(CRUDBase[OrderComment, OrderCommentCreate, OrderCommentUp
             user_id=user_id
         )
         db.add(db_obj)
-        db.commit()
+        commit(db)
         db.refresh(db_obj)
         return db_obj
 
@@ -1,8 +1,128 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import Integer, case, cast, column, select, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, Session
+from app.core.catalog_events import mark_products_changed
+from app.core.facets import Filters
+from app.core.pricing import price_table
+from app.crud.base import CRUDBase, values_table
+from app.models.category import Category
+from app.models.manufacturer import Manufacturer
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.schemas.category import Category as CategorySchema
+from app.schemas.manufacturer import Manufacturer as ManufacturerSchema
+from app.schemas.product import ProductCreate, ProductListItem, ProductUpdate
+from app.db.unit_of_work import commit
+
+BULK_UPDATE_BATCH = 1000
+
+# Related objects listings can embed with ?include=: model, foreign key
+# and the fields of the embedded object
+INCLUDES = {
+    "category": (Category, Product.category_id, list(CategorySchema.__fields__)),
+    "manufacturer": (Manufacturer, Product.manufacturer_id, list(ManufacturerSchema.__fields__)),
+}
+LISTING_FIELDS = [name for name in ProductListItem.__fields__ if name not in INCLUDES]
+# Listing fields that aren't columns: the columns they are computed from
+# and the function computing them
+DERIVED_FIELDS = {
+    "effective_price": ((Product.id, Product.price), price_table.price),
+}
+
+# Listing sort orders: name -> (column, descending). Pages continue from a
+# (value, id) keyset, which the (column, id) and (category_id, column, id)
+# indexes serve as a range scan in either direction.
+SORTS = {
+    "price": (Product.price, False),
+    "-price": (Product.price, True),
+    "rating": (Product.average_rating, False),
+    "-rating": (Product.average_rating, True),
+    "newest": (Product.created_at, True),
+    "name": (Product.name, False),
+}
+
+def _derived(compute: Callable[..., Any], indexes: List[int]) -> Callable[[Sequence[Any]], Any]:
+    return lambda row: compute(*(row[index] for index in indexes))
+
+def _embedded(start: int, names: List[str]) -> Callable[[Sequence[Any]], Any]:
+    end = start + len(names)
+    # An outer join leaves the primary key NULL when there is nothing to embed
+    key = start + names.index("id")
+    return lambda row: None if row[key] is None else dict(zip(names, row[start:end]))
+
+class ListingColumns:
+    """
+    What a listing page reads and how its rows become response records.
+    The product columns behind the requested fields (plus the sort key
+    that cursors need) are followed by the columns of every included
+    object, outer-joined into the same SELECT, so a page is one query of
+    plain tuples and no Product is hydrated.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        include: Iterable[str] = (),
+        sort: Optional[str] = None,
+    ) -> None:
+        requested = {"id", *(LISTING_FIELDS if fields is None else fields)}
+        self.columns: List[Any] = []
+        self.joins: List[Tuple[Any, Any]] = []
+        self.readers: List[Tuple[str, Callable[[Sequence[Any]], Any]]] = []
+        self.id_index = self._index(Product.id)
+        for field in LISTING_FIELDS:
+            if field not in requested:
+                continue
+            if field in DERIVED_FIELDS:
+                sources, compute = DERIVED_FIELDS[field]
+                self.readers.append((field, _derived(compute, [self._index(c) for c in sources])))
+            else:
+                self.readers.append((field, itemgetter(self._index(getattr(Product, field)))))
+        self.sort_index = self._index(SORTS[sort][0]) if sort is not None else None
+        for name in INCLUDES:
+            if name not in include:
+                continue
+            model, foreign_key, names = INCLUDES[name]
+            self.joins.append((model, model.id == foreign_key))
+            self.readers.append((name, _embedded(len(self.columns), names)))
+            self.columns.extend(getattr(model, field) for field in names)
+
+    def _index(self, column: Any) -> int:
+        for index, existing in enumerate(self.columns):
+            if existing is column:
+                return index
+        self.columns.append(column)
+        return len(self.columns) - 1
+
+    def record(self, row: Sequence[Any]) -> Dict[str, Any]:
+        return {key: read(row) for key, read in self.readers}
+
+    def cursor(self, row: Sequence[Any]) -> Tuple[Any, int]:
+        """``(sort value, id)`` keyset of a row, for the next page"""
+        return row[self.sort_index], row[self.id_index]
+
+def filter_clauses(filters: Filters) -> List[Any]:
+    """SQL equivalent of the facet index filters"""
+    clauses = []
+    if filters.category_ids:
+        clauses.append(Product.category_id.in_(filters.category_ids))
+    if filters.manufacturer_ids:
+        clauses.append(Product.manufacturer_id.in_(filters.manufacturer_ids))
+    if filters.countries:
+        clauses.append(Product.manufacturer_id.in_(
+            select(Manufacturer.id).where(Manufacturer.country.in_(filters.countries))
+        ))
+    if filters.min_price is not None:
+        clauses.append(Product.price >= filters.min_price)
+    if filters.max_price is not None:
+        clauses.append(Product.price <= filters.max_price)
+    if filters.min_rating is not None:
+        clauses.append(Product.average_rating >= filters.min_rating)
+    if filters.in_stock is not None:
+        clauses.append(Product.in_stock.is_(filters.in_stock))
+    return clauses
 
 class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
     def get_by_category(
@@ -16,6 +136,55 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
             .all()
         )
 
+    def get_listing(self, db: Session, **kwargs: Any) -> List[Row]:
+        """A page of listing rows; see listing_query for the arguments"""
+        return self.listing_query(db, **kwargs).all()
+
+    def listing_query(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        columns: Optional[ListingColumns] = None,
+        ids: Optional[List[int]] = None,
+        sort: Optional[str] = None,
+        after: Optional[Tuple[Any, int]] = None,
+        filters: Optional[Filters] = None,
+    ) -> Query:
+        """
+        A page of products ordered by id, as rows of ``columns`` (all
+        listing fields by default). ``ids`` fetches exactly those
+        products, already paged by the caller.
+
+        With ``sort`` (a SORTS key) the page is ordered by that column and
+        starts after the ``(value, id)`` keyset of the previous page's last
+        row; products without a value for the column are left out.
+        ``filters`` are applied in SQL.
+        """
+        columns = columns or ListingColumns(sort=sort)
+        query = db.query(*columns.columns)
+        for model, on in columns.joins:
+            query = query.outerjoin(model, on)
+        if ids is not None:
+            query = query.filter(Product.id.in_(ids))
+            skip = 0
+        if filters is not None:
+            query = query.filter(*filter_clauses(filters))
+        if sort is None:
+            query = query.order_by(Product.id)
+        else:
+            sort_column, descending = SORTS[sort]
+            query = query.filter(sort_column.isnot(None))
+            if after is not None:
+                keyset = tuple_(sort_column, Product.id)
+                query = query.filter(keyset < tuple_(*after) if descending else keyset > tuple_(*after))
+            if descending:
+                query = query.order_by(sort_column.desc(), Product.id.desc())
+            else:
+                query = query.order_by(sort_column, Product.id)
+        return query.offset(skip).limit(limit)
+
     def get_by_name(
         self, db: Session, *, name: str, skip: int = 0, limit: int = 100
     ) -> List[Product]:
@@ -27,4 +196,56 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
             .all()
         )
 
+    def bulk_update(self, db: Session, *, items: List[Dict[str, Any]]) -> List[int]:
+        """
+        Apply per-product field changes with set-based
+        ``UPDATE ... FROM (VALUES ...)`` statements, one per distinct set of
+        changed fields. ``items`` are dicts with an ``id`` and only the fields
+        to change. Returns the ids that did not match a product.
+        """
+        groups: Dict[frozenset, Dict[int, Dict[str, Any]]] = {}
+        for item in items:
+            fields = frozenset(item) - {"id"}
+            if fields:
+                groups.setdefault(fields, {})[item["id"]] = item
+
+        table = Product.__table__
+        for fields, by_id in groups.items():
+            names = sorted(fields)
+            columns = [column("id", Integer)] + [column(name, table.c[name].type) for name in names]
+            rows = list(by_id.values())
+            for start in range(0, len(rows), BULK_UPDATE_BATCH):
+                batch = rows[start:start + BULK_UPDATE_BATCH]
+                lines = values_table(
+                    db, "changes", columns, [tuple(row[c.name] for c in columns) for row in batch]
+                )
+                changes = {name: cast(lines.c[name], table.c[name].type) for name in names}
+                if "stock_quantity" in fields:
+                    stock = changes["stock_quantity"]
+                    changes["in_stock"] = case(
+                        (stock.is_(None), changes.get("in_stock", Product.in_stock)),
+                        else_=stock > 0,
+                    )
+                elif "in_stock" in fields:
+                    # Tracked products keep in_stock derived from their quantity
+                    changes["in_stock"] = case(
+                        (Product.stock_quantity.is_(None), changes["in_stock"]),
+                        else_=Product.stock_quantity > 0,
+                    )
+                changes["updated_at"] = datetime.utcnow()
+                db.execute(
+                    update(Product)
+                    .where(Product.id == lines.c.id)
+                    .values(**changes)
+                    .execution_options(synchronize_session=False)
+                )
+
+        requested = {item["id"] for item in items}
+        existing = {
+            id_ for (id_,) in db.query(Product.id).filter(Product.id.in_(list(requested)))
+        } if requested else set()
+        mark_products_changed(db, existing)
+        commit(db)
+        return sorted(requested - existing)
+
 product = CRUDProduct(Product) 
\ No newline at end of file
@@ -0,0 +1,94 @@
+import logging
+import threading
+from typing import List, Optional, Set
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.autocomplete import ProductStats, Suggestion, autocomplete_index
+from app.core.catalog_events import LoadTracker, on_products_changed
+from app.db.session import SessionLocal
+from app.models.category import Category
+from app.models.manufacturer import Manufacturer
+from app.models.order import OrderItem
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# Changes committed while the index loads
+_loads = LoadTracker()
+
+def _product_stats(db: Session, product_ids: Optional[Set[int]] = None) -> List[ProductStats]:
+    orders = (
+        db.query(OrderItem.product_id, func.count(OrderItem.id).label("orders"))
+        .group_by(OrderItem.product_id)
+    )
+    if product_ids is not None:
+        orders = orders.filter(OrderItem.product_id.in_(product_ids))
+    orders = orders.subquery()
+    query = db.query(
+        Product.id,
+        Product.name,
+        Product.category_id,
+        Product.manufacturer_id,
+        Product.average_rating,
+        func.coalesce(orders.c.orders, 0),
+    ).outerjoin(orders, orders.c.product_id == Product.id)
+    if product_ids is not None:
+        query = query.filter(Product.id.in_(product_ids))
+    return [ProductStats._make(row) for row in query]
+
+class CRUDProductAutocomplete:
+    """Name suggestions served from app.core.autocomplete"""
+
+    def suggest(self, db: Session, *, text: str, limit: int = 10) -> List[Suggestion]:
+        self.ensure_loaded(db)
+        return autocomplete_index.suggest(text, limit=limit)
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not autocomplete_index.loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        """Index the whole catalog; three SELECTs"""
+        _loads.run(
+            lambda: autocomplete_index.load(
+                _product_stats(db),
+                db.query(Category.id, Category.name).filter(Category.name.isnot(None)),
+                db.query(Manufacturer.id, Manufacturer.name).filter(Manufacturer.name.isnot(None)),
+            ),
+            lambda product_ids: self.refresh(db, product_ids),
+        )
+
+    def preload(self) -> None:
+        """
+        Load the index on a background thread, so neither startup nor the
+        first keystrokes wait for it. If the database isn't reachable yet
+        the first suggestion request loads it instead.
+        """
+
+        def run() -> None:
+            try:
+                with SessionLocal() as db:
+                    self.ensure_loaded(db)
+            except Exception:
+                logger.exception("Preloading the autocomplete index failed")
+
+        threading.Thread(target=run, name="autocomplete-preload", daemon=True).start()
+
+    def refresh(self, db: Session, product_ids: Set[int]) -> None:
+        rows = _product_stats(db, product_ids)
+        autocomplete_index.update(rows, product_ids - {row.id for row in rows})
+
+product_autocomplete = CRUDProductAutocomplete()
+
+# Past this many changed products reloading everything is cheaper
+FULL_RELOAD_THRESHOLD = 5000
+
+@on_products_changed
+def _reindex_products(product_ids: Optional[Set[int]]) -> None:
+    if _loads.record(product_ids) or not autocomplete_index.loaded:
+        return
+    with SessionLocal() as db:
+        if product_ids is None or len(product_ids) > FULL_RELOAD_THRESHOLD:
+            product_autocomplete.load(db)
+        else:
+            product_autocomplete.refresh(db, product_ids)
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core.catalog_events import LoadTracker, on_products_changed
+from app.core.facets import Filters, ProductFacts, facet_index
+from app.db.session import SessionLocal
+from app.models.category import Category
+from app.models.manufacturer import Manufacturer
+from app.models.product import Product
+
+_FACT_COLUMNS = (
+    Product.id,
+    Product.category_id,
+    Product.manufacturer_id,
+    Product.price,
+    Product.average_rating,
+    Product.in_stock,
+)
+
+# Changes committed while the index loads
+_loads = LoadTracker()
+# Rebuilt at least this often, in case a change notification was lost
+MAX_AGE_SECONDS = 600.0
+
+class CRUDProductFacets:
+    """
+    Filtered product ids and facet counts served from app.core.facets.
+    Changes committed here are indexed right after the commit; changes
+    from other processes arrive through catalog_sync, so for up to
+    CATALOG_SYNC_SECONDS filtered listings and facet counts may disagree
+    with the database (and with sorted listings, which filter in SQL).
+    """
+
+    def search(
+        self, db: Session, *, filters: Filters, skip: int = 0, limit: int = 100
+    ) -> Tuple[int, List[int]]:
+        self.ensure_loaded(db)
+        return facet_index.search(filters, skip=skip, limit=limit)
+
+    def counts(self, db: Session, *, filters: Filters) -> Tuple[int, Dict[str, List[dict]]]:
+        self.ensure_loaded(db)
+        return facet_index.facets(filters)
+
+    def ensure_loaded(self, db: Session) -> None:
+        if facet_index.age() >= MAX_AGE_SECONDS:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        """Index the whole catalog; three SELECTs"""
+        _loads.run(
+            lambda: facet_index.load(
+                [ProductFacts(*row) for row in db.query(*_FACT_COLUMNS)], *self._labels(db)
+            ),
+            lambda product_ids: self.refresh(db, product_ids),
+        )
+
+    def refresh(self, db: Session, product_ids: Set[int]) -> None:
+        rows = [
+            ProductFacts(*row)
+            for row in db.query(*_FACT_COLUMNS).filter(Product.id.in_(product_ids))
+        ]
+        labels = self._labels(db) if facet_index.missing_labels(rows) else (None, None)
+        facet_index.update(rows, product_ids - {row.id for row in rows}, *labels)
+
+    @staticmethod
+    def _labels(db: Session) -> Tuple[Dict[int, str], Dict[int, Tuple[str, Optional[str]]]]:
+        categories = dict(db.query(Category.id, Category.name))
+        manufacturers = {
+            id: (name, country)
+            for id, name, country in db.query(Manufacturer.id, Manufacturer.name, Manufacturer.country)
+        }
+        return categories, manufacturers
+
+product_facets = CRUDProductFacets()
+
+# Past this many changed products reloading everything is cheaper
+FULL_RELOAD_THRESHOLD = 5000
+
+@on_products_changed
+def _reindex_products(product_ids: Optional[Set[int]]) -> None:
+    if _loads.record(product_ids) or not facet_index.loaded:
+        return
+    with SessionLocal() as db:
+        if product_ids is None or len(product_ids) > FULL_RELOAD_THRESHOLD:
+            product_facets.load(db)
+        else:
+            product_facets.refresh(db, product_ids)
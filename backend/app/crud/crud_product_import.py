@@ -0,0 +1,183 @@
+import csv
+import json
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.core.catalog_events import mark_products_changed
+from app.models.category import Category
+from app.models.manufacturer import Manufacturer
+from app.models.product import Product
+from app.schemas.product import ProductImportRow
+from app.db.unit_of_work import commit
+
+CHUNK_SIZE = 1000
+FORMATS = ("csv", "json", "ndjson")
+IMPORT_FIELDS = (
+    "name", "description", "price", "image_url", "category_id",
+    "manufacturer_id", "in_stock", "stock_quantity",
+)
+# Needed to insert a product; rows updating an existing SKU may omit them
+REQUIRED_FIELDS = ("name", "price")
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw product records from a CSV, JSON array or NDJSON feed"""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "ndjson":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from json.load(stream)
+
+class CRUDProductImport:
+    """
+    Bulk product upserts keyed by SKU. Records are validated and resolved
+    in chunks and each chunk is written with one multi-row
+    INSERT ... ON CONFLICT (sku) DO UPDATE. Catalog listeners and planner
+    statistics are refreshed once, after the whole feed is loaded; running
+    servers pick the import up through app.core.catalog_events.
+    """
+
+    def _lookups(self, db: Session) -> Dict[str, Tuple[Dict[str, int], set]]:
+        lookups = {}
+        for field, model in (("category", Category), ("manufacturer", Manufacturer)):
+            rows = db.query(model.id, model.name).all()
+            names = {name.strip().lower(): id_ for id_, name in rows if name}
+            lookups[field] = (names, {id_ for id_, _ in rows})
+        return lookups
+
+    def _validate(
+        self, record: Any, lookups: Dict[str, Tuple[Dict[str, int], set]]
+    ) -> Tuple[Dict[str, Any], frozenset]:
+        if not isinstance(record, dict):
+            raise ValueError(f"Expected an object, got {type(record).__name__}")
+        cleaned = {}
+        for key, value in record.items():
+            if key is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip() or None
+            cleaned[key.strip()] = value
+        row = ProductImportRow(**cleaned)
+
+        values: Dict[str, Any] = {"sku": row.sku}
+        for field in IMPORT_FIELDS:
+            if field in cleaned:
+                values[field] = getattr(row, field)
+        for field in REQUIRED_FIELDS:
+            if field in values and values[field] is None:
+                raise ValueError(f"{field} can't be empty")
+        for field, (names, ids) in lookups.items():
+            name = getattr(row, field)
+            id_ = values.get(f"{field}_id")
+            if name is not None:
+                id_ = names.get(name.lower())
+                if id_ is None:
+                    raise ValueError(f"Unknown {field} '{name}'")
+                values[f"{field}_id"] = id_
+            elif id_ is not None and id_ not in ids:
+                raise ValueError(f"Unknown {field}_id {id_}")
+        if values.get("stock_quantity") is not None:
+            values["in_stock"] = values["stock_quantity"] > 0
+        return values, frozenset(values)
+
+    def _upsert(self, db: Session, rows: List[Dict[str, Any]], fields: frozenset) -> None:
+        if db.get_bind().dialect.name == "postgresql":
+            insert = postgresql.insert
+        else:
+            insert = sqlite.insert
+        now = datetime.utcnow()
+        stmt = insert(Product).values([dict(row, created_at=now, updated_at=now) for row in rows])
+        update_fields = (fields - {"sku"}) | {"updated_at"}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["sku"],
+            set_={field: stmt.excluded[field] for field in update_fields},
+        )
+        db.execute(stmt)
+
+    def _load_chunk(
+        self,
+        db: Session,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        lookups: Dict[str, Tuple[Dict[str, int], set]],
+        errors: List[Dict[str, Any]],
+    ) -> int:
+        # Later rows win when a SKU repeats; ON CONFLICT can touch a row once
+        by_sku: Dict[str, Tuple[int, Dict[str, Any], frozenset]] = {}
+        for row_number, record in chunk:
+            try:
+                values, fields = self._validate(record, lookups)
+            except ValidationError as e:
+                errors.append(self._error(row_number, record, "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )))
+                continue
+            except ValueError as e:
+                errors.append(self._error(row_number, record, str(e)))
+                continue
+            by_sku[values["sku"]] = (row_number, values, fields)
+
+        # Rows without a name or price can only update existing products
+        partial = [sku for sku, (_, _, fields) in by_sku.items() if not fields.issuperset(REQUIRED_FIELDS)]
+        if partial:
+            existing = {sku for (sku,) in db.query(Product.sku).filter(Product.sku.in_(partial))}
+            for sku in set(partial) - existing:
+                row_number, values, fields = by_sku.pop(sku)
+                missing = ", ".join(field for field in REQUIRED_FIELDS if field not in fields)
+                errors.append(self._error(row_number, values, f"New product needs {missing}"))
+
+        groups: Dict[frozenset, List[Tuple[int, Dict[str, Any]]]] = {}
+        for row_number, values, fields in by_sku.values():
+            groups.setdefault(fields, []).append((row_number, values))
+
+        upserted = 0
+        for fields, rows in groups.items():
+            try:
+                with db.begin_nested():
+                    self._upsert(db, [values for _, values in rows], fields)
+                upserted += len(rows)
+            except DBAPIError:
+                # Retry row by row to pin the failure on the offending records
+                for row_number, values in rows:
+                    try:
+                        with db.begin_nested():
+                            self._upsert(db, [values], fields)
+                        upserted += 1
+                    except DBAPIError as e:
+                        errors.append(self._error(row_number, values, str(e.orig)))
+        return upserted
+
+    def _error(self, row_number: int, record: Any, message: str) -> Dict[str, Any]:
+        sku = record.get("sku") if isinstance(record, dict) else None
+        return {"row": row_number, "sku": str(sku) if sku is not None else None, "error": message}
+
+    def run(
+        self, db: Session, records: Iterable[Dict[str, Any]], *, chunk_size: int = CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        lookups = self._lookups(db)
+        errors: List[Dict[str, Any]] = []
+        processed = upserted = 0
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for row_number, record in enumerate(records, start=1):
+            processed += 1
+            chunk.append((row_number, record))
+            if len(chunk) >= chunk_size:
+                upserted += self._load_chunk(db, chunk, lookups, errors)
+                chunk = []
+        if chunk:
+            upserted += self._load_chunk(db, chunk, lookups, errors)
+
+        if upserted:
+            mark_products_changed(db)
+        commit(db)
+        if upserted and db.get_bind().dialect.name == "postgresql":
+            db.execute(text("ANALYZE products"))
+            commit(db)
+        return {"processed": processed, "upserted": upserted, "errors": errors}
+
+product_import = CRUDProductImport()
@@ -0,0 +1,76 @@
+from typing import List, Optional, Sequence, Set
+from sqlalchemy.orm import Session
+from app.core.catalog_events import LoadTracker, on_products_changed
+from app.core.text_search import CatalogEntry, Clause, text_index
+from app.db.session import SessionLocal
+from app.models.category import Category
+from app.models.manufacturer import Manufacturer
+from app.models.product import Product
+
+# Changes committed while the index loads
+_loads = LoadTracker()
+
+def load_catalog(db: Session, product_ids: Optional[Set[int]] = None) -> List[CatalogEntry]:
+    """Searchable catalog rows in one SELECT, without hydrating ORM objects"""
+    query = (
+        db.query(
+            Product.id,
+            Product.name,
+            Product.description,
+            Product.price,
+            Product.image_url,
+            Category.name,
+            Manufacturer.name,
+            Manufacturer.country,
+            Category.id.isnot(None),
+            Manufacturer.id.isnot(None),
+        )
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(Manufacturer, Manufacturer.id == Product.manufacturer_id)
+    )
+    if product_ids is not None:
+        query = query.filter(Product.id.in_(product_ids))
+    return [CatalogEntry._make(row) for row in query.order_by(Product.id)]
+
+class CRUDProductSearch:
+    """Chat search over the inverted index in app.core.text_search"""
+
+    def search(
+        self,
+        db: Session,
+        *,
+        clauses: Sequence[Clause] = (),
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[CatalogEntry]:
+        self.ensure_loaded(db)
+        return text_index.search(clauses, min_price=min_price, max_price=max_price)
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not text_index.loaded:
+            self.load(db)
+
+    def load(self, db: Session) -> None:
+        _loads.run(
+            lambda: text_index.load(load_catalog(db)),
+            lambda product_ids: self.refresh(db, product_ids),
+        )
+
+    def refresh(self, db: Session, product_ids: Set[int]) -> None:
+        entries = load_catalog(db, product_ids)
+        text_index.update(entries, product_ids - {entry.id for entry in entries})
+
+product_search = CRUDProductSearch()
+
+# Past this many changed products reindexing everything is cheaper
+FULL_RELOAD_THRESHOLD = 5000
+
+@on_products_changed
+def _reindex_products(product_ids: Optional[Set[int]]) -> None:
+    if _loads.record(product_ids) or not text_index.loaded:
+        return
+    with SessionLocal() as db:
+        if product_ids is None or len(product_ids) > FULL_RELOAD_THRESHOLD:
+            product_search.load(db)
+        else:
+            product_search.refresh(db, product_ids)
@@ -0,0 +1,383 @@
+import hashlib
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.catalog_events import on_products_changed
+from app.core.config import settings
+from app.core.embeddings import create_embedder
+from app.core.text_search import CatalogEntry, text_index
+from app.core.vector_index import product_vectors
+from app.crud.crud_product_search import load_catalog, product_search
+from app.db.session import SessionLocal, engine
+from app.models.product_embedding import ProductEmbedding
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC = "semantic"
+HYBRID = "hybrid"
+
+# Products taken from each ranking before they are fused
+CANDIDATES = 200
+# Keyword matches tied on terms are ordered by similarity when there are
+# at most this many of them, otherwise the nearest vectors among them lead
+SCORED_TIE_LIMIT = 2000
+# Reciprocal rank fusion: a product scores 1 / (RRF_K + rank) per ranking
+RRF_K = 60
+# Seconds before a failed or deferred batch is tried again
+_RETRY_SECONDS = 10.0
+# pg_try_advisory_lock key of the process that embeds products
+_LEASE_KEY = 0x5EED0E3B
+
+def product_text(entry: CatalogEntry) -> str:
+    """What a product's embedding is computed from"""
+    parts = (
+        entry.name, entry.description, entry.category_name,
+        entry.manufacturer_name, entry.manufacturer_country,
+    )
+    return ". ".join(part for part in parts if part)
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
+
+class CRUDProductSemantic:
+    """Semantic and hybrid product search over app.core.vector_index"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._embedder = None
+
+    @property
+    def embedder(self):
+        # Created on first use: loading a model takes a while
+        with self._lock:
+            if self._embedder is None:
+                self._embedder = create_embedder(settings.EMBEDDING_MODEL, settings.EMBEDDING_CACHE_DIR)
+            return self._embedder
+
+    def search(self, db: Session, *, text: str, limit: int = 20, mode: str = HYBRID) -> List[int]:
+        """
+        Ids of the products best matching ``text``, best first. Semantic
+        mode ranks by embedding similarity alone; hybrid mode fuses that
+        ranking with a keyword one (query words matched, then similarity).
+        Products not embedded yet only show up through their keywords.
+        """
+        embedder = self.embedder
+        vector = embedder.embed([text])[0]
+        nearest: List[int] = []
+        if product_vectors.model == embedder.name:
+            nearest = [id for id, score in product_vectors.search(vector, CANDIDATES) if score > 0]
+        if mode == SEMANTIC:
+            return nearest[:limit]
+
+        product_search.ensure_loaded(db)
+        keyword = self._keyword_ranking(text_index.term_counts(text), vector, nearest)
+
+        fused: Dict[int, float] = {}
+        for ranking in (keyword, nearest):
+            for rank, id in enumerate(ranking, 1):
+                fused[id] = fused.get(id, 0.0) + 1 / (RRF_K + rank)
+        return sorted(fused, key=lambda id: (-fused[id], id))[:limit]
+
+    def _keyword_ranking(self, counts: Dict[int, int], vector: np.ndarray, nearest: List[int]) -> List[int]:
+        """
+        The CANDIDATES products matching the most query terms. Common words
+        match much of the catalog, so only the tier of products cut off by
+        the limit is ordered, and by similarity only while it is small.
+        """
+        tiers: Dict[int, List[int]] = {}
+        for id, count in counts.items():
+            tiers.setdefault(count, []).append(id)
+        ranking: List[int] = []
+        for count in sorted(tiers, reverse=True):
+            tier = tiers[count]
+            room = CANDIDATES - len(ranking)
+            if len(tier) <= room:
+                ranking.extend(tier)
+                continue
+            if len(tier) <= SCORED_TIE_LIMIT:
+                similarity = product_vectors.scores(tier, vector)
+                tier.sort(key=lambda id: (-similarity.get(id, 0.0), id))
+                ranking.extend(tier[:room])
+            else:
+                members = set(tier)
+                leading = [id for id in nearest if id in members][:room]
+                ranking.extend(leading)
+                ranking.extend(heapq.nsmallest(room - len(leading), members.difference(leading)))
+            break
+        return ranking
+
+product_semantic = CRUDProductSemantic()
+
+class EmbeddingWorker:
+    """
+    Background thread keeping product_vectors and the stored embeddings in
+    step with the catalog. Starting it loads the stored vectors that are
+    still current and queues every other product; afterwards changed
+    products are queued by the catalog listener and processed in batches.
+    Products whose text didn't change (a price or stock update) are
+    skipped, and a vector another process already stored is loaded rather
+    than computed again.
+
+    On PostgreSQL one process at a time owns embedding (an advisory lock
+    held on a connection of its own); the others queue products until the
+    owner has stored their vectors. Batches that fail are retried after
+    _RETRY_SECONDS.
+    """
+
+    def __init__(self, batch_size: int = 256) -> None:
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: Set[int] = set()
+        self._resync = False
+        # Products to queue again once time.monotonic() reaches _retry_at
+        self._retry: Set[int] = set()
+        self._retry_at = 0.0
+        # product id -> hash of the text its vector in product_vectors was computed from
+        self._hashes: Dict[int, str] = {}
+        # Connection holding the PostgreSQL advisory lock while this process owns embedding
+        self._lease: Optional[Connection] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def enqueue(self, product_ids: Optional[Set[int]]) -> None:
+        """Queue products for embedding; None resyncs the whole catalog"""
+        with self._lock:
+            if product_ids is None:
+                self._resync = True
+            else:
+                self._pending.update(product_ids)
+        self._wake.set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+
+            def run() -> None:
+                while True:
+                    self._wake.wait(self._retry_delay())
+                    self._wake.clear()
+                    if self._stop.is_set():
+                        return
+                    self._requeue_due()
+                    try:
+                        self.run_pending()
+                    except Exception:
+                        logger.exception("Embedding products failed")
+
+            self._thread = threading.Thread(target=run, name="product-embeddings", daemon=True)
+            self._thread.start()
+        self.enqueue(None)
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join()
+        self._release()
+
+    def _defer(self, product_ids: Set[int]) -> None:
+        with self._lock:
+            if not self._retry:
+                self._retry_at = time.monotonic() + _RETRY_SECONDS
+            self._retry.update(product_ids)
+
+    def _retry_delay(self) -> Optional[float]:
+        with self._lock:
+            if not self._retry:
+                return None
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def _requeue_due(self) -> None:
+        with self._lock:
+            if self._retry and time.monotonic() >= self._retry_at:
+                self._pending.update(self._retry)
+                self._retry = set()
+
+    def run_pending(self) -> int:
+        """Process everything queued so far; returns how many products were embedded"""
+        with self._lock:
+            resync, self._resync = self._resync, False
+        embedded = 0
+        owner = self._claim()
+        with SessionLocal() as db:
+            if resync:
+                self._sync(db)
+            while not self._stop.is_set():
+                with self._lock:
+                    batch = set()
+                    while self._pending and len(batch) < self.batch_size:
+                        batch.add(self._pending.pop())
+                if not batch:
+                    break
+                try:
+                    embedded += self._embed(db, batch, owner)
+                except Exception:
+                    db.rollback()
+                    logger.exception("Embedding %d products failed, retrying in %.0f s", len(batch), _RETRY_SECONDS)
+                    self._defer(batch)
+        return embedded
+
+    def _claim(self) -> bool:
+        """Whether this process computes embeddings; always on databases without advisory locks"""
+        if engine.dialect.name != "postgresql":
+            return True
+        if self._lease is not None:
+            try:
+                self._lease.execute(select(1))
+                return True
+            except DBAPIError:
+                # The lock went with the connection
+                self._release()
+        connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            if connection.execute(select(func.pg_try_advisory_lock(_LEASE_KEY))).scalar():
+                self._lease = connection
+                logger.info("This process now embeds products")
+                return True
+        except DBAPIError:
+            logger.exception("Claiming product embedding failed")
+        connection.close()
+        return False
+
+    def _release(self) -> None:
+        lease, self._lease = self._lease, None
+        if lease is not None:
+            try:
+                lease.close()
+            except DBAPIError:
+                pass
+
+    def _sync(self, db: Session) -> None:
+        embedder = product_semantic.embedder
+        texts = {entry.id: product_text(entry) for entry in load_catalog(db)}
+        stored = (
+            db.query(ProductEmbedding.product_id, ProductEmbedding.text_hash, ProductEmbedding.vector)
+            .filter(ProductEmbedding.model == embedder.name)
+            .yield_per(1000)
+        )
+        ids, hashes, vectors = [], {}, []
+        for product_id, hash, vector in stored:
+            text = texts.get(product_id)
+            if text is not None and text_hash(text) == hash:
+                ids.append(product_id)
+                hashes[product_id] = hash
+                vectors.append(np.frombuffer(vector, dtype=np.float32))
+        product_vectors.clear()
+        self._hashes = hashes
+        if vectors:
+            product_vectors.reset(embedder.name, len(vectors[0]), capacity=len(texts))
+            # Batches keep searches from waiting on the whole graph build
+            for start in range(0, len(ids), self.batch_size):
+                product_vectors.add(ids[start:start + self.batch_size], np.vstack(vectors[start:start + self.batch_size]))
+        with self._lock:
+            self._pending.update(set(texts).difference(ids))
+        logger.info("Loaded %d stored product embeddings, %d to embed", len(ids), len(texts) - len(ids))
+
+    def _embed(self, db: Session, product_ids: Set[int], owner: bool) -> int:
+        embedder = product_semantic.embedder
+        entries = load_catalog(db, product_ids)
+        removed = product_ids - {entry.id for entry in entries}
+        if removed:
+            product_vectors.remove(removed)
+            for id in removed:
+                self._hashes.pop(id, None)
+            if owner:
+                db.query(ProductEmbedding).filter(ProductEmbedding.product_id.in_(removed)).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+
+        changed = {}
+        for entry in entries:
+            text = product_text(entry)
+            hash = text_hash(text)
+            if self._hashes.get(entry.id) != hash or entry.id not in product_vectors:
+                changed[entry.id] = (text, hash)
+        if not changed:
+            return 0
+
+        # Vectors another process (or an earlier run) already stored
+        ids, hashes, vectors = [], [], []
+        stored = (
+            db.query(ProductEmbedding.product_id, ProductEmbedding.text_hash, ProductEmbedding.vector)
+            .filter(ProductEmbedding.product_id.in_(changed), ProductEmbedding.model == embedder.name)
+        )
+        for product_id, hash, vector in stored:
+            if changed[product_id][1] == hash:
+                ids.append(product_id)
+                hashes.append(hash)
+                vectors.append(np.frombuffer(vector, dtype=np.float32))
+        found = set(ids)
+        missing = [(id, text, hash) for id, (text, hash) in changed.items() if id not in found]
+        if missing and not owner:
+            # The owning process stores them shortly
+            self._defer({id for id, _, _ in missing})
+            missing = []
+
+        embedded = embedder.embed([text for _, text, _ in missing]) if missing else None
+        if embedded is not None:
+            ids.extend(id for id, _, _ in missing)
+            hashes.extend(hash for _, _, hash in missing)
+            vectors.extend(embedded)
+        if ids:
+            # Searchable right away, whether or not storing them works
+            if product_vectors.model != embedder.name:
+                product_vectors.reset(embedder.name, len(vectors[0]))
+            product_vectors.add(ids, np.vstack(vectors))
+            self._hashes.update(zip(ids, hashes))
+        if embedded is not None:
+            try:
+                self._store(db, embedder.name, [(id, hash) for id, _, hash in missing], embedded)
+            except Exception:
+                # Still searchable; forgetting the hashes has the retry embed and store them again
+                for id, _, _ in missing:
+                    self._hashes.pop(id, None)
+                raise
+        return len(missing)
+
+    @staticmethod
+    def _store(db: Session, model: str, keys: List[Tuple[int, str]], vectors: np.ndarray) -> None:
+        if db.get_bind().dialect.name == "postgresql":
+            insert = postgresql.insert
+        else:
+            insert = sqlite.insert
+        now = datetime.utcnow()
+        stmt = insert(ProductEmbedding).values([
+            {"product_id": id, "model": model, "text_hash": hash, "vector": vector.tobytes(), "updated_at": now}
+            for (id, hash), vector in zip(keys, vectors)
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["product_id"],
+            set_={column: stmt.excluded[column] for column in ("model", "text_hash", "vector", "updated_at")},
+        )
+        db.execute(stmt)
+        db.commit()
+
+embedding_worker = EmbeddingWorker(batch_size=settings.EMBEDDING_BATCH_SIZE)
+
+@on_products_changed
+def _embed_changed_products(product_ids: Optional[Set[int]]) -> None:
+    # Until it starts the worker has nothing to keep current
+    if embedding_worker.running:
+        embedding_worker.enqueue(product_ids)
@@ -0,0 +1,173 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session
+from app.core.catalog_events import mark_promotions_changed, on_products_changed, on_promotions_changed
+from app.core.pricing import PERCENTAGE, PricedProduct, Rule, price_table
+from app.crud.base import CRUDBase
+from app.db.session import SessionLocal
+from app.db.unit_of_work import commit
+from app.models.product import Product
+from app.models.promotion import Promotion, PromotionTarget
+from app.schemas.promotion import PromotionCreate, PromotionUpdate
+
+logger = logging.getLogger(__name__)
+
+class InvalidPromotion(ValueError):
+    pass
+
+# Product column each promotion scope matches on
+SCOPE_COLUMNS = {
+    "product": Product.id,
+    "category": Product.category_id,
+    "manufacturer": Product.manufacturer_id,
+}
+_PRICED_COLUMNS = (Product.id, Product.price, Product.category_id, Product.manufacturer_id)
+# Past this many changed products a full rebuild is cheaper than an IN list
+FULL_RELOAD_THRESHOLD = 1000
+
+_CHANGED_KEY = "changed_promotion_targets"
+
+def _mark_targets_changed(db: Session, scope: str, target_ids: Iterable[int]) -> None:
+    changed: Dict[str, Set[int]] = db.info.setdefault(_CHANGED_KEY, {})
+    changed.setdefault(scope, set()).update(target_ids)
+    mark_promotions_changed(db)
+
+def _validate(values: Dict[str, Any]) -> None:
+    if values.get("discount_type") == PERCENTAGE and values.get("discount_value", 0) > 100:
+        raise InvalidPromotion("A percentage discount can't exceed 100")
+    start, end = values.get("start_date"), values.get("end_date")
+    if start is not None and end is not None and start >= end:
+        raise InvalidPromotion("end_date must be after start_date")
+
+class CRUDPromotion(CRUDBase[Promotion, PromotionCreate, PromotionUpdate]):
+    def get_multi(
+        self, db: Session, *, skip: int = 0, limit: int = 100, current_only: bool = False
+    ) -> List[Promotion]:
+        """With ``current_only`` only active promotions that haven't ended"""
+        query = db.query(self.model).order_by(Promotion.id)
+        if current_only:
+            query = query.filter(
+                Promotion.is_active.is_(True),
+                or_(Promotion.end_date.is_(None), Promotion.end_date > datetime.utcnow()),
+            )
+        return query.offset(skip).limit(limit).all()
+
+    def create(self, db: Session, *, obj_in: PromotionCreate) -> Promotion:
+        data = obj_in.dict(exclude={"target_ids"})
+        _validate(data)
+        target_ids = sorted(set(obj_in.target_ids))
+        db_obj = Promotion(**data, targets=[PromotionTarget(target_id=i) for i in target_ids])
+        db.add(db_obj)
+        _mark_targets_changed(db, db_obj.scope, target_ids)
+        commit(db)
+        db.refresh(db_obj)
+        return db_obj
+
+    def update(
+        self, db: Session, *, db_obj: Promotion, obj_in: Union[PromotionUpdate, Dict[str, Any]]
+    ) -> Promotion:
+        data = dict(obj_in) if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        target_ids = data.pop("target_ids", None)
+        current = {key: getattr(db_obj, key) for _, key in self.column_attrs}
+        _validate({**current, **data})
+
+        # Both the old and the new targets need repricing
+        _mark_targets_changed(db, db_obj.scope, db_obj.target_ids)
+        for key, value in data.items():
+            setattr(db_obj, key, value)
+        if target_ids is not None:
+            # Reuse rows for kept ids so the unique index never sees a duplicate
+            existing = {target.target_id: target for target in db_obj.targets}
+            db_obj.targets = [
+                existing.get(i) or PromotionTarget(target_id=i) for i in sorted(set(target_ids))
+            ]
+        _mark_targets_changed(db, db_obj.scope, db_obj.target_ids)
+        commit(db)
+        db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Promotion:
+        db_obj = self.get(db, id)
+        _mark_targets_changed(db, db_obj.scope, db_obj.target_ids)
+        return super().remove(db, id=id)
+
+promotion = CRUDPromotion(Promotion)
+
+def _rules(db: Session, at: datetime) -> List[Tuple[str, int, Rule]]:
+    promotions = (
+        db.query(Promotion)
+        .filter(
+            Promotion.is_active.is_(True),
+            or_(Promotion.end_date.is_(None), Promotion.end_date > at),
+        )
+        .all()
+    )
+    return [
+        (p.scope, target.target_id, Rule(p.id, p.discount_type, p.discount_value, p.start_date, p.end_date))
+        for p in promotions
+        for target in p.targets
+    ]
+
+def _targeted_products(db: Session, targets: Dict[str, Set[int]]) -> List[PricedProduct]:
+    conditions = [SCOPE_COLUMNS[scope].in_(ids) for scope, ids in targets.items() if ids]
+    if not conditions:
+        return []
+    return [PricedProduct(*row) for row in db.query(*_PRICED_COLUMNS).filter(or_(*conditions))]
+
+def load_prices(db: Session) -> None:
+    """Rebuild the whole price table from the running and upcoming promotions"""
+    at = datetime.utcnow()
+    rules = _rules(db, at)
+    targets: Dict[str, Set[int]] = {}
+    for scope, target_id, _ in rules:
+        targets.setdefault(scope, set()).add(target_id)
+    price_table.load(rules, _targeted_products(db, targets), at=at)
+
+def refresh_prices(db: Session, product_ids: Set[int]) -> None:
+    """Reprice products whose list price, category or manufacturer changed"""
+    targets = price_table.targets()
+    if not any(targets.values()):
+        price_table.update([], removed=product_ids)
+        return
+    rows = [
+        PricedProduct(*row)
+        for row in db.query(*_PRICED_COLUMNS).filter(Product.id.in_(product_ids))
+    ]
+    price_table.update(rows, removed=product_ids - {row.id for row in rows})
+
+def _load_prices() -> None:
+    with SessionLocal() as db:
+        load_prices(db)
+
+price_table.set_loader(_load_prices)
+
+@on_promotions_changed
+def _reload_prices() -> None:
+    _load_prices()
+
+@on_products_changed
+def _reprice_products(product_ids: Optional[Set[int]]) -> None:
+    if product_ids is None or len(product_ids) > FULL_RELOAD_THRESHOLD:
+        _load_prices()
+        return
+    with SessionLocal() as db:
+        refresh_prices(db, product_ids)
+
+@event.listens_for(Session, "after_commit")
+def _reprice_promotion_targets(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if not changed:
+        return
+    try:
+        with Session(bind=session.get_bind()) as db:
+            price_table.set_rules(_rules(db, datetime.utcnow()))
+            price_table.update(_targeted_products(db, changed))
+    except Exception:
+        # The promotion is saved; prices catch up on the next full rebuild
+        logger.exception("Repricing after a promotion change failed")
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_targets(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,321 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.category import Category
+from app.models.manufacturer import Manufacturer
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.report import SalesRollup
+from app.db.unit_of_work import commit
+
+DIMENSIONS = ("total", "status", "product", "category", "manufacturer")
+NAMED_DIMENSIONS = {
+    "product": Product,
+    "category": Category,
+    "manufacturer": Manufacturer,
+}
+
+RollupKey = Tuple[date, str, str]
+
+logger = logging.getLogger(__name__)
+
+# Session.info key collecting the rollup deltas of the open transaction
+_PENDING_KEY = "sales_rollup_deltas"
+
+def _as_date(value: Any) -> date:
+    # func.date() comes back as a string on SQLite
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _apply(connection: Connection, deltas: Dict[RollupKey, List[float]]) -> None:
+    if connection.dialect.name == "postgresql":
+        insert = postgresql.insert
+    else:
+        insert = sqlite.insert
+    # Rows in key order, so concurrent upserts lock shared rows in the
+    # same order and cannot deadlock
+    rows = [
+        {
+            "day": day,
+            "dimension": dimension,
+            "key": key,
+            "orders_count": orders_count,
+            "units": units,
+            "revenue": revenue,
+        }
+        for (day, dimension, key), (orders_count, units, revenue) in sorted(deltas.items())
+    ]
+    stmt = insert(SalesRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "dimension", "key"],
+        set_={
+            "orders_count": SalesRollup.orders_count + stmt.excluded.orders_count,
+            "units": SalesRollup.units + stmt.excluded.units,
+            "revenue": SalesRollup.revenue + stmt.excluded.revenue,
+        },
+    )
+    connection.execute(stmt)
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if not deltas:
+        return
+    try:
+        with session.get_bind().begin() as connection:
+            _apply(connection, deltas)
+    except Exception:
+        # The order is already committed; report.rebuild() restores the rollups
+        logger.exception("Applying %d sales rollup deltas failed", len(deltas))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+class CRUDReport:
+    """
+    Daily sales rollups kept up to date by the order CRUD. Sales figures
+    (total, product, category, manufacturer) exclude cancelled orders;
+    the status dimension counts orders by the day they were placed.
+
+    Every checkout touches the same per-day rows, so the order CRUD only
+    records deltas on the session; they are applied in a short transaction
+    of their own once the order commits, and dropped if it rolls back.
+    """
+
+    def _upsert(self, db: Session, deltas: Dict[RollupKey, List[float]]) -> None:
+        pending = db.info.setdefault(_PENDING_KEY, {})
+        for key, delta in deltas.items():
+            if not any(delta):
+                continue
+            total = pending.setdefault(key, [0, 0, 0.0])
+            for i, value in enumerate(delta):
+                total[i] += value
+
+    def _sales_deltas(
+        self, db: Session, order: Order, items: Iterable[Any], sign: int,
+        deltas: Dict[RollupKey, List[float]]
+    ) -> None:
+        day = _as_date(order.created_at or datetime.utcnow())
+
+        def add(dimension: str, key: Any, orders_count: int, units: int, revenue: float):
+            delta = deltas[(day, dimension, str(key))]
+            delta[0] += sign * orders_count
+            delta[1] += sign * units
+            delta[2] += sign * revenue
+
+        add("total", "", 1, 0, order.total_amount or 0.0)
+
+        lines: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0])
+        for item in items:
+            if item.product_id is None:
+                continue
+            lines[item.product_id][0] += item.quantity or 0
+            lines[item.product_id][1] += (item.quantity or 0) * (item.price or 0.0)
+        if not lines:
+            return
+
+        products = (
+            db.query(Product.id, Product.category_id, Product.manufacturer_id)
+            .filter(Product.id.in_(list(lines)))
+            .all()
+        )
+        groups: Dict[Tuple[str, Any], List[float]] = defaultdict(lambda: [0, 0.0])
+        for product in products:
+            units, revenue = lines[product.id]
+            add("product", product.id, 1, units, revenue)
+            for dimension, key in (
+                ("category", product.category_id),
+                ("manufacturer", product.manufacturer_id),
+            ):
+                if key is not None:
+                    groups[(dimension, key)][0] += units
+                    groups[(dimension, key)][1] += revenue
+        for (dimension, key), (units, revenue) in groups.items():
+            add(dimension, key, 1, units, revenue)
+
+    def _status_delta(
+        self, order: Order, status: Optional[str], sign: int,
+        deltas: Dict[RollupKey, List[float]]
+    ) -> None:
+        day = _as_date(order.created_at or datetime.utcnow())
+        delta = deltas[(day, "status", status or "")]
+        delta[0] += sign
+        delta[2] += sign * (order.total_amount or 0.0)
+
+    def record_order_created(self, db: Session, *, order: Order, items: Iterable[Any]) -> None:
+        deltas: Dict[RollupKey, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+        self._status_delta(order, order.status, 1, deltas)
+        if order.status != OrderStatus.CANCELLED.value:
+            self._sales_deltas(db, order, items, 1, deltas)
+        self._upsert(db, deltas)
+
+    def record_status_change(
+        self, db: Session, *, order: Order, from_status: Optional[str], to_status: str
+    ) -> None:
+        deltas: Dict[RollupKey, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+        self._status_delta(order, from_status, -1, deltas)
+        self._status_delta(order, to_status, 1, deltas)
+        if to_status == OrderStatus.CANCELLED.value:
+            self._sales_deltas(db, order, order.order_items, -1, deltas)
+        self._upsert(db, deltas)
+
+    def record_order_removed(self, db: Session, *, order: Order) -> None:
+        deltas: Dict[RollupKey, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+        self._status_delta(order, order.status, -1, deltas)
+        if order.status != OrderStatus.CANCELLED.value:
+            self._sales_deltas(db, order, order.order_items, -1, deltas)
+        self._upsert(db, deltas)
+
+    def rebuild(self, db: Session, *, start: Optional[date] = None) -> int:
+        """
+        Recompute rollups from orders/order_items, for every day from
+        ``start`` on (or everything). Returns the number of rollup rows.
+        """
+        day = func.date(Order.created_at)
+        rollups = db.query(SalesRollup)
+        if start:
+            rollups = rollups.filter(SalesRollup.day >= start)
+        rollups.delete(synchronize_session=False)
+
+        def since(query):
+            return query.filter(Order.created_at >= start) if start else query
+
+        active = Order.status != OrderStatus.CANCELLED.value
+        rows: List[Dict[str, Any]] = []
+
+        for d, key, orders_count, revenue in since(
+            db.query(day, Order.status, func.count(), func.sum(Order.total_amount))
+            .group_by(day, Order.status)
+        ):
+            rows.append(dict(day=d, dimension="status", key=key or "",
+                             orders_count=orders_count, units=0, revenue=revenue or 0.0))
+
+        for d, orders_count, revenue in since(
+            db.query(day, func.count(), func.sum(Order.total_amount))
+            .filter(active)
+            .group_by(day)
+        ):
+            rows.append(dict(day=d, dimension="total", key="",
+                             orders_count=orders_count, units=0, revenue=revenue or 0.0))
+
+        for dimension, key_column in (
+            ("product", Product.id),
+            ("category", Product.category_id),
+            ("manufacturer", Product.manufacturer_id),
+        ):
+            query = (
+                db.query(
+                    day,
+                    key_column,
+                    func.count(func.distinct(Order.id)),
+                    func.sum(OrderItem.quantity),
+                    func.sum(OrderItem.quantity * OrderItem.price),
+                )
+                .select_from(OrderItem)
+                .join(Order, OrderItem.order_id == Order.id)
+                .join(Product, OrderItem.product_id == Product.id)
+                .filter(active, key_column.isnot(None))
+                .group_by(day, key_column)
+            )
+            for d, key, orders_count, units, revenue in since(query):
+                rows.append(dict(day=d, dimension=dimension, key=str(key),
+                                 orders_count=orders_count, units=units or 0,
+                                 revenue=revenue or 0.0))
+
+        for row in rows:
+            row["day"] = _as_date(row["day"])
+        if rows:
+            db.bulk_insert_mappings(SalesRollup, rows)
+        commit(db)
+        return len(rows)
+
+    def daily(self, db: Session, *, start: date, end: date) -> List[SalesRollup]:
+        return (
+            db.query(SalesRollup)
+            .filter(
+                SalesRollup.dimension == "total",
+                SalesRollup.day >= start,
+                SalesRollup.day <= end,
+            )
+            .order_by(SalesRollup.day)
+            .all()
+        )
+
+    def summary(self, db: Session, *, start: date, end: date) -> Dict[str, Any]:
+        rows = (
+            db.query(
+                SalesRollup.dimension,
+                SalesRollup.key,
+                func.sum(SalesRollup.orders_count),
+                func.sum(SalesRollup.revenue),
+            )
+            .filter(
+                SalesRollup.dimension.in_(("total", "status")),
+                SalesRollup.day >= start,
+                SalesRollup.day <= end,
+            )
+            .group_by(SalesRollup.dimension, SalesRollup.key)
+            .all()
+        )
+        result = {
+            "start": start,
+            "end": end,
+            "orders_count": 0,
+            "revenue": 0.0,
+            "status_counts": {status.value: 0 for status in OrderStatus},
+        }
+        for dimension, key, orders_count, revenue in rows:
+            if dimension == "total":
+                result["orders_count"] = orders_count or 0
+                result["revenue"] = revenue or 0.0
+            else:
+                result["status_counts"][key] = orders_count or 0
+        return result
+
+    def top(
+        self, db: Session, *, dimension: str, start: date, end: date,
+        order_by: str = "revenue", limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        units = func.sum(SalesRollup.units)
+        revenue = func.sum(SalesRollup.revenue)
+        rows = (
+            db.query(SalesRollup.key, func.sum(SalesRollup.orders_count), units, revenue)
+            .filter(
+                SalesRollup.dimension == dimension,
+                SalesRollup.day >= start,
+                SalesRollup.day <= end,
+            )
+            .group_by(SalesRollup.key)
+            .order_by((units if order_by == "units" else revenue).desc())
+            .limit(limit)
+            .all()
+        )
+        names: Dict[str, str] = {}
+        model = NAMED_DIMENSIONS.get(dimension)
+        if model is not None and rows:
+            ids = [int(row[0]) for row in rows]
+            names = {
+                str(id_): name
+                for id_, name in db.query(model.id, model.name).filter(model.id.in_(ids))
+            }
+        return [
+            {
+                "key": key,
+                "name": names.get(key, key),
+                "orders_count": orders_count or 0,
+                "units": units_sum or 0,
+                "revenue": revenue_sum or 0.0,
+            }
+            for key, orders_count, units_sum, revenue_sum in rows
+        ]
+
+report = CRUDReport()
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
 from app.models.review import Review
 from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.db.unit_of_work import commit
 
 class CRUDReview(CRUDBase[Review, ReviewCreate, ReviewUpdate]):
     def create_with_user(
@@ -11,7 +12,7 @@ class CRUDReview(CRUDBase[Review, ReviewCreate, ReviewUpdate]):
         obj_in_data = obj_in.dict()
         db_obj = self.model(**obj_in_data, user_id=user_id)
         db.add(db_obj)
-        db.commit()
+        commit(db)
         db.refresh(db_obj)
         return db_obj
 
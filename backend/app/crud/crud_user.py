@@ -1,14 +1,25 @@
 from typing import Any, Dict, Optional, Union
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session, selectinload
 from app.core.security import get_password_hash, verify_password
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.db.unit_of_work import commit
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
+    def listing_query(self, db: Session, *, skip: int = 0, limit: int = 100) -> Query:
+        """Users by id with their addresses, readable with yield_per"""
+        return (
+            db.query(User)
+            .options(selectinload(User.addresses))
+            .order_by(User.id)
+            .offset(skip)
+            .limit(limit)
+        )
+
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         db_obj = User(
             email=obj_in.email,
@@ -17,12 +28,17 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             is_superuser=obj_in.is_superuser,
         )
         db.add(db_obj)
-        db.commit()
+        commit(db)
         db.refresh(db_obj)
         return db_obj
 
     def update(
-        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+        self,
+        db: Session,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        returning: bool = False
     ) -> User:
         if isinstance(obj_in, dict):
             update_data = obj_in
@@ -32,7 +48,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return super().update(db, db_obj=db_obj, obj_in=update_data, returning=returning)
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
@@ -1,19 +1,29 @@
+from typing import Optional
 from app.db.base import Base
 from app.db.session import engine
 from sqlalchemy.orm import Session
 from app.db.init_db import init_db
+from app.db import seed
+
+def clean_db(template: Optional[str] = None) -> None:
+    # Restoring a saved template is much faster than rebuilding
+    if template and seed.has_template(engine, template):
+        seed.restore(engine, template)
+        return
 
-def clean_db() -> None:
     # Drop all tables
     Base.metadata.drop_all(bind=engine)
-    
+
     # Recreate all tables
     Base.metadata.create_all(bind=engine)
-    
+
     # Initialize with default data
     db = Session(engine)
     init_db(db)
     db.close()
 
+    if template:
+        seed.snapshot(engine, template)
+
 if __name__ == "__main__":
-    clean_db() 
\ No newline at end of file
+    clean_db()
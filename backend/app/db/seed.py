@@ -0,0 +1,181 @@
+"""
+Bulk loading of large fixture sets. Rows go in with COPY on Postgres and
+batched executemany elsewhere, with the model's secondary indexes dropped
+for the load and rebuilt once at the end. A loaded database can be saved
+as a template and restored in a fraction of the time it takes to seed.
+"""
+import csv
+import io
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping
+
+from sqlalchemy import Index, Table, create_engine, insert, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.base import Base
+
+BATCH_SIZE = 5000
+_NULL = r"\N"
+
+Fixtures = Mapping[str, Iterable[Dict[str, Any]]]
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _column_defaults(table: Table, provided: Iterable[str]) -> Dict[str, Any]:
+    # COPY bypasses SQLAlchemy, so Python-side column defaults are evaluated
+    # here, once per load
+    defaults = {}
+    for column in table.columns:
+        default = column.default
+        if column.key in provided or default is None or column.primary_key:
+            continue
+        if default.is_scalar:
+            defaults[column.key] = default.arg
+        elif default.is_callable:
+            defaults[column.key] = default.arg(None)
+    return defaults
+
+def _copy(conn: Connection, table: Table, rows: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    columns: List[str] = []
+    defaults: Dict[str, Any] = {}
+    cursor = conn.connection.cursor()
+    for chunk in _chunks(rows, BATCH_SIZE):
+        if not columns:
+            defaults = _column_defaults(table, chunk[0])
+            columns = list(chunk[0]) + list(defaults)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in chunk:
+            values = {**defaults, **row}
+            writer.writerow([_NULL if values[c] is None else values[c] for c in columns])
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')",
+            buffer,
+        )
+        count += len(chunk)
+    return count
+
+def _executemany(conn: Connection, table: Table, rows: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    for chunk in _chunks(rows, BATCH_SIZE):
+        conn.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+def _reset_sequence(conn: Connection, table: Table) -> None:
+    pk = list(table.primary_key.columns)
+    if len(pk) != 1 or not pk[0].autoincrement:
+        return
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table.name}', '{pk[0].name}'), "
+        f"COALESCE(MAX({pk[0].name}), 0) + 1, false) FROM {table.name}"
+    ))
+
+@contextmanager
+def deferred_indexes(conn: Connection, tables: Iterable[Table]) -> Iterator[None]:
+    """Drop the tables' secondary indexes for the block and rebuild them after"""
+    dropped: List[Index] = []
+    for table in tables:
+        for index in table.indexes:
+            index.drop(bind=conn, checkfirst=True)
+            dropped.append(index)
+    yield
+    for index in dropped:
+        index.create(bind=conn)
+
+def load_fixtures(engine: Engine, fixtures: Fixtures) -> Dict[str, int]:
+    """
+    Insert ``fixtures`` (table name -> row dicts) in foreign key order and
+    return the row count per table. Rows should carry explicit primary
+    keys when later tables refer to them; Postgres sequences are moved
+    past the loaded ids afterwards. Tables must exist.
+    """
+    tables = [t for t in Base.metadata.sorted_tables if t.name in fixtures]
+    postgres = engine.dialect.name == "postgresql"
+    counts = {}
+    with engine.begin() as conn:
+        with deferred_indexes(conn, tables):
+            for table in tables:
+                load = _copy if postgres else _executemany
+                counts[table.name] = load(conn, table, fixtures[table.name])
+        if postgres:
+            for table in tables:
+                _reset_sequence(conn, table)
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    return counts
+
+def _sqlite_path(engine: Engine) -> str:
+    path = engine.url.database
+    if not path or path == ":memory:":
+        raise ValueError("Templates need a file-backed SQLite database")
+    return path
+
+def _snapshot_name(engine: Engine, name: str) -> str:
+    if engine.dialect.name == "sqlite":
+        return f"{_sqlite_path(engine)}.{name}.template"
+    return f"{engine.url.database}_{name}_template"
+
+def _maintenance(engine: Engine) -> Engine:
+    return create_engine(engine.url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+
+def _clone_postgres(engine: Engine, source: str, target: str) -> None:
+    admin = _maintenance(engine)
+    try:
+        with admin.connect() as conn:
+            # CREATE DATABASE ... TEMPLATE needs the source to be idle
+            conn.execute(
+                text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                     "WHERE datname IN (:source, :target) AND pid <> pg_backend_pid()"),
+                {"source": source, "target": target},
+            )
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{target}"'))
+            conn.execute(text(f'CREATE DATABASE "{target}" TEMPLATE "{source}"'))
+    finally:
+        admin.dispose()
+
+def _clone_sqlite(source: str, target: str) -> None:
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+def has_template(engine: Engine, name: str) -> bool:
+    if engine.dialect.name == "sqlite":
+        return os.path.exists(_snapshot_name(engine, name))
+    admin = _maintenance(engine)
+    try:
+        with admin.connect() as conn:
+            return bool(conn.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"),
+                {"name": _snapshot_name(engine, name)},
+            ).scalar())
+    finally:
+        admin.dispose()
+
+def snapshot(engine: Engine, name: str) -> None:
+    """Save the current database as template ``name``"""
+    engine.dispose()
+    if engine.dialect.name == "sqlite":
+        _clone_sqlite(_sqlite_path(engine), _snapshot_name(engine, name))
+    else:
+        _clone_postgres(engine, engine.url.database, _snapshot_name(engine, name))
+
+def restore(engine: Engine, name: str) -> None:
+    """Replace the database with template ``name``, dropping open connections"""
+    if not has_template(engine, name):
+        raise LookupError(f"No template named {name!r}")
+    engine.dispose()
+    if engine.dialect.name == "sqlite":
+        _clone_sqlite(_snapshot_name(engine, name), _sqlite_path(engine))
+    else:
+        _clone_postgres(engine, _snapshot_name(engine, name), engine.url.database)
@@ -0,0 +1,14 @@
+from sqlalchemy.orm import Session
+
+# Session.info flag set by deps.get_uow_db for the duration of a request
+UNIT_OF_WORK_KEY = "unit_of_work"
+
+def commit(db: Session) -> None:
+    """
+    Commit the session, or only flush it when it belongs to a request-scoped
+    unit of work that commits once at the end of the request.
+    """
+    if db.info.get(UNIT_OF_WORK_KEY):
+        db.flush()
+    else:
+        db.commit()
@@ -1,6 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app.core.catalog_events import catalog_sync
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware, metrics
+from app.core.logs import configure_logging, shutdown_logging
+from app.core.query_log import slow_query_log
+from app.core.profiling import ProfilingMiddleware
+from app.core.response_cache import ResponseCacheMiddleware, response_cache
+from app.crud import product_autocomplete
+from app.crud.crud_product_semantic import embedding_worker
 from app.api.api_v1.api import api_router
 from .routers import chat
 
@@ -9,6 +19,22 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# Public catalog reads served from app.core.response_cache
+CACHED_PATHS = [
+    "/products/", "/products/facets", r"/products/\d+",
+    "/categories/", r"/categories/\d+", "/manufacturers/",
+]
+
+# Added first so it sits inside CORS, which adds its headers per request
+if settings.RESPONSE_CACHE_ENABLED:
+    response_cache.max_entries = settings.RESPONSE_CACHE_SIZE
+    response_cache.ttl_seconds = settings.RESPONSE_CACHE_SECONDS
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        paths=[settings.API_V1_STR + path for path in CACHED_PATHS],
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    )
+
 # Set up CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -16,12 +42,64 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"] + (
+        ["X-DB-Queries", "X-DB-Time-Ms", "X-Response-Time-Ms"] if settings.DEBUG else []
+    ),
 )
+app.add_middleware(InstrumentationMiddleware, debug=settings.DEBUG)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        latency_ms=settings.PROFILING_LATENCY_MS,
+        header=settings.PROFILING_HEADER,
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+        buffer_size=settings.PROFILING_BUFFER_SIZE,
+    )
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 app.include_router(chat.router, prefix=f"{settings.API_V1_STR}/chat")
 
+@app.on_event("startup")
+def start_logging():
+    configure_logging(settings.LOG_LEVEL)
+    slow_query_log.threshold_ms = settings.SLOW_QUERY_MS
+    slow_query_log.top_n = settings.SLOW_QUERY_TOP_N
+    slow_query_log.start(settings.SLOW_QUERY_REPORT_SECONDS)
+
+@app.on_event("startup")
+def start_catalog_sync():
+    # Before anything is loaded, so no change made meanwhile is missed
+    catalog_sync.start(settings.CATALOG_SYNC_SECONDS)
+
+@app.on_event("startup")
+def load_autocomplete():
+    product_autocomplete.preload()
+
+@app.on_event("startup")
+def start_embedding_worker():
+    if settings.SEMANTIC_SEARCH_ENABLED:
+        embedding_worker.start()
+
+@app.on_event("shutdown")
+def stop_embedding_worker():
+    embedding_worker.stop()
+
+@app.on_event("shutdown")
+def stop_catalog_sync():
+    catalog_sync.stop()
+
+@app.on_event("shutdown")
+def stop_logging():
+    slow_query_log.stop()
+    shutdown_logging()
+
 @app.get("/")
 async def root():
-    return {"message": "Welcome to the API"} 
\ No newline at end of file
+    return {"message": "Welcome to the API"}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
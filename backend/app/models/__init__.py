@@ -3,6 +3,10 @@ from app.models.category import Category
 from app.models.manufacturer import Manufacturer
 from app.models.cart import CartItem
 from app.models.review import Review
-from app.models.order import Order, OrderItem
+from app.models.order import Order, OrderItem, OrderStatusHistory
 from app.models.user import User, UserAddress
-from app.models.order_comment import OrderComment 
\ No newline at end of file
+from app.models.order_comment import OrderComment 
+from app.models.report import SalesRollup
+from app.models.promotion import Promotion, PromotionTarget
+from app.models.product_embedding import ProductEmbedding
+from app.models.catalog_change import CatalogChange
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, DateTime, Integer, String
+from app.db.base import Base
+
+class CatalogChange(Base):
+    """
+    One committed change to products or promotions, written in the same
+    transaction by app.core.catalog_events so other processes can refresh
+    their in-memory caches. ``product_ids`` is NULL when the whole catalog
+    changed; ``source`` identifies the process that made the change.
+    """
+    __tablename__ = "catalog_changes"
+    # Never reuse ids: readers resume after the highest one they saw
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    product_ids = Column(JSON, nullable=True)
+    source = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -7,7 +7,7 @@ class OrderComment(Base):
     __tablename__ = "order_comments"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     comment = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
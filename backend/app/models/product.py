@@ -1,21 +1,36 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, func, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, func, Boolean, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base import Base
+from app.core.pricing import price_table
+from app.db.unit_of_work import commit
 from app.models.review import Review
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination for the sorted listings (crud_product.SORTS)
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_category_id_price_id", "category_id", "price", "id"),
+        Index("ix_products_average_rating_id", "average_rating", "id"),
+        Index("ix_products_category_id_average_rating_id", "category_id", "average_rating", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_name_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
+    # Supplier article number, the natural key for bulk imports
+    sku = Column(String, unique=True, index=True, nullable=True)
     description = Column(Text)
     price = Column(Float)
     image_url = Column(String)
-    category_id = Column(Integer, ForeignKey("categories.id"))
-    manufacturer_id = Column(Integer, ForeignKey("manufacturers.id"))
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
+    manufacturer_id = Column(Integer, ForeignKey("manufacturers.id"), index=True)
     average_rating = Column(Float, default=0.0)
     in_stock = Column(Boolean, default=True)
+    # NULL means the product's inventory is not tracked
+    stock_quantity = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -25,25 +40,40 @@ class Product(Base):
     order_items = relationship("OrderItem", back_populates="product")
     cart_items = relationship("CartItem", back_populates="product", cascade="all, delete-orphan")
 
+    @property
+    def effective_price(self):
+        """List price after the best running promotion"""
+        return price_table.price(self.id, self.price)
+
     def update_average_rating(self, db):
         """Update the average rating based on reviews"""
         avg = db.query(func.avg(Review.rating)).filter(Review.product_id == self.id).scalar()
         self.average_rating = avg if avg is not None else 0.0
-        db.commit()
+        commit(db)
 
     def dict(self):
         return {
             "id": self.id,
             "name": self.name,
+            "sku": self.sku,
             "description": self.description,
             "price": self.price,
+            "effective_price": self.effective_price,
             "image_url": self.image_url,
             "category_id": self.category_id,
             "manufacturer_id": self.manufacturer_id,
             "average_rating": self.average_rating,
             "in_stock": self.in_stock,
+            "stock_quantity": self.stock_quantity,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "category": self.category.dict() if self.category else None,
             "manufacturer": self.manufacturer.dict() if self.manufacturer else None
-        } 
\ No newline at end of file
+        } 
+
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def derive_in_stock(mapper, connection, target):
+    """Keep in_stock derived from the tracked quantity"""
+    if target.stock_quantity is not None:
+        target.in_stock = target.stock_quantity > 0
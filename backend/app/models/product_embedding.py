@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String
+from app.db.base import Base
+
+class ProductEmbedding(Base):
+    """
+    Embedding vector of a product's text as float32 bytes, kept so a
+    restart doesn't embed the catalog again. ``model`` names the embedder
+    and ``text_hash`` the text it was computed from; a mismatch on either
+    means the vector is stale.
+    """
+    __tablename__ = "product_embeddings"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String, nullable=False)
+    text_hash = Column(String, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, Boolean, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.db.base import Base
+from app.core.pricing import PERCENTAGE
+
+class Promotion(Base):
+    """
+    A percentage or fixed discount on the products, categories or
+    manufacturers listed in ``targets``, running from ``start_date`` until
+    ``end_date`` (open-ended when NULL).
+    """
+    __tablename__ = "promotions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    description = Column(Text)
+    discount_type = Column(String, nullable=False, default=PERCENTAGE)
+    discount_value = Column(Float, nullable=False)
+    scope = Column(String, nullable=False, default="product")
+    start_date = Column(DateTime, nullable=True)
+    end_date = Column(DateTime, nullable=True, index=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    targets = relationship(
+        "PromotionTarget", back_populates="promotion", cascade="all, delete-orphan", lazy="selectin"
+    )
+
+    @property
+    def target_ids(self):
+        return [target.target_id for target in self.targets]
+
+    @property
+    def product_ids(self):
+        return self.target_ids if self.scope == "product" else []
+
+    @property
+    def discount_percentage(self):
+        return self.discount_value if self.discount_type == PERCENTAGE else None
+
+class PromotionTarget(Base):
+    __tablename__ = "promotion_targets"
+    __table_args__ = (
+        Index("ix_promotion_targets_promotion_id_target_id", "promotion_id", "target_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    promotion_id = Column(Integer, ForeignKey("promotions.id", ondelete="CASCADE"), nullable=False)
+    # A product, category or manufacturer id depending on the promotion's scope
+    target_id = Column(Integer, nullable=False)
+
+    promotion = relationship("Promotion", back_populates="targets")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, Date, UniqueConstraint
+from app.db.base import Base
+
+class SalesRollup(Base):
+    """
+    Pre-aggregated daily sales. ``dimension`` is one of total, status,
+    product, category or manufacturer and ``key`` holds the status name
+    or the related row id ("" for total).
+    """
+    __tablename__ = "sales_rollups"
+    __table_args__ = (
+        UniqueConstraint("day", "dimension", "key", name="uq_sales_rollups_day_dimension_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    dimension = Column(String, nullable=False)
+    key = Column(String, nullable=False, default="")
+    orders_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List
 from ..db.session import get_db
 from sqlalchemy.orm import Session
-from ..models.product import Product
+from ..core.text_search import Clause
+from ..crud import product_search
 import logging
 import re
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["chat"])
@@ -134,97 +133,62 @@ def extract_search_criteria(text: str) -> dict:
     
     return criteria
 
-def filter_products(products: List[Product], criteria: dict) -> List[dict]:
-    filtered = []
-    for product in products:
-        matches = True
-        
-        # Price filtering
-        if criteria['max_price'] and product.price > criteria['max_price']:
-            matches = False
-        if criteria['min_price'] and product.price < criteria['min_price']:
-            matches = False
-        
-        # Country filtering
-        if criteria['country'] and product.manufacturer:
-            country_match = False
-            for variation in [criteria['country'], criteria['country'].capitalize()]:
-                if variation in product.manufacturer.country.lower():
-                    country_match = True
-                    break
-            if not country_match:
-                matches = False
-        
-        # Category filtering
-        if criteria['category'] and product.category:
-            category_match = False
-            for variation in [criteria['category'], criteria['category'].capitalize()]:
-                if variation in product.category.name.lower():
-                    category_match = True
-                    break
-            if not category_match:
-                matches = False
-        
-        # Product type filtering
-        if criteria['product_type'] and product.name:
-            product_match = False
-            if criteria['exact_match']:
-                # Точное совпадение для конкретного продукта
-                if criteria['product_type'] in product.name.lower():
-                    product_match = True
-            else:
-                # Более гибкое совпадение
-                for variation in [criteria['product_type'], criteria['product_type'].capitalize()]:
-                    if variation in product.name.lower() or variation in product.description.lower():
-                        product_match = True
-                        break
-            if not product_match:
-                matches = False
-        
-        # Manufacturer filtering
-        if criteria['manufacturer'] and product.manufacturer:
-            manufacturer_match = False
-            for variation in [criteria['manufacturer'], criteria['manufacturer'].capitalize()]:
-                if variation in product.manufacturer.name.lower():
-                    manufacturer_match = True
-                    break
-            if not manufacturer_match:
-                matches = False
-        
-        if matches:
-            filtered.append({
-                "id": product.id,
-                "name": product.name,
-                "description": product.description,
-                "price": product.price,
-                "image_url": product.image_url,
-                "manufacturer": {
-                    "name": product.manufacturer.name if product.manufacturer else None,
-                    "country": product.manufacturer.country if product.manufacturer else None
-                } if product.manufacturer else None,
-                "category": {
-                    "name": product.category.name if product.category else None
-                } if product.category else None
-            })
-    
-    return filtered
+def search_clauses(criteria: dict) -> List[Clause]:
+    """
+    Text conditions of the criteria. Like before, a product without a
+    manufacturer, category or name isn't filtered out by the corresponding
+    criterion.
+    """
+    clauses = []
+    if criteria['country']:
+        clauses.append(Clause(("country",), criteria['country'], lenient=True))
+    if criteria['category']:
+        clauses.append(Clause(("category",), criteria['category'], lenient=True))
+    if criteria['product_type']:
+        # Точное совпадение ищем только в названии
+        fields = ("name",) if criteria['exact_match'] else ("name", "description")
+        clauses.append(Clause(fields, criteria['product_type'], lenient=True))
+    if criteria['manufacturer']:
+        clauses.append(Clause(("manufacturer",), criteria['manufacturer'], lenient=True))
+    return clauses
+
+def filter_products(db: Session, criteria: dict) -> List[dict]:
+    products = product_search.search(
+        db,
+        clauses=search_clauses(criteria),
+        min_price=criteria['min_price'] or None,
+        max_price=criteria['max_price'] or None,
+    )
+    return [
+        {
+            "id": product.id,
+            "name": product.name,
+            "description": product.description,
+            "price": product.price,
+            "image_url": product.image_url,
+            "manufacturer": {
+                "name": product.manufacturer_name,
+                "country": product.manufacturer_country
+            } if product.has_manufacturer else None,
+            "category": {
+                "name": product.category_name
+            } if product.has_category else None
+        }
+        for product in products
+    ]
 
 @router.post("/search", response_model=ChatResponse)
 async def process_chat_request(request: ChatRequest, db: Session = Depends(get_db)):
     try:
-        logger.info(f"Received request with prompt: {request.prompt}")
+        logger.debug("Chat search prompt (%d chars)", len(request.prompt))
 
         # Extract search criteria from the prompt
         criteria = extract_search_criteria(request.prompt)
-        logger.info(f"Extracted search criteria: {criteria}")
+        logger.debug("Extracted search criteria: %s", criteria)
 
-        # Query products based on the criteria
-        products = db.query(Product).all()
-        logger.info(f"Found {len(products)} total products in database")
-        
-        # Filter products based on the criteria
-        filtered_products = filter_products(products, criteria)
-        logger.info(f"Filtered {len(filtered_products)} products")
+        # Look the criteria up in the catalog's text index
+        filtered_products = filter_products(db, criteria)
+        logger.debug("Filtered down to %d products", len(filtered_products))
 
         # Generate response based on the results
         if not filtered_products:
@@ -238,5 +202,5 @@ async def process_chat_request(request: ChatRequest, db: Session = Depends(get_d
         )
 
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        logger.exception("Chat search failed")
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
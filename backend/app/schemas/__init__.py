@@ -1,8 +1,16 @@
 from app.schemas.token import Token, TokenPayload
 from app.schemas.user import User, UserCreate, UserUpdate, UserInDB
-from app.schemas.product import Product, ProductCreate, ProductUpdate, ProductInDB
+from app.schemas.product import (
+    Product, ProductCreate, ProductUpdate, ProductInDB, ProductImportRow, ProductImportResult,
+    ProductBulkUpdateItem, ProductBulkUpdateResult, ProductListItem, FacetValue, ProductFacets,
+    ProductSuggestion
+)
 from app.schemas.category import Category, CategoryCreate, CategoryUpdate, CategoryInDB
 from app.schemas.review import Review, ReviewCreate, ReviewUpdate, ReviewInDB
-from app.schemas.order import Order, OrderCreate, OrderUpdate, OrderInDB
+from app.schemas.order import (
+    Order, OrderCreate, OrderUpdate, OrderInDB, OrderStatusUpdate, OrderStatusHistory
+)
 from app.schemas.cart import CartItem, CartItemCreate, CartItemUpdate, CartItemList
-from .order_comment import OrderComment, OrderCommentCreate, OrderCommentUpdate, OrderCommentInDBBase 
\ No newline at end of file
+from .order_comment import OrderComment, OrderCommentCreate, OrderCommentUpdate, OrderCommentInDBBase 
+from app.schemas.report import DailySales, SalesSummary, TopSalesEntry, RebuildResult
+from app.schemas.promotion import Promotion, PromotionCreate, PromotionUpdate
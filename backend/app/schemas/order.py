@@ -71,4 +71,18 @@ class Order(BaseModel):
         return status_map.get(self.status, self.status)
 
 class OrderInDB(OrderInDBBase):
-    pass 
\ No newline at end of file
+    pass
+
+class OrderStatusUpdate(BaseModel):
+    status: str
+
+class OrderStatusHistory(BaseModel):
+    id: int
+    order_id: int
+    from_status: Optional[str] = None
+    to_status: str
+    changed_by_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True 
\ No newline at end of file
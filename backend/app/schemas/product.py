@@ -1,9 +1,12 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, StrictBool
 from datetime import datetime
+from .category import Category
+from .manufacturer import Manufacturer
 
 class ProductBase(BaseModel):
     name: str
+    sku: Optional[str] = None
     description: Optional[str] = None
     price: float
     image_url: Optional[str] = None
@@ -11,6 +14,7 @@ class ProductBase(BaseModel):
     manufacturer_id: Optional[int] = None
     average_rating: Optional[float] = 0.0
     in_stock: Optional[bool] = True
+    stock_quantity: Optional[int] = None
 
 class ProductCreate(ProductBase):
     pass
@@ -23,6 +27,46 @@ class ProductUpdate(ProductBase):
     average_rating: Optional[float] = None
     in_stock: Optional[bool] = None
 
+class ProductBulkUpdateItem(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+    category_id: Optional[int] = None
+    manufacturer_id: Optional[int] = None
+    in_stock: Optional[bool] = None
+    stock_quantity: Optional[int] = None
+
+class ProductBulkUpdateResult(BaseModel):
+    updated: int
+    missing: List[int]
+
+class ProductImportRow(BaseModel):
+    sku: str
+    # Required for new SKUs only; updates may leave them out
+    name: Optional[str] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    category_id: Optional[int] = None
+    manufacturer_id: Optional[int] = None
+    # Names are resolved to ids by the importer
+    category: Optional[str] = None
+    manufacturer: Optional[str] = None
+    in_stock: Optional[bool] = None
+    stock_quantity: Optional[int] = None
+
+class ProductImportError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    error: str
+
+class ProductImportResult(BaseModel):
+    processed: int
+    upserted: int
+    errors: List[ProductImportError]
+
 class ProductInDBBase(ProductBase):
     id: int
     created_at: datetime
@@ -32,7 +76,47 @@ class ProductInDBBase(ProductBase):
         orm_mode = True
 
 class Product(ProductInDBBase):
-    pass
+    effective_price: Optional[float] = None
 
 class ProductInDB(ProductInDBBase):
-    pass 
\ No newline at end of file
+    pass
+
+class ProductListItem(BaseModel):
+    """
+    Listing entry with optional related objects. Only the requested
+    fields are set, and responses leave out the unset ones.
+    """
+    id: int
+    name: Optional[str] = None
+    sku: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    effective_price: Optional[float] = None
+    image_url: Optional[str] = None
+    category_id: Optional[int] = None
+    manufacturer_id: Optional[int] = None
+    average_rating: Optional[float] = None
+    in_stock: Optional[bool] = None
+    stock_quantity: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    category: Optional[Category] = None
+    manufacturer: Optional[Manufacturer] = None
+
+class FacetValue(BaseModel):
+    value: Union[StrictBool, int, str]
+    label: Optional[str] = None
+    # Bounds of price buckets and rating thresholds
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int
+
+class ProductFacets(BaseModel):
+    total: int
+    facets: Dict[str, List[FacetValue]]
+
+class ProductSuggestion(BaseModel):
+    # product, category or manufacturer
+    kind: str
+    id: int
+    name: str
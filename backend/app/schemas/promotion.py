@@ -0,0 +1,40 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+DiscountType = Literal["percentage", "fixed"]
+Scope = Literal["product", "category", "manufacturer"]
+
+class PromotionBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    discount_type: DiscountType = "percentage"
+    discount_value: float = Field(..., gt=0)
+    scope: Scope = "product"
+    # Product, category or manufacturer ids depending on scope
+    target_ids: List[int] = []
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    is_active: bool = True
+
+class PromotionCreate(PromotionBase):
+    pass
+
+class PromotionUpdate(PromotionBase):
+    name: Optional[str] = None
+    discount_type: Optional[DiscountType] = None
+    discount_value: Optional[float] = Field(None, gt=0)
+    scope: Optional[Scope] = None
+    target_ids: Optional[List[int]] = None
+    is_active: Optional[bool] = None
+
+class Promotion(PromotionBase):
+    id: int
+    # Kept for the storefront client
+    discount_percentage: Optional[float] = None
+    product_ids: List[int] = []
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,28 @@
+from typing import Dict, List
+from pydantic import BaseModel
+from datetime import date
+
+class DailySales(BaseModel):
+    day: date
+    orders_count: int
+    revenue: float
+
+    class Config:
+        orm_mode = True
+
+class SalesSummary(BaseModel):
+    start: date
+    end: date
+    orders_count: int
+    revenue: float
+    status_counts: Dict[str, int]
+
+class TopSalesEntry(BaseModel):
+    key: str
+    name: str
+    orders_count: int
+    units: int
+    revenue: float
+
+class RebuildResult(BaseModel):
+    rows: int
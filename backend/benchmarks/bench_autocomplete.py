@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for product name autocomplete (app.core.autocomplete).
+
+Loads the index from a synthetic catalog of each size, then types the
+queries below one keystroke at a time and times every suggestion lookup.
+Reports the index load time and per-keystroke latency percentiles, for
+correctly typed queries and for queries with typos.
+
+    cd backend && python -m benchmarks.bench_autocomplete --scales 0.1,1
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.autocomplete import autocomplete_index
+from app.crud.crud_product_autocomplete import product_autocomplete
+from app.db import seed as seeding
+from app.db.base import Base
+from benchmarks.dataset import fixtures
+
+QUERIES = {
+    "exact": ["томат черри", "агрофирма 12", "клубника сахарная", "петрушка", "роза королевский 5"],
+    "typos": ["тамат черри", "агрофима 12", "клубнеика", "петршука", "тюльпн золотй"],
+}
+TABLES = ("categories", "manufacturers", "products", "users", "orders", "order_items")
+
+def load(scale: float) -> float:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    rows = fixtures(scale)
+    seeding.load_fixtures(engine, {table: rows[table] for table in TABLES})
+    with sessionmaker(bind=engine)() as db:
+        started = time.perf_counter()
+        product_autocomplete.load(db)
+        return time.perf_counter() - started
+
+def keystrokes(queries: List[str], iterations: int) -> List[float]:
+    timings = []
+    for query in queries:
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                autocomplete_index.suggest(query[:end])
+            timings.append((time.perf_counter() - started) / iterations * 1000)
+    return sorted(timings)
+
+def percentile(timings: List[float], fraction: float) -> float:
+    return round(timings[min(len(timings) - 1, int(len(timings) * fraction))], 3)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="0.1,1", help="comma separated catalog scales")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for scale in (float(value) for value in args.scales.split(",")):
+        load_seconds = load(scale)
+        for kind, queries in QUERIES.items():
+            timings = keystrokes(queries, args.iterations)
+            results.append({
+                "names": len(autocomplete_index),
+                "load_ms": round(load_seconds * 1000, 1),
+                "queries": kind,
+                "keystrokes": len(timings),
+                "p50_ms": percentile(timings, 0.5),
+                "p95_ms": percentile(timings, 0.95),
+                "max_ms": round(timings[-1], 3),
+            })
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Micro-benchmark for chat search: the previous linear scan versus the
+inverted index in app.core.text_search.
+
+For each catalog size every prompt is turned into criteria and answered
+both by substring tests over every catalog entry (what routers.chat did
+before) and by text_index posting-list intersections. Reports the time
+per query and the number of matches: the scan costs the same whatever
+matches, the index costs about the same per match whatever the catalog
+size, so prompts that match little stay fast as the catalog grows.
+Stemming lets the index match other word forms ("розы" finds "Роза"),
+so match counts can differ.
+
+    cd backend && python -m benchmarks.bench_chat_search --scales 0.01,0.1,0.5
+"""
+import argparse
+import json
+import time
+from typing import Callable, List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.text_search import CatalogEntry, TextIndex
+from app.crud.crud_product_search import load_catalog
+from app.db import seed as seeding
+from app.db.base import Base
+from app.routers.chat import extract_search_criteria, search_clauses
+from benchmarks.dataset import fixtures
+
+PROMPTS = [
+    "лилии семко",
+    "только огурец гавриш",
+    "немецкие розы до 20 руб",
+    "российские томаты от 90 руб",
+    "цветы от 20 руб",
+    "овощи",
+]
+
+def _contains(value, text: str) -> bool:
+    return text in value.lower() or text.capitalize() in value.lower()
+
+def linear_search(catalog: List[CatalogEntry], criteria: dict) -> List[CatalogEntry]:
+    """The previous filter_products, without building the response dicts"""
+    matched = []
+    for product in catalog:
+        if criteria['max_price'] and product.price > criteria['max_price']:
+            continue
+        if criteria['min_price'] and product.price < criteria['min_price']:
+            continue
+        if criteria['country'] and product.has_manufacturer:
+            if not _contains(product.manufacturer_country, criteria['country']):
+                continue
+        if criteria['category'] and product.has_category:
+            if not _contains(product.category_name, criteria['category']):
+                continue
+        if criteria['product_type'] and product.name:
+            if criteria['exact_match']:
+                if criteria['product_type'] not in product.name.lower():
+                    continue
+            elif not (
+                _contains(product.name, criteria['product_type'])
+                or _contains(product.description, criteria['product_type'])
+            ):
+                continue
+        if criteria['manufacturer'] and product.has_manufacturer:
+            if not _contains(product.manufacturer_name, criteria['manufacturer']):
+                continue
+        matched.append(product)
+    return matched
+
+def load(scale: float) -> List[CatalogEntry]:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    tables = fixtures(scale)
+    seeding.load_fixtures(engine, {name: tables[name] for name in ("categories", "manufacturers", "products")})
+    with sessionmaker(bind=engine)() as db:
+        return load_catalog(db)
+
+def timed(search: Callable[[dict], list], criteria: dict, iterations: int) -> Tuple[float, int]:
+    """(milliseconds per query, matches)"""
+    matches = len(search(criteria))
+    started = time.perf_counter()
+    for _ in range(iterations):
+        search(criteria)
+    return round((time.perf_counter() - started) / iterations * 1000, 3), matches
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="0.01,0.1,0.5", help="comma separated catalog scales")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for scale in (float(value) for value in args.scales.split(",")):
+        catalog = load(scale)
+        index = TextIndex()
+        started = time.perf_counter()
+        index.load(catalog)
+        load_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        def indexed(criteria: dict) -> list:
+            return index.search(
+                search_clauses(criteria),
+                min_price=criteria['min_price'] or None,
+                max_price=criteria['max_price'] or None,
+            )
+
+        for prompt in PROMPTS:
+            criteria = extract_search_criteria(prompt)
+            scan_ms, scan_matches = timed(lambda c: linear_search(catalog, c), criteria, args.iterations)
+            index_ms, index_matches = timed(indexed, criteria, args.iterations)
+            results.append({
+                "products": len(catalog),
+                "index_load_ms": load_ms,
+                "prompt": prompt,
+                "linear_scan_ms": scan_ms,
+                "linear_scan_matches": scan_matches,
+                "inverted_index_ms": index_ms,
+                "inverted_index_matches": index_matches,
+            })
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
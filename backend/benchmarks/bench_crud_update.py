@@ -0,0 +1,88 @@
+"""
+Micro-benchmark for CRUDBase.update.
+
+Compares the previous implementation (jsonable_encoder over the whole ORM
+object, commit, refresh) with the column-attribute path and the
+UPDATE ... RETURNING path on a user with loaded addresses.
+
+    cd backend && python -m benchmarks.bench_crud_update --iterations 2000
+"""
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.crud.crud_user import user as crud_user
+from app.db.base import Base
+
+def legacy_update(db, *, db_obj, obj_in):
+    obj_data = jsonable_encoder(db_obj)
+    for field in obj_data:
+        if field in obj_in:
+            setattr(db_obj, field, obj_in[field])
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+def setup(addresses: int):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*args):
+        statements["count"] += 1
+
+    db = sessionmaker(bind=engine, autoflush=False)()
+    user = models.User(email="bench@example.com", full_name="Bench", is_active=True)
+    user.addresses = [
+        models.UserAddress(phone="+375 29 000-00-00", address=f"Street {i}", city="Minsk", postal_code="220000")
+        for i in range(addresses)
+    ]
+    db.add(user)
+    db.commit()
+    return db, user, statements
+
+def run(name, update, iterations, addresses):
+    db, user, statements = setup(addresses)
+    start = time.perf_counter()
+    for i in range(iterations):
+        user.addresses  # loaded relationships are what jsonable_encoder walks
+        update(db, db_obj=user, obj_in={"full_name": f"Bench {i}", "theme": "dark" if i % 2 else "light"})
+    elapsed = time.perf_counter() - start
+    db.close()
+    return {
+        "variant": name,
+        "iterations": iterations,
+        "us_per_update": round(elapsed / iterations * 1e6, 1),
+        "statements_per_update": round(statements["count"] / iterations, 2),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--addresses", type=int, default=20)
+    args = parser.parse_args()
+
+    results = [
+        run("legacy_jsonable_encoder", legacy_update, args.iterations, args.addresses),
+        run("column_attrs", crud_user.update, args.iterations, args.addresses),
+        run(
+            "update_returning",
+            lambda db, **kw: crud_user.update(db, returning=True, **kw),
+            args.iterations,
+            args.addresses,
+        ),
+    ]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Load benchmark for the main API endpoints.
+
+Seeds a synthetic catalog (see benchmarks.dataset) unless the database
+already has one, or with --template restores a saved copy so every run
+starts from the same data. It then drives the app in-process through httpx's ASGI
+transport with concurrent clients. Prints latency percentiles,
+throughput and SQL statements per request as JSON, per endpoint and
+overall, so runs can be diffed:
+
+    cd backend && python -m benchmarks.bench_endpoints --scale 0.1 --profile mixed \\
+        --concurrency 16 --requests 2000 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+# Request shape: (label, method, path, params, json body)
+Request = Tuple[str, str, str, dict, dict]
+
+CHAT_PROMPTS = [
+    "томат до 50 руб",
+    "семена огурца из россии",
+    "розы голландские",
+    "недорогой базилик",
+    "клубника от 100 руб",
+]
+AI_PROMPTS = ["томат черри", "огурец ранний", "роза алая", "морковь", "петуния"]
+
+def scenarios(rng: random.Random, products: int) -> Dict[str, Callable[[], Request]]:
+    def product_id() -> int:
+        return rng.randint(1, products)
+
+    def sidebar() -> dict:
+        # A typical filter sidebar state: a category or two, maybe a price range
+        params: dict = {"category_id": rng.sample(range(1, 9), rng.randint(1, 2))}
+        if rng.random() < 0.5:
+            params["max_price"] = rng.choice([20, 50, 100])
+        if rng.random() < 0.3:
+            params["in_stock"] = "true"
+        return params
+
+    return {
+        "products": lambda: ("GET /products/", "GET", "/api/v1/products/", {"skip": rng.randint(0, 50) * 20, "limit": 20}, None),
+        "facets": lambda: ("GET /products/facets", "GET", "/api/v1/products/facets", sidebar(), None),
+        "filtered": lambda: ("GET /products/?filters", "GET", "/api/v1/products/", {**sidebar(), "limit": 20}, None),
+        "product_reviews": lambda: ("GET /reviews/product/{id}", "GET", f"/api/v1/reviews/product/{product_id()}", {}, None),
+        "chat_search": lambda: ("POST /chat/search", "POST", "/api/v1/chat/search", {}, {"prompt": rng.choice(CHAT_PROMPTS)}),
+        "ai_search": lambda: ("POST /ai/search", "POST", "/api/v1/ai/search", {"prompt": rng.choice(AI_PROMPTS)}, None),
+        "cart": lambda: ("GET /cart/", "GET", "/api/v1/cart/", {}, None),
+        "orders": lambda: ("GET /orders/", "GET", "/api/v1/orders/", {}, None),
+    }
+
+# Relative weights of each scenario per load profile
+PROFILES: Dict[str, Dict[str, int]] = {
+    "browse": {"products": 6, "facets": 3, "filtered": 3, "product_reviews": 3, "chat_search": 1},
+    "search": {"chat_search": 1, "ai_search": 1},
+    "shopper": {"products": 2, "cart": 4, "orders": 3, "product_reviews": 1},
+    "mixed": {"products": 8, "product_reviews": 4, "cart": 3, "orders": 2, "chat_search": 1, "ai_search": 1},
+}
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+def summarize(samples: List[Tuple[float, int, int]], elapsed: float) -> dict:
+    latencies = sorted(ms for ms, _, _ in samples)
+    queries = [q for _, q, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, status in samples if status >= 400),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else 0.0,
+    }
+
+async def drive(app, args, counts: Dict[str, int]) -> dict:
+    import httpx
+    import jwt
+    from benchmarks.dataset import user_email
+
+    rng = random.Random(args.seed)
+    available = scenarios(rng, counts["products"])
+    weights = PROFILES[args.profile]
+    names = list(weights)
+    # Carts were seeded for the first third of users; keep shoppers there
+    shoppers = max(1, counts["cart_items"] // 3)
+    tokens = [
+        jwt.encode({"email": user_email(i)}, "benchmark", algorithm="HS256")
+        for i in range(min(shoppers, args.concurrency * 4))
+    ]
+    samples: Dict[str, List[Tuple[float, int, int]]] = {}
+    remaining = args.requests
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def worker(index: int) -> None:
+            nonlocal remaining
+            headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+            while remaining > 0:
+                remaining -= 1
+                label, method, path, params, body = available[rng.choices(names, [weights[n] for n in names])[0]]()
+                started = time.perf_counter()
+                response = await client.request(method, path, params=params, json=body, headers=headers)
+                await response.aread()
+                latency = (time.perf_counter() - started) * 1000
+                statements = int(response.headers.get("x-db-queries", 0))
+                samples.setdefault(label, []).append((latency, statements, response.status_code))
+
+        # Warm caches and connection pool before measuring
+        for name in names:
+            label, method, path, params, body = available[name]()
+            await client.request(method, path, params=params, json=body,
+                                 headers={"Authorization": f"Bearer {tokens[0]}"})
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    everything = [sample for values in samples.values() for sample in values]
+    return {
+        "overall": summarize(everything, elapsed),
+        "endpoints": {label: summarize(values, elapsed) for label, values in sorted(samples.items())},
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--scale", type=float, default=0.1,
+                        help="1.0 seeds 100k products; reuse a database only with the scale it was seeded at")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--template", help="restore this seeded template first, creating it if missing")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    args = parser.parse_args()
+
+    # Settings are read at import time: point the app at the benchmark
+    # database and turn on the per-request statement header.
+    os.environ["SQLALCHEMY_DATABASE_URI"] = args.database_url
+    os.environ["DEBUG"] = "true"
+    from app.db.session import engine
+    from app.main import app
+    from benchmarks.dataset import generate, is_populated, scaled_counts
+
+    seeded_at = time.perf_counter()
+    if args.template or not is_populated(engine):
+        generate(engine, args.scale, args.seed, args.template)
+    seed_seconds = time.perf_counter() - seeded_at
+    counts = scaled_counts(args.scale)
+
+    results = asyncio.run(drive(app, args, counts))
+    report = {
+        "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "database": engine.dialect.name,
+        "python": sys.version.split()[0],
+        "scale": args.scale,
+        "rows": counts,
+        "profile": args.profile,
+        "concurrency": args.concurrency,
+        "seed_seconds": round(seed_seconds, 1),
+        **results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
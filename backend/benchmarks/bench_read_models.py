@@ -0,0 +1,112 @@
+"""
+Micro-benchmark for the catalog read paths: full Product hydration versus
+plain column rows.
+
+Compares, per 1000 products, the previous listing path (Product instances
+with selectin-loaded category and manufacturer, turned into
+ProductListItem models and encoded like a response_model) with
+crud.product's ListingColumns rows, and the previous chat search load
+(every Product plus lazy relationships) with
+crud_product_search.load_catalog. Reports CPU time and peak traced memory
+while a page is loaded.
+
+    cd backend && python -m benchmarks.bench_read_models --scale 0.05 --iterations 20
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, schemas
+from app.core.pricing import price_table
+from app.crud.crud_product import INCLUDES, LISTING_FIELDS, ListingColumns, product as crud_product
+from app.crud.crud_product_search import load_catalog
+from benchmarks.dataset import generate
+
+def setup(scale: float):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    counts = generate(engine, scale)
+    # No promotions: keep the price table from loading through the app's engine
+    price_table.load([], [])
+    return sessionmaker(bind=engine, autoflush=False), counts["products"]
+
+def orm_listing(db, limit: int) -> List[Any]:
+    products = (
+        db.query(models.Product)
+        .options(selectinload(models.Product.category), selectinload(models.Product.manufacturer))
+        .order_by(models.Product.id)
+        .limit(limit)
+        .all()
+    )
+    keys = [*LISTING_FIELDS, *INCLUDES]
+    items = [schemas.ProductListItem(**{key: getattr(p, key) for key in keys}) for p in products]
+    return jsonable_encoder(items, exclude_unset=True)
+
+def row_listing(db, limit: int) -> List[Any]:
+    columns = ListingColumns(include=list(INCLUDES))
+    return [columns.record(row) for row in crud_product.get_listing(db, columns=columns, limit=limit)]
+
+# Chat search reads the whole catalog, so these ignore the page size
+def orm_catalog(db, limit: int) -> List[Any]:
+    products = db.query(models.Product).all()
+    for product in products:
+        product.category, product.manufacturer
+    return products
+
+def row_catalog(db, limit: int) -> List[Any]:
+    return load_catalog(db)
+
+def run(name: str, load: Callable, session_factory, limit: int, iterations: int) -> dict:
+    elapsed = 0.0
+    for _ in range(iterations):
+        with session_factory() as db:
+            started = time.process_time()
+            result = load(db, limit)
+            elapsed += time.process_time() - started
+            loaded = len(result)
+    tracemalloc.start()
+    with session_factory() as db:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = load(db, limit)
+        peak = tracemalloc.get_traced_memory()[1] - before
+        del result
+    tracemalloc.stop()
+    per_thousand = 1000 / loaded
+    return {
+        "variant": name,
+        "products": loaded,
+        "cpu_ms_per_1000": round(elapsed / iterations * 1000 * per_thousand, 2),
+        "peak_kib_per_1000": round(peak / 1024 * per_thousand, 1),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=0.05)
+    parser.add_argument("--limit", type=int, default=1000, help="products per page")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    session_factory, products = setup(args.scale)
+    limit = min(args.limit, products)
+    results = [
+        run(name, load, session_factory, limit, args.iterations)
+        for name, load in [
+            ("listing_orm", orm_listing),
+            ("listing_rows", row_listing),
+            ("chat_catalog_orm", orm_catalog),
+            ("chat_catalog_rows", row_catalog),
+        ]
+    ]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
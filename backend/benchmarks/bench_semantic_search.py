@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for semantic product search (app.crud.crud_product_semantic).
+
+Embeds a synthetic catalog of each size with the configured embedder,
+fills the vector index with it, then times the queries below in each
+search mode. Reports embedding throughput, index build time and query
+latency percentiles; past EXACT_SEARCH_LIMIT products the index answers
+from its HNSW graph when hnswlib is installed.
+
+    cd backend && python -m benchmarks.bench_semantic_search --scales 0.1,1
+
+``--model`` defaults to EMBEDDING_MODEL, which must have been downloaded
+(scripts.download_embedding_model); ``--model hashing`` needs none.
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import vector_index
+from app.core.config import settings
+from app.core.vector_index import product_vectors
+from app.crud.crud_product_search import load_catalog, product_search
+from app.crud.crud_product_semantic import HYBRID, SEMANTIC, product_semantic, product_text
+from app.db import seed as seeding
+from app.db.base import Base
+from benchmarks.dataset import fixtures
+
+QUERIES = [
+    "томат черри для теплицы", "сладкая клубника", "семена петрушки",
+    "розы королевские", "огурцы из германии", "тамат черри",
+]
+TABLES = ("categories", "manufacturers", "products")
+
+def load(scale: float) -> Session:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    rows = fixtures(scale)
+    seeding.load_fixtures(engine, {table: rows[table] for table in TABLES})
+    return sessionmaker(bind=engine)()
+
+def build(db: Session) -> dict:
+    embedder = product_semantic.embedder
+    entries = load_catalog(db)
+    texts = [product_text(entry) for entry in entries]
+    started = time.perf_counter()
+    vectors = embedder.embed(texts)
+    embedded = time.perf_counter() - started
+
+    started = time.perf_counter()
+    product_vectors.clear()
+    product_vectors.reset(embedder.name, vectors.shape[1], capacity=len(entries))
+    product_vectors.add([entry.id for entry in entries], vectors)
+    indexed = time.perf_counter() - started
+    product_search.load(db)
+    return {
+        "products": len(entries),
+        "embedder": embedder.name,
+        "graph": product_vectors._graph is not None and len(entries) > vector_index.EXACT_SEARCH_LIMIT,
+        "embed_per_s": round(len(entries) / embedded),
+        "index_ms": round(indexed * 1000, 1),
+    }
+
+def queries(db: Session, mode: str, iterations: int) -> List[float]:
+    timings = []
+    for query in QUERIES:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            product_semantic.search(db, text=query, limit=20, mode=mode)
+        timings.append((time.perf_counter() - started) / iterations * 1000)
+    return sorted(timings)
+
+def percentile(timings: List[float], fraction: float) -> float:
+    return round(timings[min(len(timings) - 1, int(len(timings) * fraction))], 3)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="0.1,1", help="comma separated catalog scales")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    args = parser.parse_args()
+    settings.EMBEDDING_MODEL = args.model
+
+    results = []
+    for scale in (float(value) for value in args.scales.split(",")):
+        with load(scale) as db:
+            built = build(db)
+            for mode in (SEMANTIC, HYBRID):
+                timings = queries(db, mode, args.iterations)
+                results.append({
+                    **built,
+                    "mode": mode,
+                    "p50_ms": percentile(timings, 0.5),
+                    "p95_ms": percentile(timings, 0.95),
+                    "max_ms": round(timings[-1], 3),
+                })
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Synthetic catalog for benchmarks: categories, manufacturers, products,
+users, reviews, orders and carts in proportions resembling the production
+store. Generation is deterministic for a given seed, so runs against the
+same scale are comparable. Rows are loaded with app.db.seed, and
+--template saves the result for later runs to restore instead of reseed.
+
+    cd backend && python -m benchmarks.dataset --database-url sqlite:///bench.db --scale 0.1
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.engine import Engine
+
+from app import models
+from app.db import seed as seeding
+from app.db.base import Base
+from app.models.order import OrderStatus
+
+# Row counts at scale 1.0
+BASE_COUNTS = {
+    "categories": 40,
+    "manufacturers": 300,
+    "products": 100_000,
+    "users": 20_000,
+    "reviews": 300_000,
+    "orders": 60_000,
+    "cart_items": 30_000,
+}
+ITEMS_PER_ORDER = (1, 6)
+
+PRODUCT_TYPES = [
+    ("Томат", "овощи"), ("Огурец", "овощи"), ("Перец", "овощи"), ("Морковь", "овощи"),
+    ("Капуста", "овощи"), ("Баклажан", "овощи"), ("Роза", "цветы"), ("Тюльпан", "цветы"),
+    ("Петуния", "цветы"), ("Астра", "цветы"), ("Базилик", "зелень"), ("Укроп", "зелень"),
+    ("Петрушка", "зелень"), ("Клубника", "ягоды"), ("Малина", "ягоды"), ("Арбуз", "бахчевые"),
+]
+VARIETIES = [
+    "Ранний", "Сахарный", "Гигант", "Черри", "Бычье сердце", "Сибирский", "Медовый",
+    "Звезда", "Алая", "Королевский", "Северный", "Дачный", "Урожайный", "Золотой",
+]
+COUNTRIES = ["Россия", "Германия", "Нидерланды", "Франция", "Италия", "Польша", "Беларусь", "Китай"]
+ORDER_STATUSES = [s.value for s in OrderStatus]
+ORDER_STATUS_WEIGHTS = [5, 10, 15, 60, 10]
+
+def scaled_counts(scale: float) -> Dict[str, int]:
+    counts = {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+    # Every product type needs its category, whatever the scale
+    counts["categories"] = max(counts["categories"], len({kind for _, kind in PRODUCT_TYPES}))
+    return counts
+
+def user_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+def is_populated(engine: Engine) -> bool:
+    if not inspect(engine).has_table(models.Product.__tablename__):
+        return False
+    with engine.connect() as conn:
+        return bool(conn.execute(select(func.count()).select_from(models.Product.__table__)).scalar())
+
+def fixtures(scale: float = 1.0, seed: int = 42) -> Dict[str, Iterator[Dict[str, Any]]]:
+    """
+    Row generators per table with explicit ids (1..n). Each table draws
+    from its own random stream, so the loader may consume them in any
+    foreign key order.
+    """
+    counts = scaled_counts(scale)
+    now = datetime.utcnow()
+
+    def rng(table: str) -> random.Random:
+        return random.Random(f"{seed}:{table}")
+
+    kinds = sorted({kind for _, kind in PRODUCT_TYPES})
+    category_names = kinds + [f"Категория {i}" for i in range(counts["categories"] - len(kinds))]
+    category_by_kind = {kind: i + 1 for i, kind in enumerate(kinds)}
+
+    product_rng = rng("products")
+    prices = [round(product_rng.lognormvariate(3.5, 0.8), 2) for _ in range(counts["products"])]
+    # Skewed popularity: a small share of products gets most of the traffic
+    popular = [product_rng.randint(1, counts["products"]) for _ in range(max(1, counts["products"] // 50))]
+
+    def pick_product(r: random.Random) -> int:
+        return r.choice(popular) if r.random() < 0.6 else r.randint(1, counts["products"])
+
+    def categories():
+        for i, name in enumerate(category_names, 1):
+            yield {"id": i, "name": name}
+
+    def manufacturers():
+        r = rng("manufacturers")
+        for i in range(1, counts["manufacturers"] + 1):
+            yield {"id": i, "name": f"Агрофирма {i}", "country": r.choice(COUNTRIES)}
+
+    def products():
+        r = rng("product_rows")
+        for i, price in enumerate(prices, 1):
+            kind, category = r.choice(PRODUCT_TYPES)
+            stock = r.choice([None, None, 0, r.randint(1, 500)])
+            yield {
+                "id": i,
+                "name": f"{kind} {r.choice(VARIETIES)} {i}",
+                "sku": f"BENCH-{i:07d}",
+                "description": f"Семена: {kind.lower()}, {category}. Партия {i % 97}.",
+                "price": price,
+                "category_id": category_by_kind[category],
+                "manufacturer_id": r.randint(1, counts["manufacturers"]),
+                "average_rating": round(r.uniform(0, 5), 2),
+                "stock_quantity": stock,
+                "in_stock": stock is None or stock > 0,
+                "created_at": now - timedelta(days=r.randint(0, 720)),
+            }
+
+    def users():
+        for i in range(counts["users"]):
+            yield {
+                "id": i + 1,
+                "email": user_email(i),
+                "full_name": f"Покупатель {i}",
+                "user_uid": f"bench-uid-{i}",
+                "is_active": True,
+                "is_superuser": i == 0,
+                "theme": "light",
+                "verified": True,
+            }
+
+    def reviews():
+        r = rng("reviews")
+        for i in range(1, counts["reviews"] + 1):
+            yield {
+                "id": i,
+                "product_id": pick_product(r),
+                "user_id": r.randint(1, counts["users"]),
+                "rating": r.choices([1, 2, 3, 4, 5], [1, 1, 3, 6, 9])[0],
+                "comment": "Хорошая всхожесть" if r.random() < 0.7 else "Не взошли",
+                "created_at": now - timedelta(days=r.randint(0, 365)),
+            }
+
+    def order_lines(order_id: int) -> List[Tuple[int, int]]:
+        r = random.Random(f"{seed}:order_lines:{order_id}")
+        products_in_order = sorted({pick_product(r) for _ in range(r.randint(*ITEMS_PER_ORDER))})
+        return [(product_id, r.randint(1, 5)) for product_id in products_in_order]
+
+    def orders():
+        r = rng("orders")
+        for i in range(1, counts["orders"] + 1):
+            yield {
+                "id": i,
+                "user_id": r.randint(1, counts["users"]),
+                "total_amount": round(sum(prices[p - 1] * q for p, q in order_lines(i)), 2),
+                "status": r.choices(ORDER_STATUSES, ORDER_STATUS_WEIGHTS)[0],
+                "created_at": now - timedelta(days=r.randint(0, 365), minutes=r.randint(0, 1440)),
+            }
+
+    def order_items():
+        item_id = 0
+        for order_id in range(1, counts["orders"] + 1):
+            for product_id, quantity in order_lines(order_id):
+                item_id += 1
+                yield {
+                    "id": item_id,
+                    "order_id": order_id,
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "price": prices[product_id - 1],
+                }
+
+    def cart_items():
+        # Carts belong to the first third of users, one row per product
+        r = rng("cart_items")
+        shoppers = max(1, counts["cart_items"] // 3)
+        seen = set()
+        target = min(counts["cart_items"], shoppers * counts["products"])
+        while len(seen) < target:
+            key = (r.randint(1, shoppers), pick_product(r))
+            if key in seen:
+                continue
+            seen.add(key)
+            yield {"id": len(seen), "user_id": key[0], "product_id": key[1], "quantity": r.randint(1, 3)}
+
+    return {
+        "categories": categories(),
+        "manufacturers": manufacturers(),
+        "products": products(),
+        "users": users(),
+        "reviews": reviews(),
+        "orders": orders(),
+        "order_items": order_items(),
+        "cart_items": cart_items(),
+    }
+
+def generate(engine: Engine, scale: float = 1.0, seed: int = 42, template: Optional[str] = None) -> Dict[str, int]:
+    """
+    Create the schema and fill it, or restore ``template`` when it was
+    saved before. Returns the row counts per table.
+    """
+    if template and seeding.has_template(engine, template):
+        seeding.restore(engine, template)
+        return scaled_counts(scale)
+    Base.metadata.create_all(bind=engine)
+    counts = seeding.load_fixtures(engine, fixtures(scale, seed))
+    if template:
+        seeding.snapshot(engine, template)
+    return counts
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed the synthetic benchmark catalog")
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--template", help="save the seeded database under this template name")
+    args = parser.parse_args()
+    engine = create_engine(args.database_url)
+    print(json.dumps(generate(engine, args.scale, args.seed, args.template), indent=2))
+
+if __name__ == "__main__":
+    main()
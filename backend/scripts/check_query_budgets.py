@@ -0,0 +1,77 @@
+"""
+Replay the endpoints listed in app.core.instrumentation.QUERY_BUDGETS
+against a small seeded SQLite database and fail when one issues more SQL
+statements than its budget. Meant for CI:
+
+    python -m scripts.check_query_budgets
+"""
+import os
+import sys
+import tempfile
+
+_db_path = os.path.join(tempfile.mkdtemp(), "budgets.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_db_path}"
+
+import jwt  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.instrumentation import QUERY_BUDGETS, count_queries  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+ROWS = 25
+
+def seed() -> dict:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    users = [
+        models.User(email=f"budget{i}@example.com", full_name=f"Budget {i}", is_active=True)
+        for i in range(ROWS)
+    ]
+    category = models.Category(name="Budget")
+    manufacturer = models.Manufacturer(name="Budget", country="Budget")
+    db.add_all([*users, category, manufacturer])
+    db.flush()
+    products = [
+        models.Product(
+            name=f"Product {i}", price=10.0 + i, in_stock=True,
+            category_id=category.id, manufacturer_id=manufacturer.id,
+        )
+        for i in range(ROWS)
+    ]
+    db.add_all(products)
+    db.flush()
+    owner = users[0]
+    order = models.Order(user_id=owner.id, total_amount=0.0, status="pending")
+    db.add(order)
+    db.flush()
+    for i, (user, product) in enumerate(zip(users, products)):
+        db.add(models.Review(product_id=products[0].id, user_id=user.id, rating=1 + i % 5, comment="ok"))
+        db.add(models.OrderComment(order_id=order.id, user_id=user.id, comment="ok"))
+        db.add(models.CartItem(user_id=owner.id, product_id=product.id, quantity=1))
+        db.add(models.OrderItem(order_id=order.id, product_id=product.id, quantity=1, price=product.price))
+    db.commit()
+    ids = {"owner": owner.email, "id": products[0].id, "product_id": products[0].id, "order_id": order.id}
+    db.close()
+    return ids
+
+def main() -> int:
+    ids = seed()
+    token = jwt.encode({"email": ids["owner"]}, settings.SECRET_KEY, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+    failures = 0
+    for key, budget in QUERY_BUDGETS.items():
+        method, route = key.split(" ", 1)
+        with count_queries() as stats:
+            response = client.request(method, route.format(**ids), headers=headers)
+        ok = response.status_code < 400 and stats.statements <= budget
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {key}: {stats.statements}/{budget} statements, HTTP {response.status_code}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
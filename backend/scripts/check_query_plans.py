@@ -0,0 +1,107 @@
+"""
+Run EXPLAIN for the statements issued by the crud listing queries and fail
+if any of them reads a table sequentially instead of through an index, or
+if a sorted product listing needs a sort step instead of an index scan.
+
+    python -m scripts.check_query_plans
+
+Point SQLALCHEMY_DATABASE_URI at a migrated database. Tables don't need any
+rows: on Postgres sequential scans are disabled for the check so the plan
+shows whether a usable index exists rather than what is cheapest today.
+"""
+import re
+import sys
+from typing import Callable, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.facets import Filters
+from app.crud.crud_product import SORTS
+from app.db.session import SessionLocal
+from app.db.unit_of_work import UNIT_OF_WORK_KEY
+
+# (label, call, table that must be read through an index)
+QUERIES: List[Tuple[str, Callable[[Session], object], str]] = [
+    ("review.get_by_product", lambda db: crud.review.get_by_product(db, product_id=1), "reviews"),
+    ("review.get_by_user", lambda db: crud.review.get_by_user(db, user_id=1), "reviews"),
+    ("Product.update_average_rating", lambda db: models.Product(id=1).update_average_rating(db), "reviews"),
+    ("order.get_multi_by_owner", lambda db: crud.order.get_multi_by_owner(db, owner_id=1), "orders"),
+    ("order.get_by_status", lambda db: crud.order.get_by_status(db, status="pending"), "orders"),
+    ("Order.order_items", lambda db: db.query(models.OrderItem).filter(models.OrderItem.order_id == 1).all(), "order_items"),
+    ("order_comment.get_by_order", lambda db: crud.order_comment.get_by_order(db, order_id=1), "order_comments"),
+    ("cart.get_cart_items", lambda db: crud.cart.get_cart_items(db, user_id=1), "cart_items"),
+    ("product.get_by_category", lambda db: crud.product.get_by_category(db, category_id=1), "products"),
+]
+
+# Sorted listings must also come back in index order, without a sort step
+SORTED_QUERIES: List[Tuple[str, Callable[[Session], object], str]] = [
+    (f"product.get_listing sort={sort}", lambda db, sort=sort: crud.product.get_listing(db, sort=sort, limit=20), "products")
+    for sort in SORTS
+] + [
+    (
+        f"product.get_listing category sort={sort}",
+        lambda db, sort=sort: crud.product.get_listing(
+            db, sort=sort, after=(1, 1), filters=Filters(category_ids=[1]), limit=20
+        ),
+        "products",
+    )
+    for sort in ("price", "-price", "rating", "-rating")
+]
+
+def capture(db: Session, call: Callable[[Session], object]) -> List[Tuple[str, object]]:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    bind = db.connection()
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        call(db)
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+    return statements
+
+def explain(db: Session, statement: str, parameters) -> str:
+    conn = db.connection()
+    if conn.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+        return "\n".join(row[0] for row in rows)
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+def sequential_scan(plan: str, table: str) -> bool:
+    pattern = rf"Seq Scan on {table}\b|^SCAN {table}\b(?! USING)"
+    return re.search(pattern, plan, re.MULTILINE) is not None
+
+def sort_step(plan: str) -> bool:
+    pattern = r"(?:^|->)\s*Sort\b|USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY"
+    return re.search(pattern, plan, re.MULTILINE) is not None
+
+def main() -> int:
+    db = SessionLocal()
+    # Helpers that commit only flush here; everything is rolled back at the end
+    db.info[UNIT_OF_WORK_KEY] = True
+    failures = 0
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+        checks = [(query, False) for query in QUERIES] + [(query, True) for query in SORTED_QUERIES]
+        for (label, call, table), ordered in checks:
+            for statement, parameters in capture(db, call):
+                plan = explain(db, statement, parameters)
+                ok = not sequential_scan(plan, table) and not (ordered and sort_step(plan))
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {label}")
+                if not ok:
+                    print("     " + plan.replace("\n", "\n     "))
+    finally:
+        db.rollback()
+        db.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
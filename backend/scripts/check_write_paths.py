@@ -0,0 +1,114 @@
+"""
+Regression checks for set-based and transactional write paths, run
+against a throwaway SQLite database. Prints one line per check and exits
+non-zero when one fails. Meant for CI:
+
+    python -m scripts.check_write_paths
+"""
+import os
+import sys
+import tempfile
+
+_db_path = os.path.join(tempfile.mkdtemp(), "writes.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_db_path}"
+
+from typing import Callable, List, Tuple  # noqa: E402
+from unittest import mock  # noqa: E402
+
+import jwt  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import crud, models  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+EMAIL = "writes@example.com"
+PROFILE = {
+    "surname": "Writes", "phone": "+375 29 123-45-67", "address": "Street 1",
+    "city": "Minsk", "postal_code": "220000",
+}
+
+# More rows than SQLite allows terms in a compound SELECT (500)
+ROWS = 600
+
+def seed() -> None:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        category = models.Category(name="Writes")
+        manufacturer = models.Manufacturer(name="Writes", country="Writes")
+        db.add_all([category, manufacturer, models.User(email=EMAIL, full_name="Before", is_active=True)])
+        db.flush()
+        db.add_all([
+            models.Product(
+                name=f"Product {i}", price=1.0, stock_quantity=10, in_stock=True,
+                category_id=category.id, manufacturer_id=manufacturer.id,
+            )
+            for i in range(ROWS)
+        ])
+        db.commit()
+
+def check_bulk_update() -> str:
+    with SessionLocal() as db:
+        ids = [id for (id,) in db.query(models.Product.id)]
+        missing = crud.product.bulk_update(db, items=[{"id": id, "price": 2.0 + id} for id in ids])
+        assert missing == [], missing
+        wrong = db.query(models.Product).filter(models.Product.price != 2.0 + models.Product.id).count()
+        assert wrong == 0, f"{wrong} products not updated"
+    return f"{len(ids)} products"
+
+def check_reserve() -> str:
+    with SessionLocal() as db:
+        ids = [id for (id,) in db.query(models.Product.id)]
+        crud.inventory.reserve(db, lines=[(id, 1) for id in ids])
+        db.commit()
+        wrong = db.query(models.Product).filter(models.Product.stock_quantity != 9).count()
+        assert wrong == 0, f"{wrong} products not reserved"
+    return f"{len(ids)} lines"
+
+def _profile_request(client: TestClient):
+    token = jwt.encode({"email": EMAIL}, settings.SECRET_KEY, algorithm="HS256")
+    return client.put("/api/v1/users/profile", json=PROFILE, headers={"Authorization": f"Bearer {token}"})
+
+def _full_name() -> str:
+    with SessionLocal() as db:
+        return db.query(models.User.full_name).filter(models.User.email == EMAIL).scalar()
+
+def check_failed_commit() -> str:
+    client = TestClient(app, raise_server_exceptions=False)
+    with mock.patch.object(Session, "commit", side_effect=RuntimeError("commit failed")):
+        response = _profile_request(client)
+    assert response.status_code >= 500, f"HTTP {response.status_code}"
+    assert _full_name() == "Before", "profile saved by a failed request"
+    return f"HTTP {response.status_code}"
+
+def check_committed_before_response() -> str:
+    response = _profile_request(TestClient(app))
+    assert response.status_code == 200, f"HTTP {response.status_code}"
+    assert _full_name() == PROFILE["surname"], "profile not saved when the response arrived"
+    return f"HTTP {response.status_code}"
+
+CHECKS: List[Tuple[str, Callable[[], str]]] = [
+    ("bulk_update past 500 rows", check_bulk_update),
+    ("inventory.reserve past 500 lines", check_reserve),
+    ("unit of work failing commit is a 5xx", check_failed_commit),
+    ("unit of work commits before responding", check_committed_before_response),
+]
+
+def main() -> int:
+    seed()
+    failures = 0
+    for name, check in CHECKS:
+        try:
+            detail = check()
+        except Exception as exc:
+            failures += 1
+            print(f"FAIL {name}: {exc!r}")
+        else:
+            print(f"ok   {name}: {detail}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
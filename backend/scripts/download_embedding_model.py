@@ -0,0 +1,27 @@
+"""
+Download the EMBEDDING_MODEL used by semantic product search into
+EMBEDDING_CACHE_DIR. The app only reads the model from there and never
+downloads it, so run this once when provisioning a server or image:
+
+    pip install -r requirements-semantic.txt
+    python -m scripts.download_embedding_model
+"""
+import sys
+
+from app.core.config import settings
+from app.core.embeddings import HASHING, TextEmbedding
+
+def main() -> int:
+    if settings.EMBEDDING_MODEL == HASHING:
+        print("EMBEDDING_MODEL=hashing needs no model")
+        return 0
+    if TextEmbedding is None:
+        print("fastembed is not installed: pip install -r requirements-semantic.txt")
+        return 1
+    model = TextEmbedding(model_name=settings.EMBEDDING_MODEL, cache_dir=settings.EMBEDDING_CACHE_DIR)
+    dimensions = len(next(iter(model.embed(["проверка"]))))
+    print(f"{settings.EMBEDDING_MODEL} ({dimensions} dimensions) is in {settings.EMBEDDING_CACHE_DIR}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
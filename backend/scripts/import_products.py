@@ -0,0 +1,34 @@
+"""
+Bulk import products from a supplier feed (CSV, JSON array or NDJSON):
+
+    python -m scripts.import_products feed.csv
+
+Running servers see the imported products within CATALOG_SYNC_SECONDS;
+the import logs the change to catalog_changes like any other write.
+"""
+import argparse
+import json
+
+from app.crud.crud_product_import import FORMATS, product_import, read_records
+from app.db.session import SessionLocal
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import products from a supplier feed")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    fmt = args.format or args.path.rsplit(".", 1)[-1].lower()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            result = product_import.run(
+                db, read_records(stream, fmt), chunk_size=args.chunk_size
+            )
+    finally:
+        db.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import argparse
+import json
+
+from app.db import seed
+from app.db.session import engine
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed, snapshot and restore the configured database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    synthetic = commands.add_parser("synthetic", help="load the synthetic benchmark catalog")
+    synthetic.add_argument("--scale", type=float, default=0.1)
+    synthetic.add_argument("--seed", type=int, default=42)
+    synthetic.add_argument("--template", help="save the result under this template name")
+    commands.add_parser("snapshot", help="save the database as a template").add_argument("name")
+    commands.add_parser("restore", help="replace the database with a template").add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "synthetic":
+        from benchmarks.dataset import generate
+        print(json.dumps(generate(engine, args.scale, args.seed, args.template), indent=2))
+    elif args.command == "snapshot":
+        seed.snapshot(engine, args.name)
+    else:
+        seed.restore(engine, args.name)
+
+if __name__ == "__main__":
+    main()